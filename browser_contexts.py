@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Browser Contexts - Run checks side by side in isolated contexts of one Chrome
+Each check gets a fresh incognito-style browser context (or at least its own
+tab) created over CDP, and its own WebDriver session attached to the running
+Chrome, so checks that navigate never disturb each other's page
+"""
+
+from selenium.common.exceptions import WebDriverException
+from chrome_driver import create_chrome_driver
+
+def debugger_address(driver):
+    """host:port of the DevTools endpoint chromedriver opened for driver's Chrome"""
+    return driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+
+class BrowserContexts:
+    def __init__(self, address):
+        # DevTools endpoint of the shared Chrome (see debugger_address)
+        self.address = address
+
+    def open(self):
+        """A WebDriver session attached to the shared Chrome, driving a page in a new browser context
+
+        The session creates its context itself, so the owning session is never
+        blocked while it is busy loading a page.
+        """
+        session = create_chrome_driver(debugger_address=self.address)
+        try:
+            attached_to = session.current_window_handle
+            context_id = None
+            try:
+                context_id = session.execute_cdp_cmd("Target.createBrowserContext",
+                                                     {"disposeOnDetach": False})["browserContextId"]
+                params = {"url": "about:blank", "browserContextId": context_id}
+            except WebDriverException:
+                # Context creation is refused on some Chrome builds; a separate tab still
+                # isolates navigation, only cookies and storage are shared
+                params = {"url": "about:blank"}
+            target_id = session.execute_cdp_cmd("Target.createTarget", params)["targetId"]
+            # chromedriver uses DevTools target ids as window handles
+            session.switch_to.window(target_id)
+        except Exception:
+            session.quit()
+            raise
+        return {"context_id": context_id, "target_id": target_id, "session": session,
+                "attached_to": attached_to}
+
+    def close(self, context):
+        """Close the page and its context, then detach the session"""
+        session = context["session"]
+        try:
+            session.close()
+            if context["context_id"]:
+                session.switch_to.window(context["attached_to"])
+                session.execute_cdp_cmd("Target.disposeBrowserContext",
+                                        {"browserContextId": context["context_id"]})
+        except WebDriverException:
+            pass
+        try:
+            # An attached session never quits the Chrome it did not launch
+            session.quit()
+        except WebDriverException:
+            pass
+
+    def run(self, check):
+        """Call check(driver) in a fresh context; the context is closed afterwards"""
+        context = self.open()
+        try:
+            return check(context["session"])
+        finally:
+            self.close(context)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Cache Compare - Cold versus warm loads of the same page
+The cold load follows a CDP wipe of Chrome's HTTP cache and cookies; the warm
+load repeats it straight after. Transfer bytes, TTFB, LCP and the CDN's
+x-vercel-cache verdict of both loads are scored for cache effectiveness
+"""
+
+from page_readiness import PageReadiness
+from network_log import NetworkLog
+from tracing import tracer
+import web_vitals
+
+# x-vercel-cache values meaning the edge answered without going to the origin
+CDN_HITS = ("HIT", "STALE", "PRERENDER")
+
+def clear_browser_cache(driver):
+    """Empty Chrome's HTTP cache and cookie jar"""
+    driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+def load_metrics(requests, document, performance):
+    """What one page load cost, from its network records, document response and web vitals"""
+    headers = {name.lower(): value for name, value in ((document or {}).get("headers") or {}).items()}
+    served_from = {}
+    for request in requests:
+        served_from[request["cache"]] = served_from.get(request["cache"], 0) + 1
+    return {
+        "status": (document or {}).get("status"),
+        "transfer_bytes": sum(request["transfer_size"] or 0 for request in requests),
+        "request_count": len(requests),
+        "served_from": served_from,
+        "ttfb_ms": (performance.get("navigation") or {}).get("ttfb_ms"),
+        "lcp_ms": performance.get("largest_contentful_paint_ms"),
+        "x_vercel_cache": headers.get("x-vercel-cache"),
+        "age": headers.get("age"),
+        "cache_control": headers.get("cache-control")
+    }
+
+def cold_load(driver, url):
+    """Load url with an empty browser cache; returns its load metrics"""
+    clear_browser_cache(driver)
+    network = NetworkLog(driver)
+    network.reset()
+    with tracer.span("navigate", url=url, cache="cold"):
+        driver.get(url)
+    PageReadiness(driver).wait_for_page_settled()
+    network.drain()
+    return load_metrics(network.requests(), network.document_response(), web_vitals.collect(driver))
+
+def _saving(cold, warm):
+    """Fraction of the cold value the warm load saved, clamped to 0..1"""
+    if not cold or warm is None:
+        return None
+    return min(1.0, max(0.0, (cold - warm) / cold))
+
+def cache_effectiveness(cold, warm):
+    """0-100 score: browser bytes saved (50), TTFB saved (25) and a CDN hit on the warm load (25)"""
+    parts = {
+        "bytes_saved": _saving(cold.get("transfer_bytes"), warm.get("transfer_bytes")),
+        "ttfb_saved": _saving(cold.get("ttfb_ms"), warm.get("ttfb_ms")),
+        "cdn_hit": (None if warm.get("x_vercel_cache") is None
+                    else float(warm["x_vercel_cache"].upper() in CDN_HITS))
+    }
+    weights = {"bytes_saved": 50, "ttfb_saved": 25, "cdn_hit": 25}
+    # Parts a host cannot report (no x-vercel-cache header) are left out, not counted as zero
+    scored = {part: value for part, value in parts.items() if value is not None}
+    total_weight = sum(weights[part] for part in scored)
+    score = (round(sum(weights[part] * value for part, value in scored.items()) * 100 / total_weight, 1)
+             if total_weight else None)
+    return {
+        "score": score,
+        "bytes_saved_pct": None if parts["bytes_saved"] is None else round(parts["bytes_saved"] * 100, 1),
+        "ttfb_saved_pct": None if parts["ttfb_saved"] is None else round(parts["ttfb_saved"] * 100, 1),
+        "cdn_cold": cold.get("x_vercel_cache"),
+        "cdn_warm": warm.get("x_vercel_cache"),
+        "lcp_delta_ms": (None if cold.get("lcp_ms") is None or warm.get("lcp_ms") is None
+                         else round(warm["lcp_ms"] - cold["lcp_ms"], 1))
+    }
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+CDP Driver - Drive Chrome directly over the DevTools websocket
+A drop-in for the subset of the Selenium WebDriver API the probes use, without
+the chromedriver HTTP hop: commands go straight to the page over one
+websocket, can be pipelined, and console, network and dialog events arrive as
+they fire instead of being polled
+"""
+
+import os
+import json
+import time
+import base64
+import shutil
+import tempfile
+import itertools
+import threading
+import subprocess
+import urllib.request
+from collections import deque
+import websocket
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import (WebDriverException, TimeoutException, JavascriptException,
+                                        NoAlertPresentException, UnexpectedAlertPresentException)
+from tracing import tracer
+
+CHROME_BINARIES = (
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+)
+# Console levels as chromedriver reports them in the browser log
+CONSOLE_LEVELS = {"error": "SEVERE", "assert": "SEVERE", "warning": "WARNING", "debug": "DEBUG", "verbose": "DEBUG"}
+# Commands that never return while a JavaScript dialog blocks the page
+BLOCKED_BY_DIALOG = ("Runtime.", "Page.captureScreenshot")
+COMMAND_TIMEOUT = 60
+
+def find_chrome():
+    """Path of the Chrome binary: $CHROME_BINARY, else the first known name found"""
+    if os.environ.get("CHROME_BINARY"):
+        return os.environ["CHROME_BINARY"]
+    for name in CHROME_BINARIES:
+        path = shutil.which(name) or (name if os.path.isfile(name) else None)
+        if path:
+            return path
+    raise WebDriverException("Chrome not found; set CHROME_BINARY")
+
+def launch_chrome(arguments=(), timeout=20):
+    """Start Chrome with a DevTools port; returns (process, user data dir, port)"""
+    user_data_dir = tempfile.mkdtemp(prefix="cdp-chrome-")
+    process = subprocess.Popen(
+        [find_chrome(), "--remote-debugging-port=0", f"--user-data-dir={user_data_dir}",
+         "--no-first-run", "--no-default-browser-check", *arguments, "about:blank"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    # Chrome writes the port it picked to DevToolsActivePort once it listens
+    port_file = os.path.join(user_data_dir, "DevToolsActivePort")
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            with open(port_file) as f:
+                port = int(f.readline().strip())
+            return process, user_data_dir, port
+        except (OSError, ValueError):
+            time.sleep(0.05)
+    process.kill()
+    shutil.rmtree(user_data_dir, ignore_errors=True)
+    raise WebDriverException("Chrome did not open its DevTools port")
+
+class CdpConnection:
+    def __init__(self, ws_url):
+        # No Origin header, so Chrome accepts the connection without --remote-allow-origins
+        self.ws = websocket.create_connection(ws_url, suppress_origin=True, enable_multithread=True)
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.closed = False
+        self.reader = threading.Thread(target=self._read, name="cdp-reader", daemon=True)
+        self.reader.start()
+
+    def _read(self):
+        """Route responses to their waiters and events to the listeners"""
+        while True:
+            try:
+                message = json.loads(self.ws.recv())
+            except Exception:
+                break
+            if "id" in message:
+                with self.lock:
+                    waiter = self.pending.pop(message["id"], None)
+                if waiter:
+                    waiter["response"] = message
+                    waiter["done"].set()
+            else:
+                for listener in self.listeners:
+                    listener(message["method"], message.get("params", {}))
+
+        self.closed = True
+        with self.lock:
+            waiters, self.pending = list(self.pending.values()), {}
+        for waiter in waiters:
+            waiter["response"] = {"error": {"message": "DevTools connection closed"}}
+            waiter["done"].set()
+
+    def send_async(self, method, params=None):
+        """Send a command without waiting; returns a waiter for result()"""
+        if self.closed:
+            raise WebDriverException("DevTools connection closed")
+        command_id = next(self.ids)
+        waiter = {"method": method, "done": threading.Event()}
+        with self.lock:
+            self.pending[command_id] = waiter
+        self.ws.send(json.dumps({"id": command_id, "method": method, "params": params or {}}))
+        return waiter
+
+    def result(self, waiter, timeout=COMMAND_TIMEOUT, interrupt=None):
+        """Wait for a command's result; interrupt() may return an exception to raise instead"""
+        deadline = time.monotonic() + timeout
+        while not waiter["done"].wait(0.05):
+            failure = interrupt() if interrupt else None
+            if failure:
+                raise failure
+            if time.monotonic() > deadline:
+                raise TimeoutException(f"{waiter['method']} timed out after {timeout}s")
+        response = waiter["response"]
+        if "error" in response:
+            raise WebDriverException(f"{waiter['method']}: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    def close(self):
+        self.closed = True
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+class CdpElement:
+    def __init__(self, driver, index, displayed):
+        self.driver = driver
+        self.index = index
+        self.displayed = displayed
+
+    def is_displayed(self):
+        """Visibility at lookup time"""
+        return self.displayed
+
+    def click(self):
+        """Click the element found by the last find_elements call"""
+        self.driver.execute_script("window.__cdpElements[arguments[0]].click();", self.index)
+
+class CdpAlert:
+    def __init__(self, driver, dialog):
+        self.driver = driver
+        self.text = dialog.get("message")
+
+    def accept(self):
+        self.driver.execute("Page.handleJavaScriptDialog", {"accept": True})
+
+    def dismiss(self):
+        self.driver.execute("Page.handleJavaScriptDialog", {"accept": False})
+
+class CdpSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    @property
+    def alert(self):
+        """The open JavaScript dialog, like Selenium's switch_to.alert"""
+        if not self.driver.dialog:
+            raise NoAlertPresentException()
+        return CdpAlert(self.driver, self.driver.dialog)
+
+class CdpDriver:
+    def __init__(self, arguments=(), trace_categories=None, page_load_timeout=300, log_size=100000,
+                 connection=None):
+        """Launch Chrome and drive its first page, or drive the page behind an open connection"""
+        self.process = None
+        self.user_data_dir = None
+        self.debugger_address = None
+        self.page_load_timeout = page_load_timeout
+        self.script_timeout = 30
+        self.browser_log = deque(maxlen=log_size)
+        self.performance_log = deque(maxlen=log_size)
+        self.dialog = None
+        self.loaded = threading.Event()
+        self.trace_categories = trace_categories
+        self.trace_complete = threading.Event()
+        self.switch_to = CdpSwitchTo(self)
+        self.connection = connection
+
+        if connection is None:
+            self.process, self.user_data_dir, port = launch_chrome(arguments)
+            self.debugger_address = f"127.0.0.1:{port}"
+            try:
+                with urllib.request.urlopen(f"http://{self.debugger_address}/json/list", timeout=10) as response:
+                    targets = json.load(response)
+                page = next(target for target in targets if target["type"] == "page")
+                self.connection = CdpConnection(page["webSocketDebuggerUrl"])
+            except Exception:
+                self.quit()
+                raise
+        # BrowserContexts attaches extra Selenium sessions through this address
+        self.capabilities = {"browserName": "chrome",
+                             "goog:chromeOptions": {"debuggerAddress": self.debugger_address}}
+        self.connection.listeners.append(self._on_event)
+
+        # Pipelined: every domain is enabled in one round trip
+        commands = [("Page.enable", {}), ("Runtime.enable", {}), ("Network.enable", {}), ("Log.enable", {})]
+        if trace_categories:
+            commands.append(("Tracing.start", self._trace_params()))
+        self.execute_many(commands)
+
+    def _trace_params(self):
+        return {"categories": ",".join(self.trace_categories), "transferMode": "ReportEvents"}
+
+    def _flush_trace(self):
+        """End the running trace so Chrome delivers its events, then start the next one
+
+        Chrome only sends Tracing.dataCollected once a trace ends; chromedriver
+        does the same end-and-restart on every performance log read.
+        """
+        self.trace_complete.clear()
+        self.execute("Tracing.end")
+        # Every dataCollected event precedes tracingComplete on the websocket
+        if not self.trace_complete.wait(COMMAND_TIMEOUT):
+            raise TimeoutException("Tracing.end: no tracingComplete from Chrome")
+        self.execute("Tracing.start", self._trace_params())
+
+    def _on_event(self, method, params):
+        """Keep the events the probes read later in the shape chromedriver logs them"""
+        if method.startswith("Network."):
+            self._log_performance(method, params)
+        elif method == "Tracing.dataCollected":
+            for event in params.get("value", []):
+                self._log_performance(method, event)
+        elif method == "Runtime.consoleAPICalled":
+            frame = (params.get("stackTrace", {}).get("callFrames") or [{}])[0]
+            text = " ".join(str(arg.get("value", arg.get("description", ""))) for arg in params.get("args", []))
+            self.browser_log.append({
+                "level": CONSOLE_LEVELS.get(params.get("type"), "INFO"),
+                "message": f"{frame.get('url', '')} {frame.get('lineNumber', 0)}:{frame.get('columnNumber', 0)} "
+                           f"{json.dumps(text)}",
+                "source": "console-api",
+                "timestamp": int(params.get("timestamp", time.time() * 1000))
+            })
+        elif method == "Runtime.exceptionThrown":
+            details = params.get("exceptionDetails", {})
+            description = details.get("exception", {}).get("description") or details.get("text")
+            self.browser_log.append({
+                "level": "SEVERE",
+                "message": f"{details.get('url', '')} {details.get('lineNumber', 0)}:"
+                           f"{details.get('columnNumber', 0)} {description}",
+                "source": "javascript",
+                "timestamp": int(params.get("timestamp", time.time() * 1000))
+            })
+        elif method == "Log.entryAdded":
+            entry = params["entry"]
+            self.browser_log.append({
+                "level": CONSOLE_LEVELS.get(entry.get("level"), "INFO"),
+                "message": f"{entry.get('url', '')} - {entry.get('text')}",
+                "source": entry.get("source"),
+                "timestamp": int(entry.get("timestamp", time.time() * 1000))
+            })
+        elif method == "Page.javascriptDialogOpening":
+            self.dialog = params
+        elif method == "Page.javascriptDialogClosed":
+            self.dialog = None
+        elif method == "Page.loadEventFired":
+            self.loaded.set()
+        elif method == "Tracing.tracingComplete":
+            self.trace_complete.set()
+
+    def _log_performance(self, method, params):
+        self.performance_log.append({
+            "level": "INFO",
+            "timestamp": int(time.time() * 1000),
+            "message": json.dumps({"message": {"method": method, "params": params}})
+        })
+
+    def _dialog_interrupt(self):
+        if self.dialog:
+            return UnexpectedAlertPresentException(alert_text=self.dialog.get("message"))
+        return None
+
+    def execute(self, driver_command, params=None):
+        """Send one CDP command and wait for its result"""
+        blocked = driver_command.startswith(BLOCKED_BY_DIALOG)
+        if blocked and self.dialog:
+            raise self._dialog_interrupt()
+        # Async scripts run until they call back; they time out like Selenium's script timeout
+        timeout = self.script_timeout if (params or {}).get("awaitPromise") else COMMAND_TIMEOUT
+        waiter = self.connection.send_async(driver_command, params)
+        return self.connection.result(waiter, timeout, self._dialog_interrupt if blocked else None)
+
+    def execute_many(self, commands):
+        """Pipeline (method, params) commands: all are sent before any result is awaited"""
+        waiters = []
+        for method, params in commands:
+            tracer.count_call(method)
+            waiters.append(self.connection.send_async(method, params))
+        return [self.connection.result(waiter, COMMAND_TIMEOUT) for waiter in waiters]
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute(cmd, cmd_args)
+
+    def _value(self, result):
+        """Return value of a Runtime.evaluate, raising page exceptions like Selenium does"""
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise JavascriptException(details.get("exception", {}).get("description") or details.get("text"))
+        return result["result"].get("value")
+
+    def execute_script(self, script, *args):
+        expression = f"(function() {{\n{script}\n}}).apply(null, {json.dumps(list(args))})"
+        return self._value(self.execute("Runtime.evaluate", {
+            "expression": expression, "returnByValue": True, "userGesture": True}))
+
+    def execute_async_script(self, script, *args):
+        # The callback Selenium appends as the last argument resolves the promise
+        expression = (f"new Promise(resolve => (function() {{\n{script}\n}})"
+                      f".apply(null, {json.dumps(list(args))}.concat([resolve])))")
+        return self._value(self.execute("Runtime.evaluate", {
+            "expression": expression, "returnByValue": True, "awaitPromise": True}))
+
+    def set_script_timeout(self, time_to_wait):
+        self.script_timeout = time_to_wait
+
+    def get(self, url):
+        """Navigate and wait for the load event (Selenium's normal page load strategy)"""
+        self.loaded.clear()
+        result = self.execute("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            raise WebDriverException(f"Navigation to {url} failed: {result['errorText']}")
+        if "loaderId" not in result:
+            # Same-document navigation: no new load event
+            return
+        deadline = time.monotonic() + self.page_load_timeout
+        while not self.loaded.wait(0.05):
+            # An alert opened during load ends the wait; the next script call reports it
+            if self.dialog:
+                return
+            if time.monotonic() > deadline:
+                raise TimeoutException(f"Timed out loading {url}")
+
+    @property
+    def current_url(self):
+        return self.execute_script("return location.href;")
+
+    @property
+    def title(self):
+        return self.execute_script("return document.title;")
+
+    def find_elements(self, by=By.CSS_SELECTOR, value=None):
+        """CSS selector lookups only; elements carry their visibility at lookup time"""
+        if by != By.CSS_SELECTOR:
+            raise WebDriverException(f"{by} lookups are not supported by the CDP backend")
+        visibility = self.execute_script("""
+            const found = Array.from(document.querySelectorAll(arguments[0]));
+            window.__cdpElements = found;
+            return found.map(el => el.getClientRects().length > 0 &&
+                             getComputedStyle(el).visibility !== 'hidden');
+        """, value)
+        return [CdpElement(self, index, displayed) for index, displayed in enumerate(visibility)]
+
+    def get_screenshot_as_png(self):
+        return base64.b64decode(self.execute("Page.captureScreenshot", {"format": "png"})["data"])
+
+    def save_screenshot(self, filename):
+        with open(filename, "wb") as f:
+            f.write(self.get_screenshot_as_png())
+        return True
+
+    def get_log(self, log_type):
+        """Drain the buffered "browser" or "performance" entries, like chromedriver"""
+        buffers = {"browser": self.browser_log, "performance": self.performance_log}
+        if log_type not in buffers:
+            raise WebDriverException(f"Unknown log type: {log_type}")
+        if log_type == "performance" and self.trace_categories:
+            self._flush_trace()
+        entries = []
+        buffer = buffers[log_type]
+        while buffer:
+            entries.append(buffer.popleft())
+        return entries
+
+    def quit(self):
+        """Close the connection, stop Chrome and remove its profile"""
+        if self.connection:
+            self.connection.close()
+        if self.process is None:
+            # Attached to a page of a Chrome started elsewhere
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
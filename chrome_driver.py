@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Chrome Driver - Shared Chrome setup for the deployment probes
+Two backends drive the same Chrome: "selenium" goes through chromedriver,
+"cdp" talks to the DevTools websocket directly (see cdp_driver.py)
+"""
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from tracing import tracer
+
+BACKENDS = ("selenium", "cdp")
+CHROME_ARGUMENTS = ("--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu", "--window-size=1920,1080")
+
+def create_chrome_driver(trace_categories=None, debugger_address=None, backend="selenium"):
+    """Launch Chrome with the options every probe uses
+
+    trace_categories also records those trace events into the performance log
+    (see frame_profile.py); they are left off otherwise, tracing is not free.
+    debugger_address attaches a new session to an already running Chrome
+    (see browser_contexts.py) instead of launching one; attached sessions
+    always use chromedriver.
+    backend "cdp" returns a CdpDriver, which answers the part of the WebDriver
+    API the probes use.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown driver backend: {backend}")
+    chrome_options = Options()
+    if debugger_address:
+        chrome_options.debugger_address = debugger_address
+        chrome_options.set_capability("goog:loggingPrefs", {"browser": "ALL", "performance": "ALL"})
+        return tracer.instrument(webdriver.Chrome(options=chrome_options))
+
+    if backend == "cdp":
+        # Imported here so the Selenium backend never needs websocket-client
+        from cdp_driver import CdpDriver
+        return tracer.instrument(CdpDriver(CHROME_ARGUMENTS, trace_categories=trace_categories))
+
+    for argument in CHROME_ARGUMENTS:
+        chrome_options.add_argument(argument)
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    # CDP Network events are read back from the performance log (network_log.py)
+    chrome_options.set_capability("goog:loggingPrefs", {"browser": "ALL", "performance": "ALL"})
+    perf_logging = {"enableNetwork": True, "enablePage": False}
+    if trace_categories:
+        perf_logging["traceCategories"] = ",".join(trace_categories)
+    chrome_options.add_experimental_option("perfLoggingPrefs", perf_logging)
+
+    # Every WebDriver command is counted against the open tracing span
+    return tracer.instrument(webdriver.Chrome(options=chrome_options))
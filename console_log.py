@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Console Log - Bounded capture of browser console messages and exceptions
+Chrome buffers console and uncaught-exception events as they fire; each read
+tags them with the tracing span that was running at their timestamp, counts
+them per severity and keeps a ring buffer of recent events plus the top
+distinct messages, so a noisy page cannot bloat the results
+"""
+
+import hashlib
+import threading
+from collections import deque
+from selenium.common.exceptions import WebDriverException
+from tracing import tracer
+
+SEVERITIES = ("SEVERE", "WARNING", "INFO", "DEBUG")
+
+def message_hash(level, message):
+    """Identity of a message; the location Chrome prefixes it with keeps call sites apart"""
+    return hashlib.sha1(f"{level}\0{message}".encode("utf-8", errors="replace")).hexdigest()[:16]
+
+class ConsoleBuffer:
+    def __init__(self, capacity=100, top_n=10, max_distinct=500):
+        self.recent = deque(maxlen=capacity)
+        self.top_n = top_n
+        self.max_distinct = max_distinct
+        self.counts = {severity: 0 for severity in SEVERITIES}
+        self.distinct = {}
+        self.total = 0
+        # Monitors of several sessions (e.g. an isolated admin context) may share one buffer
+        self.lock = threading.Lock()
+
+    def add(self, entry, phase=None):
+        """Count one browser log entry and keep it in the ring buffer and distinct table"""
+        level = entry.get("level", "INFO")
+        event = {
+            "level": level,
+            "message": entry.get("message", ""),
+            "source": entry.get("source"),
+            "timestamp": entry.get("timestamp"),
+            "phase": phase
+        }
+        digest = message_hash(level, event["message"])
+        with self.lock:
+            self.total += 1
+            self.counts[level] = self.counts.get(level, 0) + 1
+            self.recent.append(event)
+
+            if digest in self.distinct:
+                self.distinct[digest]["count"] += 1
+                return
+            if len(self.distinct) >= self.max_distinct:
+                # Make room by forgetting the rarest message seen so far
+                del self.distinct[min(self.distinct, key=lambda key: self.distinct[key]["count"])]
+            self.distinct[digest] = dict(event, hash=digest, count=1)
+
+    def top(self, level=None):
+        """Most frequent distinct messages, most severe first, optionally of one level"""
+        rank = {severity: i for i, severity in enumerate(SEVERITIES)}
+        with self.lock:
+            messages = [dict(message) for message in self.distinct.values()
+                        if level is None or message["level"] == level]
+        messages.sort(key=lambda message: (rank.get(message["level"], len(rank)), -message["count"]))
+        return messages[:self.top_n]
+
+    def summary(self):
+        """Counts, top distinct messages and the most recent events"""
+        top = self.top()
+        with self.lock:
+            return {
+                "total": self.total,
+                "counts": {level: count for level, count in self.counts.items() if count},
+                "distinct": len(self.distinct),
+                "dropped": self.total - len(self.recent),
+                "top": top,
+                "recent": list(self.recent)
+            }
+
+class ConsoleMonitor:
+    def __init__(self, driver, buffer=None):
+        self.driver = driver
+        self.buffer = buffer or ConsoleBuffer()
+
+    def reset(self):
+        """Discard what Chrome buffered so far, e.g. messages of the previous page"""
+        try:
+            self.driver.get_log("browser")
+        except WebDriverException:
+            pass
+
+    def drain(self):
+        """Move everything Chrome buffered since the last read into the buffer; returns the count"""
+        try:
+            entries = self.driver.get_log("browser")
+        except WebDriverException:
+            return 0
+        # Chrome stamps entries in epoch milliseconds when they fire, not when read
+        phases = tracer.phases_at([entry.get("timestamp", 0) / 1000 for entry in entries])
+        for entry, phase in zip(entries, phases):
+            self.buffer.add(entry, phase)
+        return len(entries)
+
+    def errors(self):
+        """Distinct SEVERE messages (console errors and uncaught exceptions), most frequent first"""
+        return self.buffer.top("SEVERE")
@@ -7,6 +7,10 @@ Mission: Identify what's broken after commit a68aa24
 import time
 import json
 import os
+import argparse
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -14,89 +18,449 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from PIL import Image, ImageDraw, ImageFont
+from screenshot_pipeline import ScreenshotPipeline
+from screenshot_store import ScreenshotStore
+from visual_diff import compare_files
+from static_probe import StaticPage
+from results_stream import ResultsStream, write_results
+from run_history import RunHistory
+from chrome_driver import create_chrome_driver, BACKENDS
+from page_readiness import PageReadiness
+from dom_snapshot import DomSnapshot
+import web_vitals
+import cache_compare
+import network_log
+from network_log import NetworkLog
+from probe_cache import ProbeCache, deployment_identity
+from selector_cache import SelectorCache
+from browser_contexts import BrowserContexts, debugger_address
+from console_log import ConsoleMonitor
+import probe_matrix
+from pattern_scan import PatternScanner, summarize_hits
+from tracing import tracer, traced
+
+OUTPUT_DIR = "/Users/paulbridges/Downloads/try again"
+
+TITLE_SELECTORS = [
+    "h1",
+    "[class*='gradient']",
+    "[class*='title']",
+    ".bg-gradient-to-r"
+]
+SUBTITLE_SELECTOR = ".font-semibold, [class*='font-semibold'], h2, h3"
+ADMIN_SELECTORS = [
+    "a[href*='admin']",
+    "button[class*='admin']",
+    "[data-testid='admin']",
+    "a:contains('Admin')",
+    "button:contains('Admin')"
+]
+MODAL_SELECTORS = [
+    ".modal",
+    "[role='dialog']",
+    ".fixed",
+    ".z-50"
+]
+CHECKBOX_SELECTOR = "input[type='checkbox'], [role='checkbox']"
+
+# Selectors resolved in the browser when a page snapshot is captured
+SNAPSHOT_SELECTORS = (TITLE_SELECTORS + [SUBTITLE_SELECTOR] +
+                      [s for s in ADMIN_SELECTORS if ":contains(" not in s] +
+                      MODAL_SELECTORS + [CHECKBOX_SELECTOR])
+
+ALL_CHECKS = {
+    "urban_directory_title", "bold_subtitles", "admin_access", "modern_checkboxes",
+    "firebase_integration", "deployment_info", "performance", "network"
+}
+FIREBASE_SCANNER = PatternScanner({
+    "firebase": "firebase",
+    "firestore": "firestore",
+    "googleapis": "googleapis.com"
+})
+
+# Features compare_pair puts side by side; generate_recommendations reads a subset of them
+COMPARED_FEATURES = ("urban_directory_title", "bold_subtitles", "admin_access", "admin_subtitle",
+                     "modern_checkboxes", "firebase_integration")
+
+# Checks answerable from server-rendered markup alone
+STATIC_CHECKS = {"urban_directory_title", "bold_subtitles", "firebase_integration", "deployment_info"}
+
+DEFAULT_DOMAINS = {
+    "lbtr.shop": "https://lbtr.shop",
+    "urban-reel.vercel.app": "https://urban-reel.vercel.app"
+}
 
 class DeploymentTester:
-    def __init__(self):
+    def __init__(self, workers=1, screenshot_encodings=("webp", "thumbnail"), checks=None, driver=None,
+                 budgets=None, cache=None, baseline=None, isolate_checks=False, cache_compare=False,
+                 launch_browser=True, backend="selenium"):
         self.results = {
             "test_timestamp": datetime.now().isoformat(),
             "domains": {},
             "comparison": {},
             "recommendations": []
         }
-        self.setup_driver()
+        self.workers = max(1, workers)
+        self.checks = set(checks or ALL_CHECKS)
+        unknown = self.checks - ALL_CHECKS
+        if unknown:
+            raise ValueError(f"Unknown checks: {sorted(unknown)}")
+        self.budgets = dict(network_log.DEFAULT_BUDGETS)
+        self.budgets.update(budgets or {})
+        # Optional ProbeCache: unchanged deployments reuse their previous results
+        self.cache = cache
+        # Domain every other domain is compared against; defaults to the first one probed
+        self.baseline = baseline
+        # Load each domain cold (cache and cookies cleared) before the regular, warm load
+        self.cache_compare = cache_compare
+        # Driver backend of the Chrome sessions launched here (see chrome_driver.py)
+        self.backend = backend
+        # Each thread owns its own Chrome instance; all of them are quit in cleanup()
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self.screenshots = ScreenshotPipeline()
+        self.stream = None
+        self.store = ScreenshotStore(os.path.join(OUTPUT_DIR, "screenshots"), screenshot_encodings)
+        # With isolate_checks the admin flow runs in its own browser context, beside the home page checks
+        self.isolated = None
+        if isolate_checks:
+            self.isolated = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="context")
+        # Last winning TITLE_SELECTORS / ADMIN_SELECTORS entry per page, kept across runs
+        self.selectors = SelectorCache(os.path.join(OUTPUT_DIR, "selector_cache.json"))
+        if driver:
+            self.use_driver(driver)
+        elif launch_browser and self.workers == 1 and self.needs_browser():
+            self.setup_driver()
+
+    @property
+    def driver(self):
+        """Chrome driver owned by the calling thread, launched on first use"""
+        if getattr(self._local, "driver", None) is None:
+            self.setup_driver()
+        return self._local.driver
+
+    @property
+    def wait(self):
+        """WebDriverWait bound to the calling thread's driver"""
+        if getattr(self._local, "wait", None) is None:
+            self.setup_driver()
+        return self._local.wait
 
     def setup_driver(self):
         """Initialize Chrome driver with appropriate options"""
-        chrome_options = Options()
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        driver = create_chrome_driver(backend=self.backend)
+        self._local.driver = driver
+        self._local.wait = WebDriverWait(driver, 15)
+        with self._drivers_lock:
+            self._drivers.append(driver)
 
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 15)
+    def use_driver(self, driver):
+        """Probe with a borrowed driver on the calling thread; it is never quit here"""
+        self._local.driver = driver
+        self._local.wait = WebDriverWait(driver, 15)
 
     def log_action(self, action, details=""):
         """Log actions with timestamp"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {action}")
-        if details:
-            print(f"    {details}")
+        with self._log_lock:
+            print(f"[{timestamp}] {action}")
+            if details:
+                print(f"    {details}")
 
+    @traced("screenshot")
     def take_screenshot(self, filename, annotation=None):
-        """Take screenshot and optionally annotate"""
-        filepath = f"/Users/paulbridges/Downloads/try again/{filename}"
-        self.driver.save_screenshot(filepath)
-
-        if annotation:
-            # Add annotation to screenshot
-            img = Image.open(filepath)
-            draw = ImageDraw.Draw(img)
-            try:
-                # Try to use a larger font
-                font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 24)
-            except:
-                font = ImageFont.load_default()
+        """Take screenshot in memory and queue it for the content-addressed store"""
+        png_bytes = self.driver.get_screenshot_as_png()
+        digest = self.screenshots.submit_frame(png_bytes, self.store)
+
+        self.log_action(f"Screenshot queued: {filename}", f"{digest[:12]} {annotation or ''}")
+        return {
+            "name": filename,
+            "hash": digest,
+            "annotation": annotation,
+            "files": self.store.files_for(digest)
+        }
 
-            # Add semi-transparent background for text
-            text_bbox = draw.textbbox((0, 0), annotation, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
+    def record_feature(self, domain_name, domain_results, feature, value):
+        """Store a finished feature check and stream it immediately"""
+        domain_results["features"][feature] = value
+        if self.stream:
+            self.stream.feature(domain_name, feature, value)
+
+    def record_screenshot(self, domain_name, domain_results, screenshot):
+        """Store a screenshot reference and stream it immediately"""
+        domain_results["screenshots"].append(screenshot)
+        if self.stream:
+            self.stream.screenshot(domain_name, screenshot)
+
+    @traced("snapshot")
+    def capture_snapshot(self):
+        """Capture the current page (DOM, text, classes, source) in one browser call"""
+        return DomSnapshot.capture(self.driver, SNAPSHOT_SELECTORS, include_html=True)
+
+    @traced("network")
+    def capture_network(self, network, domain_results, page):
+        """Summarize the requests made since the last reset as network.<page>"""
+        try:
+            summary = network_log.summarize(network.drain().requests(), self.budgets)
+            domain_results["network"][page] = summary
+            self.log_action(f"Network waterfall ({page})",
+                            f"{summary['request_count']} requests, {summary['total_bytes'] // 1024} KB, "
+                            f"{len(summary['budget_violations'])} budgets exceeded")
+        except Exception as e:
+            domain_results["network"][page] = {"error": str(e)}
 
-            # Create overlay
-            overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            overlay_draw.rectangle([10, 10, text_width + 30, text_height + 30],
-                                 fill=(0, 0, 0, 180))
+    @traced("console_log")
+    def check_console_errors(self, console):
+        """Drain the console log; returns the distinct JavaScript errors and exceptions"""
+        console.drain()
+        return console.errors()
 
-            # Composite and add text
-            img = Image.alpha_composite(img.convert('RGBA'), overlay)
-            draw = ImageDraw.Draw(img)
-            draw.text((20, 20), annotation, fill=(255, 255, 255), font=font)
+    def compare_cache(self, domain_name, domain_results, network, document):
+        """Record the warm load next to the cold one and score how well caching worked"""
+        try:
+            performance = domain_results.get("performance")
+            if not performance or "error" in performance:
+                performance = web_vitals.collect(self.driver)
+            cache = domain_results["cache"]
+            cache["warm"] = cache_compare.load_metrics(network.drain().requests(), document, performance)
+            cache["effectiveness"] = cache_compare.cache_effectiveness(cache["cold"], cache["warm"])
+            self.log_action(f"Cache effectiveness: {cache['effectiveness']['score']}",
+                            f"cold {cache['cold']['transfer_bytes'] // 1024} KB / TTFB {cache['cold']['ttfb_ms']}ms "
+                            f"/ {cache['cold']['x_vercel_cache']}, warm {cache['warm']['transfer_bytes'] // 1024} KB "
+                            f"/ TTFB {cache['warm']['ttfb_ms']}ms / {cache['warm']['x_vercel_cache']}")
+        except Exception as e:
+            domain_results["cache"]["error"] = str(e)
 
-            img.convert('RGB').save(filepath)
+    @traced()
+    def check_title(self, page):
+        """Check for the Urban Directory title (page is a DomSnapshot or StaticPage)"""
+        self.log_action("Testing Urban Directory title with animated gradient")
+        try:
+            # The selector that matched last time on this page is tried first
+            selector, elements = self.selectors.resolve(
+                page.url, "urban_directory_title", TITLE_SELECTORS,
+                lambda selector: [element for element in page.select(selector) if "Urban" in element["text"]])
+            if elements:
+                text = elements[0]["text"]
+                classes = elements[0]["classes"]
+                self.log_action("✓ Urban Directory title found", f"Text: {text}")
+                return {
+                    "found": True,
+                    "text": text,
+                    "has_gradient": "gradient" in (classes or "") or "",
+                    "classes": classes,
+                    "selector": selector
+                }
 
-        self.log_action(f"Screenshot saved: {filename}", annotation or "")
-        return filepath
+            self.log_action("✗ Urban Directory title not found")
+            return {"found": False}
 
-    def check_console_errors(self):
-        """Check for JavaScript console errors"""
+        except Exception as e:
+            return {"error": str(e)}
+
+    def find_admin(self, page, selector):
+        """Admin link candidates for one ADMIN_SELECTORS entry"""
+        if ":contains(" in selector:
+            # Match on own text nodes, like //*[contains(text(), 'Admin')]
+            return page.find_text("Admin")
+        return page.select(selector)
+
+    @traced()
+    def check_subtitles(self, page):
+        """Check for bold subtitles with font-semibold"""
+        self.log_action("Testing bold subtitles")
         try:
-            logs = self.driver.get_log('browser')
-            errors = [log for log in logs if log['level'] == 'SEVERE']
-            return errors
-        except:
-            return []
-
-    def test_domain(self, domain_name, url):
-        """Test a specific domain comprehensively"""
-        self.log_action(f"Testing domain: {domain_name}", url)
+            subtitles = []
+            for element in page.select(SUBTITLE_SELECTOR):
+                text = element["text"]
+                if text and len(text) > 5:  # Skip empty or very short text
+                    subtitles.append({
+                        "text": text,
+                        "classes": element["classes"],
+                        "tag": element["tag"]
+                    })
+
+            self.log_action(f"✓ Found {len(subtitles)} subtitle elements")
+            return subtitles
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    @traced()
+    def check_firebase(self, page):
+        """Check for Firebase SDK references in the page source"""
+        self.log_action("Testing Firebase integration")
+        try:
+            # One pass over the source finds every indicator, with locations
+            hits = FIREBASE_SCANNER.scan(page.html)
+            likely_integrated = any(hits.values())
+
+            self.log_action(f"✓ Firebase integration check complete",
+                          f"Likely integrated: {likely_integrated}")
+            return {
+                "firebase_in_source": bool(hits["firebase"]),
+                "firestore_in_source": bool(hits["firestore"]),
+                "googleapis_in_source": bool(hits["googleapis"]),
+                "likely_integrated": likely_integrated,
+                "hits": summarize_hits(hits, page.html)
+            }
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    @traced()
+    def check_deployment_meta(self, page):
+        """Collect version/build/deploy meta tags"""
+        self.log_action("Checking deployment information")
+        deployment_info = {}
+
+        for meta in page.find_tag("meta"):
+            name = meta["attrs"].get("name")
+            content = meta["attrs"].get("content")
+            if name and content:
+                if any(keyword in name.lower() for keyword in ["version", "build", "deploy"]):
+                    deployment_info[name] = content
+
+        return deployment_info
+
+    @traced()
+    def check_admin_subtitle(self, domain_name, domain_results, snapshot):
+        """Record whether the admin page shows its subtitle"""
+        admin_subtitles = snapshot.find_text("Manage your video directory")
+        if admin_subtitles:
+            self.record_feature(domain_name, domain_results, "admin_subtitle", {
+                "found": True,
+                "text": admin_subtitles[0]["text"]
+            })
+            self.log_action("✓ Admin subtitle found", admin_subtitles[0]["text"])
+        else:
+            self.record_feature(domain_name, domain_results, "admin_subtitle", {"found": False})
+            self.log_action("✗ Admin subtitle not found")
+
+    @traced()
+    def check_admin(self, domain_name, domain_results, snapshot, readiness, network, follow_admin=True):
+        """Tests 3-4: find the admin link, open the admin page and its form; returns the latest snapshot"""
+        self.log_action("Testing admin dashboard access")
+        try:
+            selector, elements = self.selectors.resolve(
+                snapshot.url, "admin_access", ADMIN_SELECTORS,
+                lambda selector: self.find_admin(snapshot, selector))
+
+            if elements:
+                admin_element = elements[0]
+                href = admin_element["attrs"].get("href") if admin_element["tag"] == "a" else None
+                self.record_feature(domain_name, domain_results, "admin_access", {
+                    "found": True,
+                    "element_type": admin_element["tag"],
+                    "text": admin_element.get("text", ""),
+                    "href": href,
+                    "selector": selector
+                })
+                self.log_action("✓ Admin access found", selector)
+
+                # Try to access admin page
+                if href and follow_admin:
+                    self.log_action("Navigating to admin page")
+                    network.reset()
+                    with tracer.span("navigate", url=href):
+                        self.driver.get(href)
+                    readiness.wait_for_page_settled()
+
+                    # Take admin page screenshot
+                    admin_screenshot = self.take_screenshot(f"{domain_name}_admin.png",
+                                                          f"{domain_name} - Admin Page")
+                    self.record_screenshot(domain_name, domain_results, admin_screenshot)
+
+                    snapshot = self.capture_snapshot()
+
+                    # Check for admin subtitle
+                    self.check_admin_subtitle(domain_name, domain_results, snapshot)
+
+            else:
+                self.record_feature(domain_name, domain_results, "admin_access", {"found": False})
+                self.log_action("✗ Admin access not found")
+
+        except Exception as e:
+            self.record_feature(domain_name, domain_results, "admin_access", {"error": str(e)})
+
+        # Test 4: Check for modern checkbox UI (if on admin page)
+        if "admin" in snapshot.url.lower():
+            snapshot = self.check_checkboxes(domain_name, domain_results, snapshot, readiness)
+
+        return snapshot
+
+    @traced()
+    def check_checkboxes(self, domain_name, domain_results, snapshot, readiness):
+        """Open the admin form and inspect its checkboxes; returns the latest snapshot"""
+        self.log_action("Testing modern checkbox UI in admin")
+        try:
+            # Look for add/edit buttons
+            add_buttons = snapshot.find_text("Add", "Edit")
+
+            if add_buttons:
+                snapshot.click(self.driver, add_buttons[0])
+
+                # Look for modal or form
+                readiness.wait_for_any_selector(MODAL_SELECTORS, timeout=5)
+                snapshot = self.capture_snapshot()
+
+                modal_found = False
+                for selector in MODAL_SELECTORS:
+                    modals = snapshot.select(selector)
+                    # find_element semantics: only the first match is considered
+                    if modals and modals[0].get("visible"):
+                        modal = modals[0]
+                        modal_found = True
+
+                        # Take modal screenshot
+                        modal_screenshot = self.take_screenshot(f"{domain_name}_modal.png",
+                                                                f"{domain_name} - Modal/Form")
+                        self.record_screenshot(domain_name, domain_results, modal_screenshot)
+
+                        # Check for modern checkboxes
+                        checkboxes = snapshot.descendants(modal, CHECKBOX_SELECTOR)
+
+                        checkbox_features = []
+                        for checkbox in checkboxes:
+                            parent_classes = snapshot.parent(checkbox)["classes"] or ""
+                            checkbox_features.append({
+                                "classes": checkbox["classes"],
+                                "parent_classes": parent_classes,
+                                "has_glassmorphism": "backdrop" in parent_classes or ""
+                            })
+
+                        self.record_feature(domain_name, domain_results, "modern_checkboxes", {
+                            "found": len(checkboxes) > 0,
+                            "count": len(checkboxes),
+                            "features": checkbox_features
+                        })
+
+                        self.log_action(f"✓ Found {len(checkboxes)} checkboxes")
+                        break
+
+                if not modal_found:
+                    self.record_feature(domain_name, domain_results, "modern_checkboxes", {"modal_not_found": True})
+
+        except Exception as e:
+            self.record_feature(domain_name, domain_results, "modern_checkboxes", {"error": str(e)})
+
+        return snapshot
+
+    def needs_browser(self):
+        """Whether any selected check needs Chrome (computed styles, clicks, screenshots)"""
+        return not self.checks <= STATIC_CHECKS
+
+    @traced(label="domain_name")
+    def test_domain_static(self, domain_name, url):
+        """Answer markup-only checks from the server-rendered HTML, without Chrome"""
+        self.log_action(f"Testing domain (static): {domain_name}", url)
 
         domain_results = {
             "url": url,
+            "probe_tier": "static",
             "accessible": False,
             "page_title": None,
             "features": {},
@@ -104,282 +468,163 @@ class DeploymentTester:
             "screenshots": [],
             "deployment_info": {}
         }
+        if self.stream:
+            self.stream.domain_start(domain_name, domain_results)
+
+        try:
+            page = StaticPage.fetch(url)
+            domain_results["accessible"] = True
+            domain_results["page_title"] = page.title
+            domain_results["static_fetch_ms"] = page.elapsed_ms
+            self.log_action(f"Page fetched in {page.elapsed_ms}ms", f"Title: {page.title}")
+
+            if "urban_directory_title" in self.checks:
+                self.record_feature(domain_name, domain_results, "urban_directory_title", self.check_title(page))
+            if "bold_subtitles" in self.checks:
+                self.record_feature(domain_name, domain_results, "bold_subtitles", self.check_subtitles(page))
+            if "firebase_integration" in self.checks:
+                self.record_feature(domain_name, domain_results, "firebase_integration", self.check_firebase(page))
+            if "deployment_info" in self.checks:
+                domain_results["deployment_info"] = self.check_deployment_meta(page)
+                domain_results["deployment_info"]["response_headers"] = network_log.deployment_headers(
+                    page.url, page.status, page.headers)
+
+        except Exception as e:
+            domain_results["error"] = str(e)
+            self.log_action(f"✗ Error testing {domain_name}", str(e))
+
+        if self.stream:
+            self.stream.domain_end(domain_name, domain_results)
+        return domain_results
+
+    @traced(label="domain_name")
+    def test_domain(self, domain_name, url, navigate=True, checks=None, follow_admin=True):
+        """Test a specific domain comprehensively
+
+        With navigate=False the page must already be loaded in self.driver.
+        checks narrows self.checks for this call; follow_admin=False only looks
+        for the admin link, leaving the admin page to its own matrix job.
+        """
+        checks = self.checks if checks is None else checks
+        self.log_action(f"Testing domain: {domain_name}", url)
+
+        domain_results = {
+            "url": url,
+            "probe_tier": "browser",
+            "accessible": False,
+            "page_title": None,
+            "features": {},
+            "console_errors": [],
+            "screenshots": [],
+            "deployment_info": {},
+            "wait_timings": []
+        }
+        if self.stream:
+            self.stream.domain_start(domain_name, domain_results)
+        readiness = PageReadiness(self.driver)
+        # CDP network events also supply the document headers for deployment_info
+        network = NetworkLog(self.driver)
+        # Console messages are tagged with the span (phase) running when they fired
+        console = ConsoleMonitor(self.driver)
+        if "network" in checks:
+            domain_results["network"] = {}
+
+        admin_future = None
+        if self.isolated and follow_admin and checks & {"admin_access", "modern_checkboxes"}:
+            # Tests 3-4 load the site again in a fresh context while this tab runs the rest
+            admin_future = self.isolated.submit(BrowserContexts(debugger_address(self.driver)).run,
+                                                functools.partial(self.test_admin_isolated, domain_name, url, checks,
+                                                                  console.buffer))
 
         try:
             # Navigate to the domain
-            self.driver.get(url)
-            time.sleep(3)  # Wait for initial load
+            if navigate:
+                if self.cache_compare:
+                    # The regular navigation below then doubles as the warm load
+                    try:
+                        domain_results["cache"] = {"cold": cache_compare.cold_load(self.driver, url)}
+                    except Exception as e:
+                        domain_results["cache"] = {"error": str(e)}
+                network.reset()
+                console.reset()
+                with tracer.span("navigate", url=url):
+                    self.driver.get(url)
+                readiness.wait_for_page_settled()
+                console.drain()
+            document = network.drain().document_response()
+            if "network" in checks:
+                self.capture_network(network, domain_results, "home")
+
+            # Load metrics describe the first navigation, so read them before anything else runs
+            if "performance" in checks:
+                try:
+                    domain_results["performance"] = web_vitals.collect(self.driver)
+                    perf = domain_results["performance"]
+                    self.log_action("Performance captured",
+                                    f"TTFB {perf['navigation']['ttfb_ms']}ms, "
+                                    f"LCP {perf['largest_contentful_paint_ms']}ms, "
+                                    f"CLS {perf['cumulative_layout_shift']}, "
+                                    f"{perf['long_tasks']} long tasks")
+                except Exception as e:
+                    domain_results["performance"] = {"error": str(e)}
+
+            if "cold" in domain_results.get("cache", {}):
+                self.compare_cache(domain_name, domain_results, network, document)
 
             # Take initial screenshot
             screenshot = self.take_screenshot(f"{domain_name}_initial.png",
                                             f"{domain_name} - Initial Load")
-            domain_results["screenshots"].append(screenshot)
+            self.record_screenshot(domain_name, domain_results, screenshot)
+
+            # Capture the whole page in one round trip; the checks below run against it
+            snapshot = self.capture_snapshot()
 
             # Check if page loaded
             domain_results["accessible"] = True
-            domain_results["page_title"] = self.driver.title
-            self.log_action(f"Page loaded successfully", f"Title: {self.driver.title}")
+            domain_results["page_title"] = snapshot.title
+            self.log_action(f"Page loaded successfully", f"Title: {snapshot.title}")
 
             # Test 1: Check for Urban Directory title with gradient animation
-            self.log_action("Testing Urban Directory title with animated gradient")
-            try:
-                # Look for the main title
-                title_selectors = [
-                    "h1",
-                    "[class*='gradient']",
-                    "[class*='title']",
-                    ".bg-gradient-to-r"
-                ]
-
-                title_found = False
-                for selector in title_selectors:
-                    try:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        for element in elements:
-                            text = element.text.strip()
-                            if "Urban Directory" in text or "Urban" in text:
-                                domain_results["features"]["urban_directory_title"] = {
-                                    "found": True,
-                                    "text": text,
-                                    "has_gradient": "gradient" in element.get_attribute("class") or "",
-                                    "classes": element.get_attribute("class")
-                                }
-                                title_found = True
-                                self.log_action("✓ Urban Directory title found", f"Text: {text}")
-                                break
-                        if title_found:
-                            break
-                    except:
-                        continue
-
-                if not title_found:
-                    domain_results["features"]["urban_directory_title"] = {"found": False}
-                    self.log_action("✗ Urban Directory title not found")
-
-            except Exception as e:
-                domain_results["features"]["urban_directory_title"] = {"error": str(e)}
+            if "urban_directory_title" in checks:
+                self.record_feature(domain_name, domain_results, "urban_directory_title", self.check_title(snapshot))
 
             # Test 2: Check for bold subtitles with font-semibold
-            self.log_action("Testing bold subtitles")
-            try:
-                subtitle_elements = self.driver.find_elements(By.CSS_SELECTOR,
-                    ".font-semibold, [class*='font-semibold'], h2, h3")
-
-                subtitles = []
-                for element in subtitle_elements:
-                    text = element.text.strip()
-                    if text and len(text) > 5:  # Skip empty or very short text
-                        subtitles.append({
-                            "text": text,
-                            "classes": element.get_attribute("class"),
-                            "tag": element.tag_name
-                        })
-
-                domain_results["features"]["bold_subtitles"] = subtitles
-                self.log_action(f"✓ Found {len(subtitles)} subtitle elements")
-
-            except Exception as e:
-                domain_results["features"]["bold_subtitles"] = {"error": str(e)}
-
-            # Test 3: Check for admin dashboard access
-            self.log_action("Testing admin dashboard access")
-            try:
-                # Look for admin link or button
-                admin_selectors = [
-                    "a[href*='admin']",
-                    "button[class*='admin']",
-                    "[data-testid='admin']",
-                    "a:contains('Admin')",
-                    "button:contains('Admin')"
-                ]
-
-                admin_found = False
-                for selector in admin_selectors:
-                    try:
-                        if ":contains(" in selector:
-                            # Use XPath for text content
-                            xpath = f"//*[contains(text(), 'Admin')]"
-                            elements = self.driver.find_elements(By.XPATH, xpath)
-                        else:
-                            elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-
-                        if elements:
-                            admin_element = elements[0]
-                            domain_results["features"]["admin_access"] = {
-                                "found": True,
-                                "element_type": admin_element.tag_name,
-                                "text": admin_element.text,
-                                "href": admin_element.get_attribute("href") if admin_element.tag_name == "a" else None
-                            }
-                            admin_found = True
-                            self.log_action("✓ Admin access found")
-
-                            # Try to access admin page
-                            if admin_element.tag_name == "a":
-                                href = admin_element.get_attribute("href")
-                                if href:
-                                    self.log_action("Navigating to admin page")
-                                    self.driver.get(href)
-                                    time.sleep(2)
-
-                                    # Take admin page screenshot
-                                    admin_screenshot = self.take_screenshot(f"{domain_name}_admin.png",
-                                                                          f"{domain_name} - Admin Page")
-                                    domain_results["screenshots"].append(admin_screenshot)
-
-                                    # Check for admin subtitle
-                                    try:
-                                        admin_subtitle = self.driver.find_element(By.XPATH,
-                                            "//*[contains(text(), 'Manage your video directory')]")
-                                        domain_results["features"]["admin_subtitle"] = {
-                                            "found": True,
-                                            "text": admin_subtitle.text
-                                        }
-                                        self.log_action("✓ Admin subtitle found", admin_subtitle.text)
-                                    except:
-                                        domain_results["features"]["admin_subtitle"] = {"found": False}
-                                        self.log_action("✗ Admin subtitle not found")
-
-                            break
-                    except:
-                        continue
-
-                if not admin_found:
-                    domain_results["features"]["admin_access"] = {"found": False}
-                    self.log_action("✗ Admin access not found")
-
-            except Exception as e:
-                domain_results["features"]["admin_access"] = {"error": str(e)}
+            if "bold_subtitles" in checks:
+                self.record_feature(domain_name, domain_results, "bold_subtitles", self.check_subtitles(snapshot))
 
-            # Test 4: Check for modern checkbox UI (if on admin page)
-            if "admin" in self.driver.current_url.lower():
-                self.log_action("Testing modern checkbox UI in admin")
-                try:
-                    # Look for add/edit buttons
-                    add_buttons = self.driver.find_elements(By.XPATH,
-                        "//*[contains(text(), 'Add') or contains(text(), 'Edit')]")
-
-                    if add_buttons:
-                        add_button = add_buttons[0]
-                        self.driver.execute_script("arguments[0].click();", add_button)
-                        time.sleep(2)
-
-                        # Look for modal or form
-                        modal_selectors = [
-                            ".modal",
-                            "[role='dialog']",
-                            ".fixed",
-                            ".z-50"
-                        ]
-
-                        modal_found = False
-                        for selector in modal_selectors:
-                            try:
-                                modal = self.driver.find_element(By.CSS_SELECTOR, selector)
-                                if modal.is_displayed():
-                                    modal_found = True
-
-                                    # Take modal screenshot
-                                    modal_screenshot = self.take_screenshot(f"{domain_name}_modal.png",
-                                                                          f"{domain_name} - Modal/Form")
-                                    domain_results["screenshots"].append(modal_screenshot)
-
-                                    # Check for modern checkboxes
-                                    checkboxes = modal.find_elements(By.CSS_SELECTOR,
-                                        "input[type='checkbox'], [role='checkbox']")
-
-                                    checkbox_features = []
-                                    for checkbox in checkboxes:
-                                        parent = checkbox.find_element(By.XPATH, "..")
-                                        checkbox_features.append({
-                                            "classes": checkbox.get_attribute("class"),
-                                            "parent_classes": parent.get_attribute("class"),
-                                            "has_glassmorphism": "backdrop" in parent.get_attribute("class") or ""
-                                        })
-
-                                    domain_results["features"]["modern_checkboxes"] = {
-                                        "found": len(checkboxes) > 0,
-                                        "count": len(checkboxes),
-                                        "features": checkbox_features
-                                    }
-
-                                    self.log_action(f"✓ Found {len(checkboxes)} checkboxes")
-                                    break
-                            except:
-                                continue
-
-                        if not modal_found:
-                            domain_results["features"]["modern_checkboxes"] = {"modal_not_found": True}
-
-                except Exception as e:
-                    domain_results["features"]["modern_checkboxes"] = {"error": str(e)}
+            # Tests 3-4 navigate to the admin page and open its form
+            if checks & {"admin_access", "modern_checkboxes"} and not admin_future:
+                snapshot = self.check_admin(domain_name, domain_results, snapshot, readiness, network, follow_admin)
+                console.drain()
 
             # Test 5: Check Firebase integration
-            self.log_action("Testing Firebase integration")
-            try:
-                # Check for Firebase in page source or network requests
-                page_source = self.driver.page_source.lower()
-
-                firebase_indicators = [
-                    "firebase" in page_source,
-                    "firestore" in page_source,
-                    "googleapis.com" in page_source
-                ]
-
-                domain_results["features"]["firebase_integration"] = {
-                    "firebase_in_source": firebase_indicators[0],
-                    "firestore_in_source": firebase_indicators[1],
-                    "googleapis_in_source": firebase_indicators[2],
-                    "likely_integrated": any(firebase_indicators)
-                }
-
-                self.log_action(f"✓ Firebase integration check complete",
-                              f"Likely integrated: {any(firebase_indicators)}")
-
-            except Exception as e:
-                domain_results["features"]["firebase_integration"] = {"error": str(e)}
+            if "firebase_integration" in checks:
+                self.record_feature(domain_name, domain_results, "firebase_integration", self.check_firebase(snapshot))
 
             # Check for deployment information
-            self.log_action("Checking deployment information")
             try:
-                # Look for version info, build timestamps, etc.
-                meta_tags = self.driver.find_elements(By.TAG_NAME, "meta")
-                deployment_info = {}
-
-                for meta in meta_tags:
-                    name = meta.get_attribute("name")
-                    content = meta.get_attribute("content")
-                    if name and content:
-                        if any(keyword in name.lower() for keyword in ["version", "build", "deploy"]):
-                            deployment_info[name] = content
+                domain_results["deployment_info"] = self.check_deployment_meta(snapshot)
 
-                domain_results["deployment_info"] = deployment_info
-
-                # Check for Vercel deployment indicators
-                if "vercel" in url:
-                    try:
-                        # Look for Vercel headers or indicators
-                        vercel_response = self.driver.execute_script("""
-                            return fetch(window.location.href)
-                                .then(response => ({
-                                    headers: Object.fromEntries([...response.headers.entries()]),
-                                    status: response.status
-                                }));
-                        """)
-                        domain_results["deployment_info"]["vercel_headers"] = vercel_response
-                    except:
-                        pass
+                # Headers of the response the navigation actually got (CDN cache, deployment id)
+                if document:
+                    domain_results["deployment_info"]["response_headers"] = network_log.deployment_headers(
+                        document.get("url"), document.get("status"), document.get("headers"),
+                        document.get("protocol"))
 
             except Exception as e:
                 domain_results["deployment_info"]["error"] = str(e)
 
+            # Admin page requests, including the ones the form modal made
+            if "network" in checks and "admin" in self.driver.current_url.lower():
+                self.capture_network(network, domain_results, "admin")
+
             # Check console errors
-            domain_results["console_errors"] = self.check_console_errors()
+            domain_results["console_errors"] = self.check_console_errors(console)
 
             # Take final screenshot
             final_screenshot = self.take_screenshot(f"{domain_name}_final.png",
                                                    f"{domain_name} - Final State")
-            domain_results["screenshots"].append(final_screenshot)
+            self.record_screenshot(domain_name, domain_results, final_screenshot)
 
         except Exception as e:
             domain_results["error"] = str(e)
@@ -389,74 +634,272 @@ class DeploymentTester:
             try:
                 error_screenshot = self.take_screenshot(f"{domain_name}_error.png",
                                                        f"{domain_name} - Error State")
-                domain_results["screenshots"].append(error_screenshot)
+                self.record_screenshot(domain_name, domain_results, error_screenshot)
             except:
                 pass
 
+        domain_results["wait_timings"] = readiness.timings
+        if admin_future:
+            self.merge_isolated(domain_name, domain_results, admin_future)
+            # The admin context logged into the same buffer
+            domain_results["console_errors"] = console.errors()
+        domain_results["console"] = console.buffer.summary()
+        self.log_action(f"Waited {readiness.total_wait_ms()}ms on page readiness for {domain_name}")
+        if self.stream:
+            self.stream.domain_end(domain_name, domain_results)
         return domain_results
 
+    @traced(label="domain_name")
+    def test_admin_isolated(self, domain_name, url, checks, console_buffer, driver):
+        """Tests 3-4 from a fresh load of url in driver's own browser context"""
+        self.use_driver(driver)
+        admin_results = {"features": {}, "screenshots": [], "network": {}}
+        readiness = PageReadiness(driver)
+        network = NetworkLog(driver)
+        console = ConsoleMonitor(driver, console_buffer)
+        network.reset()
+        with tracer.span("navigate", url=url):
+            driver.get(url)
+        readiness.wait_for_page_settled()
+
+        self.check_admin(domain_name, admin_results, self.capture_snapshot(), readiness, network)
+        if "network" in checks and "admin" in driver.current_url.lower():
+            self.capture_network(network, admin_results, "admin")
+        self.check_console_errors(console)
+        admin_results["wait_timings"] = readiness.timings
+        return admin_results
+
+    def merge_isolated(self, domain_name, domain_results, future):
+        """Fold the results of an isolated admin flow into the domain's results"""
+        try:
+            admin_results = future.result()
+        except Exception as e:
+            self.record_feature(domain_name, domain_results, "admin_access",
+                                {"error": f"isolated context failed: {e}"})
+            return
+        # check_admin recorded these through record_feature / record_screenshot on the
+        # context thread, so they are already in the stream; only the in-memory copy is merged
+        domain_results["features"].update(admin_results["features"])
+        domain_results["screenshots"].extend(admin_results["screenshots"])
+        if "network" in domain_results:
+            domain_results["network"].update(admin_results["network"])
+        domain_results["wait_timings"] += [dict(timing, context="admin") for timing in admin_results["wait_timings"]]
+
+    @traced(label="domain_name")
+    def test_subpage(self, domain_name, url, page, checks):
+        """Probe one page other than "/" directly, e.g. /admin in a matrix run"""
+        stage = page.strip("/").replace("/", "-")
+        page_url = url.rstrip("/") + page
+        self.log_action(f"Testing page: {domain_name}{page}", page_url)
+
+        page_results = {
+            "features": {},
+            "screenshots": [],
+            "console_errors": [],
+            "pages": {page: {"url": page_url, "accessible": False}}
+        }
+        readiness = PageReadiness(self.driver)
+        network = NetworkLog(self.driver)
+        console = ConsoleMonitor(self.driver)
+        if "network" in checks:
+            page_results["network"] = {}
+
+        try:
+            network.reset()
+            console.reset()
+            with tracer.span("navigate", url=page_url):
+                self.driver.get(page_url)
+            readiness.wait_for_page_settled()
+
+            screenshot = self.take_screenshot(f"{domain_name}_{stage}.png", f"{domain_name} - {page}")
+            self.record_screenshot(domain_name, page_results, screenshot)
+            snapshot = self.capture_snapshot()
+            page_results["pages"][page].update(accessible=True, page_title=snapshot.title)
+
+            if page == "/admin":
+                if "admin_access" in checks:
+                    self.check_admin_subtitle(domain_name, page_results, snapshot)
+                if "modern_checkboxes" in checks:
+                    snapshot = self.check_checkboxes(domain_name, page_results, snapshot, readiness)
+
+            if "network" in checks:
+                self.capture_network(network, page_results, stage)
+            page_results["console_errors"] = self.check_console_errors(console)
+            page_results["pages"][page]["console"] = console.buffer.summary()
+
+        except Exception as e:
+            page_results["pages"][page]["error"] = str(e)
+            self.log_action(f"✗ Error testing {domain_name}{page}", str(e))
+
+        page_results["pages"][page]["wait_timings"] = readiness.timings
+        return page_results
+
+    def probe_page(self, job):
+        """Run one matrix job: the full home-page probe or a single sub-page"""
+        if not self.needs_browser():
+            # Markup-only selections: one static fetch of "/" answers every check
+            if job["page"] != "/":
+                return {}
+            return self.cached_probe(self.test_domain_static, job["domain"], job["url"])
+        if job["page"] == "/":
+            probe = functools.partial(self.test_domain, checks=job["checks"],
+                                      follow_admin=job["follow_admin"])
+            return self.cached_probe(probe, job["domain"], job["url"], job["checks"])
+        return self.test_subpage(job["domain"], job["url"], job["page"], job["checks"])
+
+    def cached_probe(self, probe, domain_name, url, checks=None):
+        """Run probe unless the deployment is unchanged since a cached run"""
+        if not self.cache:
+            return probe(domain_name, url)
+
+        # probe may be a functools.partial of test_domain from a matrix job
+        tier = "static" if getattr(probe, "func", probe) == self.test_domain_static else "browser"
+        if tier == "browser" and self.cache_compare:
+            tier = "browser-cache-compare"
+        key = ProbeCache.key(url, self.checks if checks is None else checks, tier)
+        try:
+            identity = deployment_identity(url)
+        except Exception as e:
+            identity = None
+            self.log_action("✗ Could not identify deployment, probing normally", str(e))
+
+        entry = self.cache.get(key, identity) if identity else None
+        if entry:
+            result = entry["result"]
+            # Screenshots live in the content-addressed store; reuse only if still on disk
+            if all(os.path.exists(self.store.primary_path(ref["hash"])) for ref in result.get("screenshots", [])):
+                result = dict(result, cached={
+                    "identity": identity,
+                    "stored_at": datetime.fromtimestamp(entry["stored_at"]).isoformat(),
+                    "age_s": round(time.time() - entry["stored_at"])
+                })
+                self.log_action(f"♻️  Deployment unchanged, reusing cached results: {domain_name}",
+                                f"{identity} ({result['cached']['age_s']}s old)")
+                if self.stream:
+                    self.stream.domain_end(domain_name, result, streamed=())
+                return result
+
+        result = probe(domain_name, url)
+        if identity and result.get("accessible") and "error" not in result:
+            self.cache.put(key, identity, result)
+        return result
+
     def compare_domains(self):
-        """Compare both domains and identify differences"""
-        lbtr = self.results["domains"].get("lbtr.shop", {})
-        vercel = self.results["domains"].get("urban-reel.vercel.app", {})
+        """Compare every domain against the baseline domain"""
+        names = list(self.results["domains"])
+        if not names:
+            return {}
+        baseline = self.baseline if self.baseline in names else names[0]
+        comparison = {
+            "baseline": baseline,
+            "candidates": {
+                candidate: self.compare_pair(baseline, candidate)
+                for candidate in names if candidate != baseline
+            }
+        }
+        if self.cache_compare:
+            # Per domain rather than per pair: each score compares a domain's own cold and warm loads
+            comparison["cache_effectiveness"] = {
+                name: data.get("cache", {}).get("effectiveness")
+                for name, data in self.results["domains"].items()
+            }
+        return comparison
+
+    def compare_pair(self, baseline_name, candidate_name):
+        """Identify the differences between the baseline and one candidate domain"""
+        baseline = self.results["domains"][baseline_name]
+        candidate = self.results["domains"][candidate_name]
 
         comparison = {
-            "both_accessible": lbtr.get("accessible", False) and vercel.get("accessible", False),
+            "both_accessible": baseline.get("accessible", False) and candidate.get("accessible", False),
             "title_comparison": {
-                "lbtr": lbtr.get("page_title"),
-                "vercel": vercel.get("page_title"),
-                "same": lbtr.get("page_title") == vercel.get("page_title")
+                "baseline": baseline.get("page_title"),
+                "candidate": candidate.get("page_title"),
+                "same": baseline.get("page_title") == candidate.get("page_title")
             },
             "feature_comparison": {}
         }
 
         # Compare each feature
-        features = ["urban_directory_title", "bold_subtitles", "admin_access", "admin_subtitle",
-                   "modern_checkboxes", "firebase_integration"]
-
-        for feature in features:
-            lbtr_feature = lbtr.get("features", {}).get(feature, {})
-            vercel_feature = vercel.get("features", {}).get(feature, {})
+        for feature in COMPARED_FEATURES:
+            baseline_feature = baseline.get("features", {}).get(feature, {})
+            candidate_feature = candidate.get("features", {}).get(feature, {})
 
             comparison["feature_comparison"][feature] = {
-                "lbtr": lbtr_feature,
-                "vercel": vercel_feature,
-                "same": lbtr_feature == vercel_feature
+                "baseline": baseline_feature,
+                "candidate": candidate_feature,
+                "same": baseline_feature == candidate_feature
             }
 
+        if "performance" in self.checks:
+            comparison["performance"] = web_vitals.performance_deltas(baseline.get("performance"),
+                                                                      candidate.get("performance"))
+
+        comparison["visual_diff"] = self.compare_screenshots(baseline, candidate, candidate_name)
+
         return comparison
 
-    def generate_recommendations(self):
-        """Generate specific recommendations based on test results"""
-        recommendations = []
+    def compare_screenshots(self, baseline, candidate, candidate_name):
+        """Perceptual diff of the screenshots both domains took at the same stage"""
+        def by_stage(domain_data):
+            # "<domain>_<stage>.png" -> {"<stage>": screenshot reference}
+            return {ref["name"].rsplit("_", 1)[-1][:-len(".png")]: ref
+                    for ref in domain_data.get("screenshots", [])}
+
+        baseline_shots = by_stage(baseline)
+        candidate_shots = by_stage(candidate)
+        visual_diff = {}
+
+        for stage in baseline_shots.keys() & candidate_shots.keys():
+            baseline_ref = baseline_shots[stage]
+            candidate_ref = candidate_shots[stage]
+            if baseline_ref["hash"] == candidate_ref["hash"]:
+                visual_diff[stage] = {"identical": True, "tiles_changed": 0, "same_hash": True}
+                continue
 
-        lbtr = self.results["domains"].get("lbtr.shop", {})
-        vercel = self.results["domains"].get("urban-reel.vercel.app", {})
+            heatmap_path = os.path.join(OUTPUT_DIR, f"visual_diff_{candidate_name}_{stage}.png")
+            try:
+                result = compare_files(self.store.primary_path(baseline_ref["hash"]),
+                                       self.store.primary_path(candidate_ref["hash"]),
+                                       heatmap_path)
+                # Full annotated PNGs are only written when the frames really differ
+                if result["tiles_changed"]:
+                    result["full_png"] = [
+                        self.store.export_png(ref["hash"], os.path.join(OUTPUT_DIR, ref["name"]),
+                                              ref["annotation"])
+                        for ref in (baseline_ref, candidate_ref)
+                    ]
+                visual_diff[stage] = result
+                self.log_action(f"Visual diff ({stage})",
+                                f"{result['tiles_changed']} changed tiles, "
+                                f"max score {result['max_score']}, {result['elapsed_ms']}ms")
+            except Exception as e:
+                visual_diff[stage] = {"error": str(e)}
 
-        # Check accessibility
-        if not lbtr.get("accessible", False):
-            recommendations.append({
-                "priority": "HIGH",
-                "issue": "lbtr.shop is not accessible",
-                "solution": "Check DNS configuration and deployment status"
-            })
+        return visual_diff
 
-        if not vercel.get("accessible", False):
-            recommendations.append({
-                "priority": "HIGH",
-                "issue": "urban-reel.vercel.app is not accessible",
-                "solution": "Check Vercel deployment status and build logs"
-            })
+    def generate_recommendations(self):
+        """Generate specific recommendations based on test results"""
+        recommendations = []
 
-        # Check for missing features
-        for domain_name, domain_data in [("lbtr.shop", lbtr), ("urban-reel.vercel.app", vercel)]:
+        for domain_name, domain_data in self.results["domains"].items():
+            # Check accessibility
             if not domain_data.get("accessible", False):
+                if "vercel.app" in (domain_data.get("url") or ""):
+                    solution = "Check Vercel deployment status and build logs"
+                else:
+                    solution = "Check DNS configuration and deployment status"
+                recommendations.append({
+                    "priority": "HIGH",
+                    "issue": f"{domain_name} is not accessible",
+                    "solution": solution
+                })
                 continue
 
             features = domain_data.get("features", {})
 
             # Check Urban Directory title
-            if not features.get("urban_directory_title", {}).get("found", False):
+            if "urban_directory_title" in self.checks and not features.get("urban_directory_title", {}).get("found", False):
                 recommendations.append({
                     "priority": "HIGH",
                     "issue": f"{domain_name}: Urban Directory title not found or lacks gradient animation",
@@ -464,7 +907,7 @@ class DeploymentTester:
                 })
 
             # Check admin access
-            if not features.get("admin_access", {}).get("found", False):
+            if "admin_access" in self.checks and not features.get("admin_access", {}).get("found", False):
                 recommendations.append({
                     "priority": "MEDIUM",
                     "issue": f"{domain_name}: Admin access not found",
@@ -473,7 +916,7 @@ class DeploymentTester:
 
             # Check modern checkboxes
             checkbox_data = features.get("modern_checkboxes", {})
-            if "error" in checkbox_data or not checkbox_data.get("found", False):
+            if "modern_checkboxes" in self.checks and ("error" in checkbox_data or not checkbox_data.get("found", False)):
                 recommendations.append({
                     "priority": "MEDIUM",
                     "issue": f"{domain_name}: Modern checkbox UI not found or not working",
@@ -482,19 +925,32 @@ class DeploymentTester:
 
             # Check Firebase integration
             firebase_data = features.get("firebase_integration", {})
-            if not firebase_data.get("likely_integrated", False):
+            if "firebase_integration" in self.checks and not firebase_data.get("likely_integrated", False):
                 recommendations.append({
                     "priority": "HIGH",
                     "issue": f"{domain_name}: Firebase integration not detected",
                     "solution": "Check Firebase configuration and ensure proper deployment of Firebase SDK"
                 })
 
+            # Check byte budgets on every page the waterfall covered
+            for page, summary in domain_data.get("network", {}).items():
+                for violation in summary.get("budget_violations", []):
+                    largest = ", ".join(f"{item['url'][:60]} ({item['bytes'] // 1024} KB)"
+                                        for item in violation["largest"])
+                    recommendations.append({
+                        "priority": "MEDIUM",
+                        "issue": f"{domain_name} {page}: {violation['type']} transfer "
+                                 f"{violation['bytes'] // 1024} KB exceeds the {violation['budget'] // 1024} KB budget",
+                        "solution": f"Trim or lazy-load the largest {violation['type']} requests: {largest}"
+                    })
+
             # Check for console errors
             errors = domain_data.get("console_errors", [])
             if errors:
+                total = domain_data.get("console", {}).get("counts", {}).get("SEVERE", len(errors))
                 recommendations.append({
                     "priority": "HIGH",
-                    "issue": f"{domain_name}: {len(errors)} console errors detected",
+                    "issue": f"{domain_name}: {total} console errors detected ({len(errors)} distinct)",
                     "solution": f"Review and fix JavaScript errors: {[e['message'][:50] for e in errors[:3]]}"
                 })
 
@@ -508,40 +964,244 @@ class DeploymentTester:
 
         return recommendations
 
-    def run_tests(self):
-        """Run comprehensive tests on both domains"""
-        self.log_action("Starting comprehensive deployment testing")
-
-        # Test both domains
-        domains = {
-            "lbtr.shop": "https://lbtr.shop",
-            "urban-reel.vercel.app": "https://urban-reel.vercel.app"
-        }
-
-        for domain_name, url in domains.items():
-            self.results["domains"][domain_name] = self.test_domain(domain_name, url)
-            time.sleep(2)  # Brief pause between domain tests
+    def run_tests(self, domains=None):
+        """Run comprehensive tests on all domains"""
+        self.log_action("Starting comprehensive deployment testing",
+                        f"Workers: {self.workers}")
+
+        domains = domains or DEFAULT_DOMAINS
+
+        # Stream every record as it finishes so a crash still leaves partial results
+        stream_path = os.path.join(OUTPUT_DIR, "deployment_test_results.jsonl")
+        self.stream = ResultsStream(stream_path)
+        self.stream.run_start(self.results)
+
+        # Chrome only starts when a selected check needs it
+        probe = self.test_domain if self.needs_browser() else self.test_domain_static
+        run_probe = functools.partial(self.cached_probe, probe)
+
+        if self.workers == 1:
+            for domain_name, url in domains.items():
+                self.keep_for_comparison(domain_name, run_probe(domain_name, url))
+                if probe == self.test_domain and "cached" not in self.results["domains"][domain_name]:
+                    time.sleep(2)  # Brief pause between domain tests
+        else:
+            # Every pool thread launches its own Chrome on first use of self.driver
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(domains))) as pool:
+                futures = {
+                    domain_name: pool.submit(run_probe, domain_name, url)
+                    for domain_name, url in domains.items()
+                }
+            # Merge in configured order so the results file stays stable between runs
+            for domain_name, future in futures.items():
+                self.keep_for_comparison(domain_name, future.result())
+
+        self.finish_run(stream_path)
+
+    def run_matrix(self, matrix):
+        """Run every (domain, page) job of a probe matrix config (see probe_matrix.py)"""
+        self.baseline = matrix["baseline"]
+        jobs = probe_matrix.expand_jobs(matrix, self.checks)
+        concurrency = matrix["concurrency"]
+        self.log_action("Starting probe matrix",
+                        f"{len(matrix['domains'])} domains, {len(jobs)} page jobs, "
+                        f"{concurrency['global']} concurrent / {concurrency['per_host']} per host")
+
+        stream_path = os.path.join(OUTPUT_DIR, "deployment_test_results.jsonl")
+        self.stream = ResultsStream(stream_path)
+        self.stream.run_start(self.results)
+
+        scheduler = probe_matrix.HostScheduler(concurrency["global"], concurrency["per_host"])
+        page_results = scheduler.run(jobs, self.probe_page)
+        self.merge_matrix(matrix, jobs, page_results)
+        self.finish_run(stream_path)
+
+    def merge_matrix(self, matrix, jobs, page_results, streamed=("features", "screenshots")):
+        """Fold each domain's page jobs back into one result, in configured order
+
+        streamed names the keys the jobs already streamed record by record;
+        results gathered elsewhere (probe_queue.py) pass streamed=().
+        """
+        for domain_name, spec in matrix["domains"].items():
+            domain_results = {"url": spec["url"], "features": {}, "screenshots": [], "console_errors": []}
+            for job, result in zip(jobs, page_results):
+                if job["domain"] == domain_name:
+                    probe_matrix.merge_page_results(domain_results, result)
+            # Without a "/" job nothing reports accessible; any page that loaded counts
+            domain_results.setdefault("accessible", any(
+                page.get("accessible") and not page.get("error")
+                for page in domain_results.get("pages", {}).values()))
+            self.stream.domain_end(domain_name, domain_results, streamed=streamed)
+            self.keep_for_comparison(domain_name, domain_results)
+
+    def finish_run(self, stream_path):
+        """Compare, recommend and save once every domain has been probed"""
+        # Make sure every screenshot is on disk before comparing and saving
+        screenshot_errors = self.screenshots.wait()
+        if screenshot_errors:
+            self.results["screenshot_errors"] = screenshot_errors
+            self.stream.section("screenshot_errors", screenshot_errors)
+            self.log_action(f"✗ {len(screenshot_errors)} screenshots failed to save")
 
         # Compare domains
         self.results["comparison"] = self.compare_domains()
+        self.stream.section("comparison", self.results["comparison"])
 
         # Generate recommendations
         self.results["recommendations"] = self.generate_recommendations()
-
-        # Save results
-        with open("/Users/paulbridges/Downloads/try again/deployment_test_results.json", "w") as f:
-            json.dump(self.results, f, indent=2)
-
-        self.log_action("Testing completed", "Results saved to deployment_test_results.json")
+        self.stream.section("recommendations", self.results["recommendations"])
+        self.stream.close()
+
+        # Rebuild the classic results document from the stream
+        results = write_results(stream_path, os.path.join(OUTPUT_DIR, "deployment_test_results.json"))
+        self.record_history(results)
+
+        stats = self.store.stats
+        self.log_action("Testing completed",
+                        "Results streamed to deployment_test_results.jsonl and saved to deployment_test_results.json")
+        self.log_action("Screenshot store",
+                        f"{stats['frames']} frames, {stats['deduplicated']} deduplicated, "
+                        f"{stats['files_written']} files / {stats['bytes_written'] // 1024} KB written")
+        if self.cache:
+            self.log_action("Probe cache",
+                            f"{self.cache.stats['hits']} hits, {self.cache.stats['misses']} misses")
+        selector_stats = self.selectors.stats
+        self.log_action("Selector cache",
+                        f"{selector_stats['hits']} hits, {selector_stats['misses']} misses, "
+                        f"{selector_stats['lookups']} lookups")
+
+        # Where the harness itself spent its time (open in chrome://tracing or Perfetto)
+        tracer.print_summary()
+        self.log_action("Trace exported", tracer.export(os.path.join(OUTPUT_DIR, "deployment_trace.json")))
+
+    def keep_for_comparison(self, domain_name, domain_results):
+        """Keep only what compare_domains and generate_recommendations read of a streamed domain
+
+        The full results are already in the stream, so memory stays bounded by
+        this summary rather than by each domain's raw results.
+        """
+        summary = {key: domain_results[key] for key in
+                   ("url", "accessible", "page_title", "probe_tier", "error", "cached", "performance",
+                    "screenshots", "console_errors", "cache")
+                   if key in domain_results}
+        summary["features"] = {feature: value for feature, value in domain_results.get("features", {}).items()
+                               if feature in COMPARED_FEATURES}
+        summary["network"] = {page: {"budget_violations": network.get("budget_violations", [])}
+                              for page, network in domain_results.get("network", {}).items()}
+        if "console" in domain_results:
+            summary["console"] = {"counts": domain_results["console"].get("counts", {})}
+        self.results["domains"][domain_name] = summary
+
+    def record_history(self, results):
+        """Index this run (the document rebuilt from the stream) in the SQLite run history"""
+        try:
+            history = RunHistory(os.path.join(OUTPUT_DIR, "run_history.sqlite"))
+            try:
+                run_id = history.record_deployment_run(results)
+            finally:
+                history.close()
+            self.log_action(f"Run history updated", f"Run id: {run_id}")
+        except Exception as e:
+            self.log_action("✗ Could not update run history", str(e))
 
     def cleanup(self):
         """Clean up resources"""
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+        if self.stream and not self.stream.file.closed:
+            # Interrupted run: keep what was streamed, without a run_end marker
+            self.stream.file.close()
+        if self.isolated:
+            self.isolated.shutdown(wait=True)
+        self.screenshots.shutdown()
+        with self._drivers_lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except:
+                pass
+
+def parse_domain(value):
+    """Parse a NAME=URL command line domain"""
+    name, sep, url = value.partition("=")
+    if not sep or not name or not url:
+        raise argparse.ArgumentTypeError(f"expected NAME=URL, got {value!r}")
+    return name, url
+
+def parse_budget(value):
+    """Parse a TYPE=KB command line byte budget"""
+    category, sep, kilobytes = value.partition("=")
+    try:
+        if sep and category:
+            return category, int(float(kilobytes) * 1024)
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"expected TYPE=KB, got {value!r}")
 
 if __name__ == "__main__":
-    tester = DeploymentTester()
+    parser = argparse.ArgumentParser(description="Test lbtr.shop and urban-reel.vercel.app deployments")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of domains to test concurrently, each on its own Chrome")
+    parser.add_argument("--domain", type=parse_domain, action="append", default=[],
+                        metavar="NAME=URL", help="extra domain to test, e.g. a preview URL")
+    parser.add_argument("--screenshot-encodings", default="webp,thumbnail",
+                        help="comma-separated screenshot encodings: webp, thumbnail, png")
+    parser.add_argument("--checks", default=",".join(sorted(ALL_CHECKS)),
+                        help="comma-separated checks to run; markup-only selections "
+                             f"({', '.join(sorted(STATIC_CHECKS))}) skip Chrome entirely")
+    parser.add_argument("--budget", type=parse_budget, action="append", default=[],
+                        metavar="TYPE=KB", help="per-type transfer budget, e.g. js=400 or images=800 "
+                                                "(types: js, images, fonts, css, document, api, media, other)")
+    parser.add_argument("--probe-cache", action="store_true",
+                        help="reuse the previous results of deployments that have not changed")
+    parser.add_argument("--cache-max-age", type=int, default=3600,
+                        help="seconds a cached probe result stays valid")
+    parser.add_argument("--cache-max-entries", type=int, default=200,
+                        help="cached probe results kept before the oldest are evicted")
+    parser.add_argument("--config", help="probe matrix JSON (domains x pages x checks, "
+                                         "concurrency limits, baseline); see probe_matrix.py")
+    parser.add_argument("--baseline", help="domain every other domain is compared against")
+    parser.add_argument("--cache-compare", action="store_true",
+                        help="load each domain with a cleared browser cache, then warm, and score caching")
+    parser.add_argument("--isolate-checks", action="store_true",
+                        help="run the admin and checkbox checks in their own browser context, "
+                             "concurrently with the home page checks")
+    parser.add_argument("--backend", choices=BACKENDS, default="selenium",
+                        help="drive Chrome through chromedriver (selenium) or the DevTools websocket (cdp)")
+    args = parser.parse_args()
+
+    domains = dict(DEFAULT_DOMAINS)
+    domains.update(args.domain)
+    matrix = probe_matrix.load_config(args.config) if args.config else None
+    checks = args.checks.split(",")
+    workers = args.workers
+    budgets = dict(args.budget)
+    if matrix:
+        checks = matrix["checks"] or checks
+        workers = matrix["concurrency"]["global"]
+        budgets = dict(matrix["budgets"], **budgets)
+        if args.baseline:
+            matrix["baseline"] = args.baseline
+
+    cache = None
+    if args.probe_cache:
+        cache = ProbeCache(os.path.join(OUTPUT_DIR, "probe_cache.json"),
+                           max_age_s=args.cache_max_age, max_entries=args.cache_max_entries)
+
+    tester = DeploymentTester(workers=workers,
+                              screenshot_encodings=args.screenshot_encodings.split(","),
+                              checks=checks,
+                              budgets=budgets,
+                              cache=cache,
+                              baseline=args.baseline,
+                              isolate_checks=args.isolate_checks,
+                              cache_compare=args.cache_compare,
+                              backend=args.backend,
+                              # Matrix jobs run on scheduler threads, each with its own Chrome
+                              launch_browser=not matrix)
     try:
-        tester.run_tests()
+        if matrix:
+            tester.run_matrix(matrix)
+        else:
+            tester.run_tests(domains)
     finally:
         tester.cleanup()
\ No newline at end of file
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+DOM Snapshot - Capture a page in one WebDriver round trip
+Feature checks query the snapshot in Python instead of calling the browser per element
+"""
+
+# Runs in the page: indexes every element, resolves the registered selectors,
+# and collects text, classes, attributes and requested computed styles at once.
+# The element list is kept on window so a snapshot record can be clicked later.
+CAPTURE_SCRIPT = """
+    const [selectors, styleSelectors, styleTexts, styleProperties, includeHtml] = arguments;
+    const elements = Array.from(document.querySelectorAll('*'));
+    const index = new Map(elements.map((el, i) => [el, i]));
+    window.__domSnapshot = elements;
+
+    const matches = {};
+    const needsText = new Set();
+    for (const selector of selectors) {
+        try {
+            matches[selector] = Array.from(document.querySelectorAll(selector), el => index.get(el));
+            matches[selector].forEach(i => needsText.add(i));
+        } catch (e) {
+            matches[selector] = null;
+        }
+    }
+
+    const styled = new Set();
+    for (const selector of styleSelectors) {
+        try {
+            document.querySelectorAll(selector).forEach(el => styled.add(index.get(el)));
+        } catch (e) {}
+    }
+
+    const attributeNames = ['name', 'content', 'role', 'type', 'data-testid'];
+    const records = elements.map((el, i) => {
+        let ownText = '';
+        for (const node of el.childNodes) {
+            if (node.nodeType === Node.TEXT_NODE) ownText += node.nodeValue;
+        }
+        ownText = ownText.trim();
+
+        const attrs = {};
+        for (const name of attributeNames) {
+            const value = el.getAttribute(name);
+            if (value !== null) attrs[name] = value;
+        }
+        if (el.href !== undefined && el.getAttribute('href') !== null) attrs.href = String(el.href);
+
+        const record = {
+            index: i,
+            tag: el.tagName.toLowerCase(),
+            parent: el.parentElement ? index.get(el.parentElement) : null,
+            id: el.id || null,
+            classes: el.getAttribute('class'),
+            own_text: ownText,
+            attrs: attrs
+        };
+        if (ownText || needsText.has(i)) {
+            const style = getComputedStyle(el);
+            record.text = (el.innerText || el.textContent || '').trim();
+            record.visible = el.getClientRects().length > 0 &&
+                style.visibility !== 'hidden' && style.display !== 'none';
+        }
+        if (styled.has(i) || styleTexts.some(text => ownText.includes(text))) {
+            const style = getComputedStyle(el);
+            record.styles = Object.fromEntries(
+                styleProperties.map(prop => [prop, style.getPropertyValue(prop)]));
+        }
+        return record;
+    });
+
+    return {
+        url: location.href,
+        title: document.title,
+        records: records,
+        matches: matches,
+        html: includeHtml ? document.documentElement.outerHTML : null
+    };
+"""
+
+class DomSnapshot:
+    def __init__(self, payload):
+        self.url = payload["url"]
+        self.title = payload["title"]
+        self.records = payload["records"]
+        self.matches = payload["matches"]
+        self.html = payload.get("html")
+
+    @classmethod
+    def capture(cls, driver, selectors=(), style_selectors=(), style_texts=(), style_properties=(),
+                include_html=False):
+        """Capture the current page with a single execute_script call
+
+        Computed styles are collected for elements matching style_selectors or
+        whose own text contains one of style_texts.
+        """
+        payload = driver.execute_script(CAPTURE_SCRIPT, list(selectors), list(style_selectors),
+                                        list(style_texts), list(style_properties), include_html)
+        return cls(payload)
+
+    def select(self, selector):
+        """Records matching a CSS selector registered at capture time, in document order"""
+        if selector not in self.matches:
+            raise KeyError(f"Selector not captured in snapshot: {selector}")
+        return [self.records[i] for i in self.matches[selector] or []]
+
+    def find_text(self, *substrings):
+        """Records whose own text nodes contain any substring, like //*[contains(text(), ...)]"""
+        return [record for record in self.records
+                if any(substring in record["own_text"] for substring in substrings)]
+
+    def find_tag(self, tag):
+        """Records with the given tag name"""
+        return [record for record in self.records if record["tag"] == tag]
+
+    def parent(self, record):
+        """Parent record, or an empty record for the document root"""
+        if record["parent"] is None:
+            return {"tag": None, "classes": None, "attrs": {}}
+        return self.records[record["parent"]]
+
+    def is_descendant(self, record, ancestor):
+        """Check whether record sits inside ancestor"""
+        parent = record["parent"]
+        while parent is not None:
+            if parent == ancestor["index"]:
+                return True
+            parent = self.records[parent]["parent"]
+        return False
+
+    def descendants(self, ancestor, selector):
+        """Records matching selector that sit inside ancestor"""
+        return [record for record in self.select(selector) if self.is_descendant(record, ancestor)]
+
+    def click(self, driver, record):
+        """Click the live element behind a record from the most recent capture"""
+        driver.execute_script("window.__domSnapshot[arguments[0]].click();", record["index"])
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Driver Benchmark - Selenium versus raw CDP driver backends
+Serves a local copy of the Urban Directory home and admin pages, then measures
+per backend how many commands per second a driver sustains (one at a time and,
+for CDP, pipelined) and how long a full deployment probe of the fixture takes
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from chrome_driver import create_chrome_driver, BACKENDS
+from deployment_test import DeploymentTester
+
+OUTPUT_DIR = "/Users/paulbridges/Downloads/try again"
+
+FIXTURE_PAGES = {
+    "/": """<!DOCTYPE html>
+<html><head>
+<title>Urban Directory</title>
+<meta name="deploy-version" content="fixture">
+<link rel="stylesheet" href="/app.css">
+<script src="/app.js"></script>
+</head><body>
+<h1 class="bg-gradient-to-r from-pink-500 to-violet-500 bg-clip-text text-transparent gradient-title">Urban Directory</h1>
+<h2 class="font-semibold">Discover the best videos in your city</h2>
+<h3 class="font-semibold">Curated by people who live there</h3>
+<a href="/admin">Admin</a>
+</body></html>""",
+    "/admin": """<!DOCTYPE html>
+<html><head><title>Urban Directory Admin</title><link rel="stylesheet" href="/app.css"></head><body>
+<h1 class="gradient-title">Urban Directory</h1>
+<p>Manage your video directory</p>
+<button onclick="document.querySelector('[role=dialog]').style.display='block'">Add Video</button>
+<div role="dialog" class="fixed z-50" style="display:none">
+<label><input type="checkbox"> Featured</label>
+<label><input type="checkbox"> Published</label>
+</div>
+</body></html>""",
+    "/app.css": """.gradient-title { background-size: 200% 200%; animation: shift 4s ease infinite; }
+@keyframes shift { 0% { background-position: 0% 50%; } 100% { background-position: 100% 50%; } }""",
+    "/app.js": "console.log('firebase app initialized (fixture)');"
+}
+CONTENT_TYPES = {".css": "text/css", ".js": "application/javascript"}
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = FIXTURE_PAGES.get(self.path.split("?")[0])
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPES.get(os.path.splitext(self.path)[1], "text/html"))
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "max-age=60")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_fixture():
+    """Start the fixture server on a free local port; returns the server"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, name="fixture", daemon=True).start()
+    return server
+
+def commands_per_second(driver, commands):
+    """Sequential round trips: each script waits for the previous one"""
+    start = time.perf_counter()
+    for i in range(commands):
+        driver.execute_script("return arguments[0];", i)
+    return round(commands / (time.perf_counter() - start), 1)
+
+def pipelined_per_second(driver, commands):
+    """Pipelined round trips: every command is sent before the first reply is read"""
+    batch = [("Runtime.evaluate", {"expression": str(i), "returnByValue": True}) for i in range(commands)]
+    start = time.perf_counter()
+    driver.execute_many(batch)
+    return round(commands / (time.perf_counter() - start), 1)
+
+def probe_seconds(driver, url, runs):
+    """Wall time of full deployment probes of the fixture, one per run"""
+    tester = DeploymentTester(driver=driver, launch_browser=False)
+    timings = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            results = tester.test_domain("fixture", url)
+            timings.append(time.perf_counter() - start)
+            if not results.get("accessible"):
+                raise RuntimeError(f"Fixture probe failed: {results.get('error')}")
+    finally:
+        tester.cleanup()
+    return timings
+
+def benchmark_backend(backend, url, commands, runs):
+    """Launch, command throughput and end-to-end probe time of one backend"""
+    start = time.perf_counter()
+    driver = create_chrome_driver(backend=backend)
+    result = {"launch_s": round(time.perf_counter() - start, 2)}
+    try:
+        driver.get(url)
+        result["commands_per_s"] = commands_per_second(driver, commands)
+        if hasattr(driver, "execute_many"):
+            result["pipelined_commands_per_s"] = pipelined_per_second(driver, commands)
+        timings = probe_seconds(driver, url, runs)
+        result["probe_s"] = [round(timing, 2) for timing in timings]
+        result["probe_best_s"] = round(min(timings), 2)
+    finally:
+        driver.quit()
+    return result
+
+def print_report(results):
+    """Side-by-side table of every backend"""
+    print("\n" + "=" * 70)
+    print("🏁 DRIVER BACKEND BENCHMARK")
+    print("=" * 70)
+    rows = [("launch_s", "Launch (s)"), ("commands_per_s", "Commands/s"),
+            ("pipelined_commands_per_s", "Pipelined commands/s"), ("probe_best_s", "Best probe (s)")]
+    print(f"{'':<24}" + "".join(f"{backend:>14}" for backend in results))
+    for key, label in rows:
+        print(f"{label:<24}" + "".join(f"{str(result.get(key, '—')):>14}" for result in results.values()))
+
+    if {"selenium", "cdp"} <= results.keys():
+        selenium, cdp = results["selenium"], results["cdp"]
+        print(f"\n⚡ CDP: {cdp['commands_per_s'] / selenium['commands_per_s']:.1f}x commands/s, "
+              f"{selenium['probe_best_s'] / cdp['probe_best_s']:.1f}x faster probe")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Selenium and CDP driver backends on a local fixture")
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help=f"comma-separated backends to measure: {', '.join(BACKENDS)}")
+    parser.add_argument("--commands", type=int, default=500, help="scripts per throughput measurement")
+    parser.add_argument("--runs", type=int, default=3, help="end-to-end probes per backend")
+    args = parser.parse_args()
+
+    server = serve_fixture()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    results = {}
+    try:
+        for backend in args.backends.split(","):
+            print(f"🔧 Benchmarking {backend} backend against {url}")
+            results[backend] = benchmark_backend(backend, url, args.commands, args.runs)
+    finally:
+        server.shutdown()
+
+    print_report(results)
+    with open(os.path.join(OUTPUT_DIR, "driver_benchmark.json"), "w") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "commands": args.commands,
+                   "runs": args.runs, "backends": results}, f, indent=2)
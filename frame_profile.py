@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Frame Profile - What the page's running animations cost per frame
+Samples requestAnimationFrame intervals over a window, reads Chrome's
+Performance metrics (task, script, layout and style time) before and after it,
+and, when the driver records a trace, sums paint and composite time from it
+"""
+
+import json
+from selenium.common.exceptions import WebDriverException
+
+# Passed to create_chrome_driver(trace_categories=...) to record trace events
+# into the performance log alongside the CDP Network events
+TRACE_CATEGORIES = ("devtools.timeline", "disabled-by-default-devtools.timeline")
+# Trace event names summed per bucket; none of them nest inside another
+TRACE_BUCKETS = {
+    "script_ms": ("EvaluateScript", "FunctionCall"),
+    "style_layout_ms": ("UpdateLayoutTree", "Layout"),
+    "paint_ms": ("Paint",),
+    "composite_ms": ("CompositeLayers", "UpdateLayerTree", "Layerize")
+}
+# Performance.getMetrics durations (seconds, cumulative) reported per window
+METRICS = {
+    "TaskDuration": "task_ms",
+    "ScriptDuration": "script_ms",
+    "LayoutDuration": "layout_ms",
+    "RecalcStyleDuration": "recalc_style_ms"
+}
+
+# Records every animation frame until the window closes. A hidden page gets
+# no frames at all, so a timer ends the sampling regardless.
+SAMPLE_SCRIPT = """
+    const windowMs = arguments[0];
+    const done = arguments[arguments.length - 1];
+    const frames = [];
+    const longTasks = [];
+    let observer = null;
+    try {
+        observer = new PerformanceObserver(list => {
+            list.getEntries().forEach(entry => longTasks.push(entry.duration));
+        });
+        observer.observe({type: 'longtask'});
+    } catch (e) {}
+
+    const start = performance.now();
+    let finished = false;
+    const finish = () => {
+        if (finished) return;
+        finished = true;
+        if (observer) observer.disconnect();
+        done({frames: frames, long_tasks: longTasks,
+              elapsed_ms: performance.now() - start, hidden: document.hidden});
+    };
+    const tick = now => {
+        frames.push(now);
+        if (now - start < windowMs) requestAnimationFrame(tick); else finish();
+    };
+    requestAnimationFrame(tick);
+    setTimeout(finish, windowMs + 1000);
+"""
+
+def _percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def frame_stats(frames):
+    """Frame interval percentiles, FPS and dropped frames from rAF timestamps"""
+    intervals = [later - earlier for earlier, later in zip(frames, frames[1:])]
+    if not intervals:
+        return {"frames": len(frames), "fps": None, "dropped_frames": None}
+
+    # The display's refresh interval is the shortest interval the page reliably hits
+    vsync_ms = max(_percentile(intervals, 0.1), 1000 / 240)
+    dropped = sum(round(interval / vsync_ms) - 1 for interval in intervals if interval > 1.5 * vsync_ms)
+    return {
+        "frames": len(frames),
+        "refresh_hz": round(1000 / vsync_ms),
+        "fps": round(len(intervals) * 1000 / sum(intervals), 1),
+        "fps_p50": round(1000 / _percentile(intervals, 0.5), 1),
+        # FPS during the slowest 5% / 1% of frames
+        "fps_p5": round(1000 / _percentile(intervals, 0.95), 1),
+        "fps_p1": round(1000 / _percentile(intervals, 0.99), 1),
+        "frame_ms_p50": round(_percentile(intervals, 0.5), 1),
+        "frame_ms_p95": round(_percentile(intervals, 0.95), 1),
+        "frame_ms_p99": round(_percentile(intervals, 0.99), 1),
+        "frame_ms_max": round(max(intervals), 1),
+        "dropped_frames": dropped,
+        "dropped_pct": round(dropped * 100 / (len(intervals) + dropped), 1)
+    }
+
+def _metrics(driver):
+    """Current Performance.getMetrics values by name"""
+    response = driver.execute_cdp_cmd("Performance.getMetrics", {})
+    return {metric["name"]: metric["value"] for metric in response["metrics"]}
+
+def read_trace_events(driver):
+    """Trace events recorded to the performance log since the last read"""
+    try:
+        logs = driver.get_log("performance")
+    except WebDriverException:
+        return []
+    events = []
+    for log in logs:
+        message = json.loads(log["message"])["message"]
+        if message["method"] == "Tracing.dataCollected":
+            events.append(message["params"])
+    return events
+
+def trace_breakdown(events, window_ms):
+    """Main-thread paint, composite, script and layout time from trace events"""
+    main_threads = {(event.get("pid"), event.get("tid")) for event in events
+                    if event.get("ph") == "M" and event.get("name") == "thread_name"
+                    and event.get("args", {}).get("name") == "CrRendererMain"}
+    totals = {bucket: 0.0 for bucket in TRACE_BUCKETS}
+    busy_us = 0
+    for event in events:
+        if event.get("ph") != "X" or (main_threads and (event.get("pid"), event.get("tid")) not in main_threads):
+            continue
+        duration = event.get("dur", 0)
+        if event.get("name") == "RunTask":
+            busy_us += duration
+        for bucket, names in TRACE_BUCKETS.items():
+            if event.get("name") in names:
+                totals[bucket] += duration
+    breakdown = {bucket: round(total / 1000, 1) for bucket, total in totals.items()}
+    breakdown["busy_pct"] = round(busy_us / 10 / window_ms, 1) if window_ms else None
+    breakdown["events"] = len(events)
+    return breakdown
+
+def profile_frames(driver, window_ms=5000, cpu_throttle=1, trace=False):
+    """Profile the page currently loaded in driver for window_ms
+
+    cpu_throttle > 1 slows the renderer like a low-end device for the window.
+    trace=True also reads the trace events the driver was started to record.
+    """
+    profile = {"window_ms": window_ms, "cpu_throttle": cpu_throttle}
+    if cpu_throttle > 1:
+        driver.execute_cdp_cmd("Emulation.setCPUThrottlingRate", {"rate": cpu_throttle})
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+        if trace:
+            read_trace_events(driver)
+        before = _metrics(driver)
+        driver.set_script_timeout(max(30, window_ms / 1000 + 5))
+        sample = driver.execute_async_script(SAMPLE_SCRIPT, window_ms)
+        after = _metrics(driver)
+        events = read_trace_events(driver) if trace else None
+    finally:
+        if cpu_throttle > 1:
+            driver.execute_cdp_cmd("Emulation.setCPUThrottlingRate", {"rate": 1})
+
+    profile["hidden"] = sample["hidden"]
+    profile.update(frame_stats(sample["frames"]))
+    elapsed_s = after.get("Timestamp", 0) - before.get("Timestamp", 0)
+    profile["main_thread"] = {
+        key: round((after.get(name, 0) - before.get(name, 0)) * 1000, 1) for name, key in METRICS.items()
+    }
+    profile["main_thread"]["busy_pct"] = (
+        round((after.get("TaskDuration", 0) - before.get("TaskDuration", 0)) * 100 / elapsed_s, 1)
+        if elapsed_s > 0 else None)
+    profile["long_tasks"] = len(sample["long_tasks"])
+    profile["long_task_ms"] = round(sum(sample["long_tasks"]), 1)
+    if events:
+        profile["trace"] = trace_breakdown(events, sample["elapsed_ms"])
+    elif events is not None:
+        # All-zero buckets would read as a free animation; say the trace is missing instead
+        profile["trace"] = {"error": "no trace events were recorded during the window", "events": 0}
+    return profile
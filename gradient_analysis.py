@@ -4,8 +4,10 @@ Gradient Animation Analysis Script
 Focus on checking for the specific features from commit a68aa24
 """
 
+import os
 import time
 import json
+import argparse
 from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -13,30 +15,89 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from chrome_driver import create_chrome_driver, BACKENDS
+from page_readiness import PageReadiness
+from dom_snapshot import DomSnapshot
+from results_stream import ResultsStream, write_results
+from run_history import RunHistory
+from probe_matrix import load_config
+from pattern_scan import PatternScanner, summarize_hits
+from tracing import tracer, traced
+from selector_cache import SelectorCache
+from frame_profile import profile_frames, TRACE_CATEGORIES
+
+OUTPUT_DIR = "/Users/paulbridges/Downloads/try again"
+
+TITLE_SELECTORS = [
+    "h1",
+    "[class*='text-3xl']",
+    "[class*='text-4xl']",
+    "[class*='text-6xl']",
+    "*:contains('Urban Directory')"
+]
+STYLE_PROPERTIES = [
+    'background', 'background-image', 'background-clip', 'color',
+    'background-color', '-webkit-background-clip', '-webkit-text-fill-color',
+    'animation', 'animation-name', 'animation-duration', 'text-decoration'
+]
+ANIMATION_SELECTOR = "[id*='tsparticles'], [class*='tsparticles'], canvas"
+PURPLE_CSS_KEYWORDS = ["purple", "lavender", "#8B5CF6", "#A855F7"]
+CSS_SCANNER = PatternScanner(["gradient"] + PURPLE_CSS_KEYWORDS)
+# Every readable stylesheet rule; cross-origin sheets throw and are skipped
+CSS_RULES_SCRIPT = """
+    const rules = [];
+    for (const sheet of document.styleSheets) {
+        try {
+            for (const rule of sheet.cssRules) {
+                rules.push(rule.cssText);
+            }
+        } catch (e) {
+            // Cross-origin stylesheets may not be accessible
+        }
+    }
+    return rules;
+"""
+DEFAULT_DOMAINS = {
+    "lbtr.shop": "https://lbtr.shop",
+    "urban-reel.vercel.app": "https://urban-reel.vercel.app"
+}
 
 class GradientAnalyzer:
-    def __init__(self):
-        self.setup_driver()
+    def __init__(self, driver=None, baseline=None, profile_ms=0, cpu_throttle=1, backend="selenium"):
+        # Frame-cost profiling window per domain (0 = off) and CPU slowdown applied during it
+        self.profile_ms = profile_ms
+        self.cpu_throttle = cpu_throttle
+        self.backend = backend
+        # A borrowed driver (e.g. from unified_runner) is used but never quit here
+        self.owns_driver = driver is None
+        if driver:
+            self.driver = driver
+            self.wait = WebDriverWait(driver, 15)
+        else:
+            self.setup_driver()
         self.results = {
             "timestamp": datetime.now().isoformat(),
             "domains": {}
         }
+        self.stream = None
+        # Last winning TITLE_SELECTORS entry per page, kept across runs
+        self.selectors = SelectorCache(os.path.join(OUTPUT_DIR, "selector_cache.json"))
+        # Domain the others are compared against; defaults to the first one analyzed
+        self.baseline = baseline
 
     def setup_driver(self):
         """Initialize Chrome driver"""
-        chrome_options = Options()
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # Only a profiling run pays for recording paint/composite trace events
+        self.driver = create_chrome_driver(trace_categories=TRACE_CATEGORIES if self.profile_ms else None,
+                                           backend=self.backend)
         self.wait = WebDriverWait(self.driver, 15)
 
-    def analyze_gradient(self, domain_name, url):
-        """Deep analysis of gradient implementation"""
+    @traced(label="domain_name")
+    def analyze_gradient(self, domain_name, url, navigate=True):
+        """Deep analysis of gradient implementation
+
+        With navigate=False the page must already be loaded in self.driver.
+        """
         print(f"\n🔍 Analyzing {domain_name} for gradient features...")
 
         domain_results = {
@@ -44,70 +105,54 @@ class GradientAnalyzer:
             "title_gradient": {},
             "css_analysis": {},
             "computed_styles": {},
-            "background_analysis": {}
+            "background_analysis": {},
+            "wait_timings": []
         }
+        readiness = PageReadiness(self.driver)
 
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
-            # Find the Urban Directory title
-            title_element = None
-            title_selectors = [
-                "h1",
-                "[class*='text-3xl']",
-                "[class*='text-4xl']",
-                "[class*='text-6xl']",
-                "*:contains('Urban Directory')"
-            ]
-
-            for selector in title_selectors:
-                try:
-                    if ":contains(" in selector:
-                        elements = self.driver.find_elements(By.XPATH,
-                            "//*[contains(text(), 'Urban Directory')]")
-                    else:
-                        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-
-                    if elements:
-                        for element in elements:
-                            if "Urban Directory" in element.text:
-                                title_element = element
-                                break
-                        if title_element:
-                            break
-                except:
-                    continue
+            if navigate:
+                with tracer.span("navigate", url=url):
+                    self.driver.get(url)
+                readiness.wait_for_page_settled()
+
+            # Capture title candidates and their computed styles in one round trip
+            css_selectors = [sel for sel in TITLE_SELECTORS if ":contains(" not in sel]
+            with tracer.span("snapshot"):
+                snapshot = DomSnapshot.capture(self.driver, css_selectors + [ANIMATION_SELECTOR],
+                                               style_selectors=css_selectors,
+                                               style_texts=["Urban Directory"],
+                                               style_properties=STYLE_PROPERTIES)
+
+            # Find the Urban Directory title, trying the selector that matched last time first
+            def title_candidates(selector):
+                if ":contains(" in selector:
+                    elements = snapshot.find_text("Urban Directory")
+                else:
+                    elements = snapshot.select(selector)
+                return [element for element in elements if "Urban Directory" in element.get("text", "")]
+
+            title_selector, title_elements = self.selectors.resolve(
+                snapshot.url, "gradient_title", TITLE_SELECTORS, title_candidates)
+            title_element = title_elements[0] if title_elements else None
 
             if title_element:
-                print("✓ Found Urban Directory title element")
+                print(f"✓ Found Urban Directory title element ({title_selector})")
+                domain_results["title_gradient"]["selector"] = title_selector
 
                 # Get all CSS classes
-                classes = title_element.get_attribute("class") or ""
+                classes = title_element["classes"] or ""
                 domain_results["title_gradient"]["classes"] = classes
 
                 # Check for gradient-related classes
                 gradient_classes = [cls for cls in classes.split() if 'gradient' in cls.lower()]
                 domain_results["title_gradient"]["gradient_classes"] = gradient_classes
 
-                # Get computed styles
+                # Keep the computed styles that are actually set
                 computed_styles = {}
-                style_properties = [
-                    'background', 'background-image', 'background-clip', 'color',
-                    'background-color', '-webkit-background-clip', '-webkit-text-fill-color',
-                    'animation', 'animation-name', 'animation-duration', 'text-decoration'
-                ]
-
-                for prop in style_properties:
-                    try:
-                        value = self.driver.execute_script(
-                            f"return getComputedStyle(arguments[0]).getPropertyValue('{prop}');",
-                            title_element
-                        )
-                        if value and value != 'none' and value.strip():
-                            computed_styles[prop] = value
-                    except:
-                        pass
+                for prop, value in title_element.get("styles", {}).items():
+                    if value and value != 'none' and value.strip():
+                        computed_styles[prop] = value
 
                 domain_results["computed_styles"] = computed_styles
 
@@ -155,27 +200,17 @@ class GradientAnalyzer:
             # Check page CSS for gradient definitions
             print("🎨 Checking page CSS for gradient definitions...")
 
-            css_content = self.driver.execute_script("""
-                let css = '';
-                for (let i = 0; i < document.styleSheets.length; i++) {
-                    try {
-                        let sheet = document.styleSheets[i];
-                        if (sheet.cssRules) {
-                            for (let j = 0; j < sheet.cssRules.length; j++) {
-                                css += sheet.cssRules[j].cssText + '\\n';
-                            }
-                        }
-                    } catch (e) {
-                        // Cross-origin stylesheets may not be accessible
-                    }
-                }
-                return css;
-            """)
-
-            gradient_definitions = []
-            for line in css_content.split('\n'):
-                if 'gradient' in line.lower() and ('purple' in line.lower() or 'lavender' in line.lower() or '#8B5CF6' in line or '#A855F7' in line):
-                    gradient_definitions.append(line.strip())
+            # One rule per entry; the scanner reads every rule once for all keywords
+            with tracer.span("css_scan"):
+                css_rules = self.driver.execute_script(CSS_RULES_SCRIPT)
+                hits = CSS_SCANNER.scan_chunks(css_rules)
+
+            gradient_rules = {rule_index for rule_index, _ in hits["gradient"]}
+            purple_rules = {rule_index for name in PURPLE_CSS_KEYWORDS for rule_index, _ in hits[name]}
+            gradient_definitions = [css_rules[rule_index].strip()
+                                    for rule_index in sorted(gradient_rules & purple_rules)]
+            domain_results["css_analysis"]["rules_scanned"] = len(css_rules)
+            domain_results["css_analysis"]["pattern_hits"] = summarize_hits(hits)
 
             domain_results["css_analysis"]["gradient_definitions"] = gradient_definitions
             print(f"   Found {len(gradient_definitions)} gradient definitions with purple/lavender")
@@ -183,11 +218,10 @@ class GradientAnalyzer:
             # Check for TSParticles (animated background)
             print("✨ Checking for TSParticles animation...")
 
-            tsparticles_elements = self.driver.find_elements(By.CSS_SELECTOR,
-                "[id*='tsparticles'], [class*='tsparticles'], canvas")
+            tsparticles_elements = snapshot.select(ANIMATION_SELECTOR)
 
             domain_results["background_analysis"]["tsparticles_found"] = len(tsparticles_elements) > 0
-            domain_results["background_analysis"]["canvas_count"] = len([e for e in tsparticles_elements if e.tag_name == 'canvas'])
+            domain_results["background_analysis"]["canvas_count"] = len([e for e in tsparticles_elements if e["tag"] == 'canvas'])
 
             if tsparticles_elements:
                 print(f"   ✓ Found {len(tsparticles_elements)} animation elements")
@@ -195,21 +229,43 @@ class GradientAnalyzer:
             else:
                 print("   ✗ No TSParticles animation found")
 
+            if self.profile_ms:
+                self.profile_animation(domain_results)
+
         except Exception as e:
             domain_results["error"] = str(e)
             print(f"✗ Error analyzing {domain_name}: {str(e)}")
 
+        domain_results["wait_timings"] = readiness.timings
         return domain_results
 
-    def analyze_both_domains(self):
-        """Analyze both domains for gradient features"""
-        domains = {
-            "lbtr.shop": "https://lbtr.shop",
-            "urban-reel.vercel.app": "https://urban-reel.vercel.app"
-        }
+    def profile_animation(self, domain_results):
+        """Measure what the running gradient and background animations cost per frame"""
+        print(f"⏱️  Profiling animation frames for {self.profile_ms}ms (CPU throttle {self.cpu_throttle}x)...")
+        try:
+            with tracer.span("frame_profile"):
+                # A borrowed driver was not started with trace categories
+                profile = profile_frames(self.driver, self.profile_ms, self.cpu_throttle,
+                                         trace=self.owns_driver)
+            domain_results["frame_profile"] = profile
+            print(f"   FPS {profile['fps']} (p5 {profile.get('fps_p5')}), "
+                  f"{profile['dropped_frames']} dropped frames, "
+                  f"main thread {profile['main_thread']['busy_pct']}% busy")
+        except Exception as e:
+            domain_results["frame_profile"] = {"error": str(e)}
+            print(f"   ✗ Frame profiling failed: {e}")
+
+    def analyze_both_domains(self, domains=None):
+        """Analyze every domain for gradient features"""
+        domains = domains or DEFAULT_DOMAINS
+
+        # Each domain is flushed to the JSON Lines stream as soon as it is analyzed
+        self.stream = ResultsStream(os.path.join(OUTPUT_DIR, "gradient_analysis_results.jsonl"))
+        self.stream.run_start(self.results)
 
         for domain_name, url in domains.items():
             self.results["domains"][domain_name] = self.analyze_gradient(domain_name, url)
+            self.stream.domain_end(domain_name, self.results["domains"][domain_name], streamed=())
             time.sleep(2)
 
     def generate_report(self):
@@ -248,17 +304,33 @@ class GradientAnalyzer:
             print(f"   • TSParticles found: {bg_analysis.get('tsparticles_found', False)}")
             print(f"   • Canvas elements: {bg_analysis.get('canvas_count', 0)}")
 
+            profile = data.get("frame_profile")
+            if profile and "error" not in profile:
+                main_thread = profile["main_thread"]
+                print(f"\n⏱️  Frame Cost ({profile['window_ms']}ms, CPU throttle {profile['cpu_throttle']}x):")
+                print(f"   • FPS: {profile['fps']} mean, {profile.get('fps_p50')} p50, "
+                      f"{profile.get('fps_p5')} p5, {profile.get('fps_p1')} p1")
+                print(f"   • Dropped frames: {profile['dropped_frames']} ({profile.get('dropped_pct')}%)")
+                print(f"   • Main thread busy: {main_thread['busy_pct']}% "
+                      f"(script {main_thread['script_ms']}ms, layout {main_thread['layout_ms']}ms, "
+                      f"style {main_thread['recalc_style_ms']}ms)")
+                if "error" in profile.get("trace", {}):
+                    print(f"   ⚠️  Trace: {profile['trace']['error']}")
+                elif "trace" in profile:
+                    print(f"   • Paint {profile['trace']['paint_ms']}ms, "
+                          f"composite {profile['trace']['composite_ms']}ms")
+                if profile["hidden"]:
+                    print("   ⚠️  Page was hidden while profiling; no frames were rendered")
+
             print(f"\n🔧 Key Computed Styles:")
             for prop, value in computed.items():
                 if any(keyword in prop for keyword in ['background', 'color', 'animation']):
                     print(f"   • {prop}: {value}")
 
-        # Comparison
-        lbtr_data = self.results["domains"].get("lbtr.shop", {})
-        vercel_data = self.results["domains"].get("urban-reel.vercel.app", {})
-
-        print(f"\n🔄 COMPARISON")
-        print("-" * 50)
+        # Comparison against the baseline domain
+        names = list(self.results["domains"])
+        baseline_name = self.baseline if self.baseline in names else (names[0] if names else None)
+        baseline_data = self.results["domains"].get(baseline_name, {})
 
         features_to_compare = [
             ("Title gradient", "title_gradient.is_text_gradient"),
@@ -267,55 +339,66 @@ class GradientAnalyzer:
             ("TSParticles", "background_analysis.tsparticles_found")
         ]
 
-        for feature_name, feature_path in features_to_compare:
-            lbtr_val = self.get_nested_value(lbtr_data, feature_path)
-            vercel_val = self.get_nested_value(vercel_data, feature_path)
+        for candidate_name in names:
+            if candidate_name == baseline_name:
+                continue
+            candidate_data = self.results["domains"][candidate_name]
+
+            print(f"\n🔄 COMPARISON: {baseline_name} (baseline) vs {candidate_name}")
+            print("-" * 50)
+
+            for feature_name, feature_path in features_to_compare:
+                baseline_val = self.get_nested_value(baseline_data, feature_path)
+                candidate_val = self.get_nested_value(candidate_data, feature_path)
 
-            status = "✓ Same" if lbtr_val == vercel_val else "⚠️  Different"
-            print(f"{feature_name:20} | lbtr: {lbtr_val:8} | vercel: {vercel_val:8} | {status}")
+                status = "✓ Same" if baseline_val == candidate_val else "⚠️  Different"
+                print(f"{feature_name:20} | baseline: {baseline_val:8} | candidate: {candidate_val:8} | {status}")
 
         # Final recommendation
         print(f"\n🎯 FINAL ASSESSMENT")
         print("-" * 50)
 
-        both_have_gradient = (
-            self.get_nested_value(lbtr_data, "title_gradient.is_text_gradient") and
-            self.get_nested_value(vercel_data, "title_gradient.is_text_gradient")
-        )
+        def all_domains_have(path):
+            return all(self.get_nested_value(data, path) for data in self.results["domains"].values())
 
-        both_have_purple = (
-            self.get_nested_value(lbtr_data, "title_gradient.has_purple_colors") and
-            self.get_nested_value(vercel_data, "title_gradient.has_purple_colors")
-        )
+        all_have_gradient = all_domains_have("title_gradient.is_text_gradient")
+        all_have_purple = all_domains_have("title_gradient.has_purple_colors")
+        all_have_animation = all_domains_have("title_gradient.has_animation")
+        all_have_particles = all_domains_have("background_analysis.tsparticles_found")
 
-        both_have_animation = (
-            self.get_nested_value(lbtr_data, "title_gradient.has_animation") and
-            self.get_nested_value(vercel_data, "title_gradient.has_animation")
-        )
-
-        both_have_particles = (
-            self.get_nested_value(lbtr_data, "background_analysis.tsparticles_found") and
-            self.get_nested_value(vercel_data, "background_analysis.tsparticles_found")
-        )
-
-        if both_have_gradient and both_have_purple and both_have_particles:
-            print("✅ GOOD: Both domains appear to be working correctly with expected features")
+        if all_have_gradient and all_have_purple and all_have_particles:
+            print("✅ GOOD: All domains appear to be working correctly with expected features")
             print("   The issue might not be with the current deployment")
-        elif not both_have_gradient:
+        elif not all_have_gradient:
             print("❌ ISSUE: Gradient animation is missing or not properly implemented")
             print("   Expected: Purple gradient text animation on 'Urban Directory' title")
-        elif not both_have_purple:
+        elif not all_have_purple:
             print("❌ ISSUE: Purple color scheme is missing")
             print("   Expected: Purple/lavender gradient colors")
-        elif not both_have_particles:
+        elif not all_have_particles:
             print("❌ ISSUE: Background particles animation is missing")
             print("   Expected: TSParticles background animation")
         else:
             print("⚠️  PARTIAL: Some features are present but others may be missing")
 
-        # Save detailed results
-        with open("/Users/paulbridges/Downloads/try again/gradient_analysis_results.json", "w") as f:
-            json.dump(self.results, f, indent=2)
+        # Save detailed results, rebuilt from the stream
+        json_path = os.path.join(OUTPUT_DIR, "gradient_analysis_results.json")
+        if self.stream:
+            self.stream.close()
+            write_results(self.stream.path, json_path)
+        else:
+            with open(json_path, "w") as f:
+                json.dump(self.results, f, indent=2)
+
+        # Index the run for trend queries (run_history.py)
+        try:
+            history = RunHistory(os.path.join(OUTPUT_DIR, "run_history.sqlite"))
+            try:
+                history.record_gradient_run(self.results)
+            finally:
+                history.close()
+        except Exception as e:
+            print(f"⚠️  Could not update run history: {e}")
 
     def get_nested_value(self, data, path):
         """Get nested dictionary value using dot notation"""
@@ -330,13 +413,33 @@ class GradientAnalyzer:
 
     def cleanup(self):
         """Clean up resources"""
-        if hasattr(self, 'driver'):
+        if self.owns_driver and hasattr(self, 'driver'):
             self.driver.quit()
 
 if __name__ == "__main__":
-    analyzer = GradientAnalyzer()
+    parser = argparse.ArgumentParser(description="Analyze the gradient title and background animation")
+    parser.add_argument("--config", help="probe matrix JSON; its domains and baseline are analyzed")
+    parser.add_argument("--profile-frames", type=int, default=0, metavar="MS",
+                        help="sample animation frames for MS milliseconds per domain (default off)")
+    parser.add_argument("--cpu-throttle", type=float, default=1,
+                        help="CPU slowdown while profiling, e.g. 4 for a low-end phone (default 1)")
+    parser.add_argument("--backend", choices=BACKENDS, default="selenium",
+                        help="drive Chrome through chromedriver (selenium) or the DevTools websocket (cdp)")
+    args = parser.parse_args()
+
+    domains = None
+    baseline = None
+    if args.config:
+        matrix = load_config(args.config)
+        domains = {name: spec["url"] for name, spec in matrix["domains"].items()}
+        baseline = matrix["baseline"]
+
+    analyzer = GradientAnalyzer(baseline=baseline, profile_ms=args.profile_frames,
+                                cpu_throttle=args.cpu_throttle, backend=args.backend)
     try:
-        analyzer.analyze_both_domains()
+        analyzer.analyze_both_domains(domains)
         analyzer.generate_report()
+        tracer.print_summary()
+        tracer.export(os.path.join(OUTPUT_DIR, "gradient_trace.json"))
     finally:
         analyzer.cleanup()
\ No newline at end of file
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Monitor Daemon - Continuous deployment monitoring on asyncio
+Probes every configured domain on its own interval (with jitter), backs off
+exponentially while a host fails, reuses a small pool of Chrome sessions and
+indexes each result in the run history as soon as it arrives
+"""
+
+import os
+import random
+import signal
+import asyncio
+import argparse
+from datetime import datetime
+from selenium.common.exceptions import WebDriverException
+from chrome_driver import create_chrome_driver, BACKENDS
+from deployment_test import DeploymentTester, DEFAULT_DOMAINS
+from gradient_analysis import GradientAnalyzer
+from run_history import RunHistory
+from probe_matrix import load_config
+
+OUTPUT_DIR = "/Users/paulbridges/Downloads/try again"
+PROBES = ("deployment", "gradient")
+
+def quit_driver(driver):
+    """Quit a Chrome session, ignoring one that already died"""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+def session_alive(driver):
+    """Whether a Chrome session still answers a trivial command"""
+    try:
+        driver.title
+        return True
+    except Exception:
+        return False
+
+class BrowserPool:
+    def __init__(self, size=2, max_uses=50, backend="selenium"):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.backend = backend
+        self.available = asyncio.Queue()
+        self.uses = {}
+
+    async def acquire(self):
+        """A warm Chrome session; a new one is started only while the pool is below size"""
+        if self.available.empty() and len(self.uses) < self.size:
+            # Reserve the slot before the slow launch so concurrent callers respect size
+            placeholder = object()
+            self.uses[placeholder] = 0
+            try:
+                driver = await asyncio.to_thread(create_chrome_driver, backend=self.backend)
+            finally:
+                del self.uses[placeholder]
+            self.uses[driver] = 0
+            return driver
+        return await self.available.get()
+
+    async def release(self, driver, broken=False):
+        """Return a session; crashed or well-used sessions are replaced to keep memory flat"""
+        self.uses[driver] += 1
+        if broken or self.uses[driver] >= self.max_uses:
+            del self.uses[driver]
+            await asyncio.to_thread(quit_driver, driver)
+            return
+        self.available.put_nowait(driver)
+
+    async def close(self):
+        """Quit every idle session"""
+        while not self.available.empty():
+            driver = self.available.get_nowait()
+            self.uses.pop(driver, None)
+            await asyncio.to_thread(quit_driver, driver)
+
+class MonitorDaemon:
+    def __init__(self, domains, probes=("deployment",), checks=None, budgets=None, interval_s=300,
+                 jitter=0.1, max_backoff_s=3600, browsers=2, max_uses=50, backend="selenium",
+                 history_path=os.path.join(OUTPUT_DIR, "run_history.sqlite")):
+        self.domains = domains
+        self.probes = [probe for probe in PROBES if probe in probes]
+        self.interval_s = interval_s
+        self.jitter = jitter
+        self.max_backoff_s = max_backoff_s
+        self.pool = BrowserPool(browsers, max_uses, backend)
+        # One tester (screenshot pipeline and store) shared by every deployment probe
+        self.tester = DeploymentTester(checks=checks, budgets=budgets, launch_browser=False)
+        self.history = RunHistory(history_path)
+        self.stopping = None
+        self.stats = {"probes": 0, "failures": 0, "browser_failures": 0}
+
+    def log(self, message):
+        """Log through the tester so lines from probe threads never interleave"""
+        self.tester.log_action(message)
+
+    def run_probe(self, probe, domain_name, url, driver):
+        """Blocking probe on a worker thread with a pooled driver"""
+        if probe == "deployment":
+            self.tester.use_driver(driver)
+            result = self.tester.test_domain(domain_name, url)
+            # Drain the shared screenshot pipeline so it never grows over the daemon's lifetime
+            for error in self.tester.screenshots.wait():
+                self.log(f"✗ Screenshot failed to save: {error}")
+            return result
+        return GradientAnalyzer(driver=driver).analyze_gradient(domain_name, url)
+
+    def record(self, probe, domain_name, result):
+        """Index one probe result in the run history"""
+        timestamp = datetime.now().isoformat()
+        if probe == "deployment":
+            self.history.record_deployment_run({"test_timestamp": timestamp, "domains": {domain_name: result}})
+        else:
+            self.history.record_gradient_run({"timestamp": timestamp, "domains": {domain_name: result}})
+
+    async def probe_domain(self, domain_name, url):
+        """Run every selected probe once; returns True if the host answered them all"""
+        healthy = True
+        for probe in self.probes:
+            driver = await self.pool.acquire()
+            broken = False
+            result = None
+            try:
+                result = await asyncio.to_thread(self.run_probe, probe, domain_name, url, driver)
+            except WebDriverException as e:
+                broken = True
+                result = {"url": url, "error": str(e)}
+            finally:
+                # The probes catch their own errors, so a dead session only shows as an error result
+                if result is not None and not broken and "error" in result:
+                    broken = not await asyncio.to_thread(session_alive, driver)
+                await self.pool.release(driver, broken)
+
+            self.stats["probes"] += 1
+            failed = "error" in result or result.get("accessible") is False
+            if failed and broken:
+                # The browser died, not the host: replace the session without backing off
+                self.stats["browser_failures"] += 1
+                self.log(f"✗ Chrome session died while probing {domain_name}, replaced it")
+            elif failed:
+                self.stats["failures"] += 1
+                healthy = False
+            try:
+                self.record(probe, domain_name, result)
+            except Exception as e:
+                self.log(f"✗ Could not update run history: {e}")
+        return healthy
+
+    def next_delay(self, interval_s, failures):
+        """Interval, doubled per consecutive failure up to max_backoff_s, with jitter"""
+        delay = interval_s
+        if failures:
+            delay = min(interval_s * 2 ** failures, self.max_backoff_s)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def watch(self, domain_name, spec):
+        """Probe one domain forever on its own schedule"""
+        interval_s = spec.get("interval_s", self.interval_s)
+        failures = 0
+        # Spread the first probes so every domain does not start at once
+        delay = random.uniform(0, interval_s * self.jitter)
+
+        while True:
+            try:
+                await asyncio.wait_for(self.stopping.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+
+            if await self.probe_domain(domain_name, spec["url"]):
+                failures = 0
+            else:
+                failures += 1
+            delay = self.next_delay(interval_s, failures)
+            if failures:
+                self.log(f"✗ {domain_name} failed {failures}x in a row, backing off: next probe in {delay:.0f}s")
+            else:
+                self.log(f"✓ {domain_name}: next probe in {delay:.0f}s")
+
+    async def run(self):
+        """Watch every domain until SIGINT or SIGTERM"""
+        self.stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except NotImplementedError:
+                pass
+
+        self.log(f"Monitoring {len(self.domains)} domains with {', '.join(self.probes)} probes "
+                 f"on up to {self.pool.size} browsers")
+        try:
+            await asyncio.gather(*(self.watch(name, spec) for name, spec in self.domains.items()))
+        finally:
+            await self.pool.close()
+            self.tester.cleanup()
+            self.history.close()
+            self.log(f"Monitor stopped after {self.stats['probes']} probes, "
+                     f"{self.stats['failures']} failed, {self.stats['browser_failures']} browser crashes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Continuously monitor deployments")
+    parser.add_argument("--config", help="probe matrix JSON; its domains, checks and monitor section are used")
+    parser.add_argument("--probes", default="deployment",
+                        help=f"comma-separated probes to run: {', '.join(PROBES)}")
+    parser.add_argument("--interval", type=float, help="seconds between probes of a domain (default 300)")
+    parser.add_argument("--jitter", type=float, help="random +/- fraction applied to every delay (default 0.1)")
+    parser.add_argument("--max-backoff", type=float, help="longest delay after repeated failures (default 3600)")
+    parser.add_argument("--browsers", type=int, help="Chrome sessions kept in the pool (default 2)")
+    parser.add_argument("--recycle-after", type=int, help="probes before a session is replaced (default 50)")
+    parser.add_argument("--backend", choices=BACKENDS,
+                        help="drive Chrome through chromedriver (selenium, default) or the DevTools websocket (cdp)")
+    args = parser.parse_args()
+
+    domains = {name: {"url": url} for name, url in DEFAULT_DOMAINS.items()}
+    checks = None
+    budgets = None
+    settings = {}
+    if args.config:
+        matrix = load_config(args.config)
+        domains = matrix["domains"]
+        checks = matrix["checks"]
+        budgets = matrix["budgets"]
+        settings = matrix["monitor"]
+
+    # Command line flags win over the config's monitor section
+    for key, value in (("interval_s", args.interval), ("jitter", args.jitter),
+                       ("max_backoff_s", args.max_backoff), ("browsers", args.browsers),
+                       ("max_uses", args.recycle_after), ("backend", args.backend)):
+        if value is not None:
+            settings[key] = value
+
+    daemon = MonitorDaemon(domains, probes=args.probes.split(","), checks=checks, budgets=budgets, **settings)
+    asyncio.run(daemon.run())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Network Log - Request waterfall from Chrome DevTools Protocol network events
+Reads the Network.* events Chrome writes to the performance log and turns them
+into per-request records with sizes, timing phases, cache status and protocol
+"""
+
+import json
+from selenium.common.exceptions import WebDriverException
+
+# CDP resource types grouped into the categories byte budgets are set on
+BUDGET_TYPES = {
+    "Script": "js",
+    "Image": "images",
+    "Font": "fonts",
+    "Stylesheet": "css",
+    "Document": "document",
+    "XHR": "api",
+    "Fetch": "api",
+    "Media": "media"
+}
+# Document response headers that identify the deployment and how the CDN served it
+DEPLOYMENT_HEADERS = ("x-vercel-id", "x-vercel-cache", "age", "cache-control", "server-timing")
+# Transfer-size budgets per category, in bytes
+DEFAULT_BUDGETS = {
+    "js": 500 * 1024,
+    "images": 1024 * 1024,
+    "fonts": 200 * 1024
+}
+
+def _phase(timing, start, end):
+    """Duration between two CDP ResourceTiming marks; -1 marks an unused phase"""
+    if not timing or timing.get(start, -1) < 0 or timing.get(end, -1) < 0:
+        return None
+    return round(timing[end] - timing[start], 1)
+
+def _cache_status(entry):
+    """Where the response came from, as far as the browser knows"""
+    response = entry.get("response") or {}
+    if entry.get("served_from_cache"):
+        return "memory"
+    if response.get("fromServiceWorker"):
+        return "service_worker"
+    if response.get("fromPrefetchCache"):
+        return "prefetch"
+    if response.get("fromDiskCache"):
+        return "disk"
+    if response.get("status") == 304:
+        return "revalidated"
+    return "network"
+
+class NetworkLog:
+    def __init__(self, driver):
+        self.driver = driver
+        self.entries = {}
+        self.order = []
+
+    def read_events(self):
+        """Network.* CDP events written to the performance log since the last read"""
+        events = []
+        try:
+            logs = self.driver.get_log("performance")
+        except WebDriverException:
+            # Driver started without performance logging (see chrome_driver.py)
+            return events
+        for log in logs:
+            message = json.loads(log["message"])["message"]
+            if message["method"].startswith("Network."):
+                events.append(message)
+        return events
+
+    def reset(self):
+        """Drop buffered events and records; call right before a navigation"""
+        self.read_events()
+        self.entries = {}
+        self.order = []
+
+    def drain(self):
+        """Fold new events into the per-request records; returns self for chaining"""
+        for event in self.read_events():
+            params = event["params"]
+            request_id = params.get("requestId")
+            method = event["method"]
+
+            if method == "Network.requestWillBeSent":
+                previous = self.entries.get(request_id)
+                if previous and params.get("redirectResponse"):
+                    # Redirects reuse the request id: keep the hop as its own record
+                    previous["response"] = params["redirectResponse"]
+                    previous["finished"] = params["timestamp"]
+                    previous["redirected"] = True
+                    hop_id = f"{request_id}:redirect{len(self.order)}"
+                    self.entries[hop_id] = previous
+                    self.order[self.order.index(request_id)] = hop_id
+                self.entries[request_id] = {
+                    "request_id": request_id,
+                    "loader_id": params.get("loaderId"),
+                    "url": params["request"]["url"],
+                    "method": params["request"].get("method"),
+                    "type": params.get("type"),
+                    "started": params["timestamp"]
+                }
+                self.order.append(request_id)
+                continue
+
+            entry = self.entries.get(request_id)
+            if entry is None:
+                continue
+            if method == "Network.responseReceived":
+                entry["response"] = params["response"]
+                entry["type"] = params.get("type") or entry.get("type")
+            elif method == "Network.requestServedFromCache":
+                entry["served_from_cache"] = True
+            elif method == "Network.loadingFinished":
+                entry["finished"] = params["timestamp"]
+                entry["encoded_length"] = params.get("encodedDataLength")
+            elif method == "Network.loadingFailed":
+                entry["finished"] = params["timestamp"]
+                entry["failed"] = params.get("errorText") or "failed"
+                entry["canceled"] = params.get("canceled", False)
+        return self
+
+    def document_response(self):
+        """Final response of the first top-level navigation, after any redirects"""
+        for request_id in self.order:
+            entry = self.entries[request_id]
+            # Navigation requests share their id with the loader they create
+            if (entry.get("type") == "Document" and entry["request_id"] == entry.get("loader_id")
+                    and not entry.get("redirected") and entry.get("response")):
+                return entry["response"]
+        return None
+
+    def requests(self):
+        """One waterfall record per request, in the order they were sent"""
+        if not self.order:
+            return []
+        origin = min(self.entries[request_id]["started"] for request_id in self.order)
+        records = []
+        for request_id in self.order:
+            entry = self.entries[request_id]
+            response = entry.get("response") or {}
+            timing = response.get("timing")
+            finished = entry.get("finished")
+            record = {
+                "url": entry["url"],
+                "method": entry["method"],
+                "type": entry.get("type"),
+                "status": response.get("status"),
+                "mime_type": response.get("mimeType"),
+                "protocol": response.get("protocol"),
+                "cache": _cache_status(entry),
+                # loadingFinished carries the full transfer size; the response only its headers
+                "transfer_size": entry.get("encoded_length", response.get("encodedDataLength")),
+                "start_ms": round((entry["started"] - origin) * 1000, 1),
+                "duration_ms": round((finished - entry["started"]) * 1000, 1) if finished else None,
+                "timing": {
+                    "dns_ms": _phase(timing, "dnsStart", "dnsEnd"),
+                    "connect_ms": _phase(timing, "connectStart", "connectEnd"),
+                    "ssl_ms": _phase(timing, "sslStart", "sslEnd"),
+                    "send_ms": _phase(timing, "sendStart", "sendEnd"),
+                    "wait_ms": _phase(timing, "sendEnd", "receiveHeadersEnd"),
+                    "receive_ms": (round((finished - timing["requestTime"]) * 1000
+                                         - timing["receiveHeadersEnd"], 1)
+                                   if timing and finished else None)
+                }
+            }
+            if entry.get("redirected"):
+                record["redirected"] = True
+            if entry.get("failed"):
+                record["failed"] = entry["failed"]
+            records.append(record)
+        return records
+
+def deployment_headers(url, status, headers, protocol=None):
+    """The deployment-identifying headers of a document response"""
+    headers = {name.lower(): value for name, value in (headers or {}).items()}
+    return {
+        "url": url,
+        "status": status,
+        "protocol": protocol,
+        "headers": {name: headers.get(name) for name in DEPLOYMENT_HEADERS}
+    }
+
+def summarize(requests, budgets=None):
+    """Totals per budget category plus any budget the page exceeds"""
+    budgets = DEFAULT_BUDGETS if budgets is None else budgets
+    by_type = {}
+    for request in requests:
+        category = BUDGET_TYPES.get(request["type"], "other")
+        totals = by_type.setdefault(category, {"count": 0, "bytes": 0, "largest": []})
+        totals["count"] += 1
+        totals["bytes"] += request["transfer_size"] or 0
+        totals["largest"].append((request["transfer_size"] or 0, request["url"]))
+
+    for totals in by_type.values():
+        totals["largest"] = [{"url": url, "bytes": size}
+                             for size, url in sorted(totals["largest"], reverse=True)[:3]]
+
+    violations = [
+        {"type": category, "bytes": by_type[category]["bytes"], "budget": budget,
+         "largest": by_type[category]["largest"]}
+        for category, budget in budgets.items()
+        if category in by_type and by_type[category]["bytes"] > budget
+    ]
+    return {
+        "request_count": len(requests),
+        "total_bytes": sum(request["transfer_size"] or 0 for request in requests),
+        "failed": sum(1 for request in requests if request.get("failed")),
+        "by_type": by_type,
+        "budget_violations": violations,
+        "requests": requests
+    }
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Page Readiness - Event-driven waits shared by the deployment probes
+Replaces fixed time.sleep() calls with waits on real page signals
+"""
+
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from tracing import traced
+from selenium.common.exceptions import (TimeoutException, UnexpectedAlertPresentException,
+                                        NoAlertPresentException, WebDriverException)
+
+# Installed once per document: counts in-flight fetch/XHR requests and records
+# the time of the last DOM mutation, then reports the current page state.
+STATE_SCRIPT = """
+    if (!window.__readiness) {
+        const state = window.__readiness = {inflight: 0, lastMutation: performance.now()};
+        const origFetch = window.fetch;
+        if (origFetch) {
+            window.fetch = function() {
+                state.inflight++;
+                return origFetch.apply(this, arguments).finally(() => { state.inflight--; });
+            };
+        }
+        const origSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function() {
+            state.inflight++;
+            this.addEventListener('loadend', () => { state.inflight--; }, {once: true});
+            return origSend.apply(this, arguments);
+        };
+        new MutationObserver(() => { state.lastMutation = performance.now(); })
+            .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    }
+    const state = window.__readiness;
+    return {
+        readyState: document.readyState,
+        inflight: state.inflight,
+        resources: performance.getEntriesByType('resource').length,
+        sinceMutation: performance.now() - state.lastMutation
+    };
+"""
+
+class PageReadiness:
+    def __init__(self, driver, timeout=15, quiet_ms=500, poll_interval=0.1):
+        self.driver = driver
+        self.timeout = timeout
+        self.quiet_ms = quiet_ms
+        self.poll_interval = poll_interval
+        self.timings = []
+
+    def _record(self, signal, started, satisfied, detail=None):
+        """Record how long a wait took and whether its signal fired"""
+        entry = {
+            "signal": signal,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "satisfied": satisfied
+        }
+        if detail:
+            entry["detail"] = detail
+        self.timings.append(entry)
+        return satisfied
+
+    def _wait(self, signal, condition, timeout=None, detail=None):
+        """Poll a condition until it is truthy or the timeout expires"""
+        started = time.perf_counter()
+        waiter = WebDriverWait(self.driver, timeout or self.timeout,
+                               poll_frequency=self.poll_interval)
+        try:
+            result = waiter.until(condition)
+            self._record(signal, started, True, detail)
+            return result
+        except TimeoutException:
+            self._record(signal, started, False, detail)
+            return None
+
+    def _page_state(self):
+        """Fetch the page state, or None while a JavaScript alert blocks the page"""
+        try:
+            return self.driver.execute_script(STATE_SCRIPT)
+        except UnexpectedAlertPresentException:
+            return None
+
+    def alert_present(self):
+        """Check for an open JavaScript alert without waiting"""
+        try:
+            self.driver.switch_to.alert.text
+            return True
+        except NoAlertPresentException:
+            return False
+
+    @traced()
+    def wait_for_document_ready(self, timeout=None):
+        """Wait until document.readyState is complete (or an alert opens)"""
+        def ready(driver):
+            if self.alert_present():
+                return "alert"
+            state = self._page_state()
+            if state is None:
+                return "alert"
+            return state["readyState"] == "complete" and state
+        return self._wait("document_ready", ready, timeout)
+
+    @traced()
+    def wait_for_network_quiet(self, quiet_ms=None, timeout=None):
+        """Wait until no fetch/XHR is in flight and no new resources load for quiet_ms"""
+        quiet_s = (quiet_ms or self.quiet_ms) / 1000
+        last = {"resources": None, "since": time.perf_counter()}
+
+        def quiet(driver):
+            state = self._page_state()
+            if state is None:
+                return "alert"
+            now = time.perf_counter()
+            if state["inflight"] > 0 or state["resources"] != last["resources"]:
+                last["resources"] = state["resources"]
+                last["since"] = now
+                return False
+            return now - last["since"] >= quiet_s and state
+        return self._wait("network_quiet", quiet, timeout)
+
+    @traced()
+    def wait_for_dom_quiet(self, quiet_ms=None, timeout=None):
+        """Wait until the DOM has not mutated for quiet_ms"""
+        quiet_ms = quiet_ms or self.quiet_ms
+
+        def quiet(driver):
+            state = self._page_state()
+            if state is None:
+                return "alert"
+            return state["sinceMutation"] >= quiet_ms and state
+        return self._wait("dom_quiet", quiet, timeout)
+
+    @traced()
+    def wait_for_page_settled(self, timeout=None):
+        """Wait for document ready, then network quiet, then DOM quiet"""
+        results = [
+            self.wait_for_document_ready(timeout),
+            self.wait_for_network_quiet(timeout=timeout),
+            self.wait_for_dom_quiet(timeout=timeout)
+        ]
+        return all(results)
+
+    @traced()
+    def wait_for_selector(self, selector, by=By.CSS_SELECTOR, visible=True, timeout=None):
+        """Wait for an element matching selector to exist (and be visible); returns it"""
+        def found(driver):
+            try:
+                for element in driver.find_elements(by, selector):
+                    if not visible or element.is_displayed():
+                        return element
+            except WebDriverException:
+                pass
+            return False
+        return self._wait("selector_visible" if visible else "selector_present",
+                          found, timeout, detail=selector)
+
+    @traced()
+    def wait_for_any_selector(self, selectors, visible=True, timeout=None):
+        """Wait for the first visible element matching any CSS selector; returns (selector, element)"""
+        def found(driver):
+            for selector in selectors:
+                try:
+                    for element in driver.find_elements(By.CSS_SELECTOR, selector):
+                        if not visible or element.is_displayed():
+                            return selector, element
+                except WebDriverException:
+                    continue
+            return False
+        return self._wait("any_selector_visible", found, timeout,
+                          detail=", ".join(selectors)) or (None, None)
+
+    @traced()
+    def wait_for_dialog(self, timeout=None):
+        """Wait for a modal dialog to become visible; returns it"""
+        _, element = self.wait_for_any_selector(
+            ["[role='dialog']", "[aria-modal='true']", ".modal", "dialog[open]"], timeout=timeout)
+        return element
+
+    @traced()
+    def wait_for_alert_closed(self, timeout=None):
+        """Wait until no JavaScript alert is open"""
+        return self._wait("alert_closed", lambda driver: not self.alert_present(), timeout)
+
+    def total_wait_ms(self):
+        """Total time spent waiting across all recorded waits"""
+        return round(sum(entry["elapsed_ms"] for entry in self.timings), 1)
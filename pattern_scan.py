@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Pattern Scan - Single-pass multi-pattern matching
+Every registered literal is found in one pass over the text by one compiled
+regular expression, so adding patterns does not add passes over the page
+source or stylesheets
+"""
+
+import re
+
+class PatternScanner:
+    def __init__(self, patterns, case_sensitive=False):
+        """patterns: {name: literal}, or an iterable of literals named after themselves"""
+        if not isinstance(patterns, dict):
+            patterns = {literal: literal for literal in patterns}
+        self.names = list(patterns)
+        self.case_sensitive = case_sensitive
+        self.literals = [(name, self._fold(literal)) for name, literal in patterns.items()]
+
+        # One alternation of every literal, longest first; re scans for it in C
+        alternation = "|".join(re.escape(literal) for literal in
+                               sorted({literal for _, literal in self.literals}, key=len, reverse=True))
+        self.regex = re.compile(alternation)
+
+    def _fold(self, text):
+        return text if self.case_sensitive else text.lower()
+
+    def _feed(self, text, on_match):
+        """Report every hit in text; only hit offsets ever reach Python code"""
+        folded = self._fold(text)
+        search = self.regex.search
+        literals = self.literals
+        match = search(folded)
+        while match:
+            offset = match.start()
+            # Several literals may start at the same offset (e.g. "fire" and "firebase")
+            for name, literal in literals:
+                if folded.startswith(literal, offset):
+                    on_match(name, offset)
+            # Resuming one character later rather than after the match keeps overlapping hits
+            match = search(folded, offset + 1)
+
+    def scan(self, text):
+        """Start offsets of every (possibly overlapping) hit, per pattern name"""
+        hits = {name: [] for name in self.names}
+        self._feed(text or "", lambda name, offset: hits[name].append(offset))
+        return hits
+
+    def scan_chunks(self, chunks):
+        """Hits across separate strings (e.g. CSS rules) as (chunk index, offset) pairs
+
+        Matching restarts at each chunk, so a hit never spans two of them.
+        """
+        hits = {name: [] for name in self.names}
+        for chunk_index, chunk in enumerate(chunks):
+            self._feed(chunk or "", lambda name, offset: hits[name].append((chunk_index, offset)))
+        return hits
+
+def summarize_hits(hits, text=None, limit=5):
+    """Per-pattern hit counts plus the first few locations (with line numbers when text is given)"""
+    summary = {}
+    for name, locations in hits.items():
+        first = locations[:limit]
+        if text is not None:
+            first = [{"offset": offset, "line": text.count("\n", 0, offset) + 1} for offset in first]
+        summary[name] = {"count": len(locations), "locations": first}
+    return summary
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Probe Cache - Skip full browser probes of deployments that have not changed
+A cheap HEAD (or GET) request identifies the deployment; when the identity
+matches an unexpired entry, the previous results and screenshots are reused
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import urllib.request
+
+USER_AGENT = "Mozilla/5.0 (deployment-probe-cache)"
+# Headers that name the deployment itself. x-vercel-id is not one of them: it
+# identifies the request (edge region + request id) and changes on every call.
+DEPLOYMENT_ID_HEADERS = ("x-deployment-id", "x-vercel-deployment-url")
+# Next.js writes its build id into every page's asset paths
+NEXT_BUILD_ID = re.compile(r"/_next/static/([\w-]+)/_(?:buildManifest|ssgManifest)\.js")
+
+def _request(url, method, timeout):
+    """Perform a request; returns (lowercased headers, body bytes)"""
+    request = urllib.request.Request(url, method=method, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        body = response.read() if method == "GET" else b""
+    return headers, body
+
+def deployment_identity(url, timeout=10):
+    """Cheapest available identity of the deployment serving url"""
+    try:
+        headers, _ = _request(url, "HEAD", timeout)
+    except Exception:
+        # Some hosts reject HEAD; the GET below answers everything
+        headers = {}
+    for name in DEPLOYMENT_ID_HEADERS:
+        if headers.get(name):
+            return f"{name}:{headers[name]}"
+    if headers.get("etag") and not headers["etag"].startswith("W/"):
+        return f"etag:{headers['etag']}"
+
+    headers, body = _request(url, "GET", timeout)
+    match = NEXT_BUILD_ID.search(body.decode("utf-8", errors="replace"))
+    if match:
+        return f"next-build:{match.group(1)}"
+    return f"sha256:{hashlib.sha256(body).hexdigest()}"
+
+class ProbeCache:
+    def __init__(self, path, max_age_s=3600, max_entries=200):
+        self.path = path
+        self.max_age_s = max_age_s
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0}
+        self.stored = set()
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(url, checks, tier):
+        """Cache key: the same URL probed with different checks is a different entry"""
+        return f"{tier}|{url}|{','.join(sorted(checks))}"
+
+    def get(self, key, identity):
+        """Cached result for key if it was stored for this identity and has not expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if (entry and entry["identity"] == identity
+                    and time.time() - entry["stored_at"] <= self.max_age_s):
+                self.stats["hits"] += 1
+                return entry
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, identity, result):
+        """Store a fresh result, evicting the oldest entries beyond max_entries"""
+        with self.lock:
+            self.entries[key] = {"identity": identity, "stored_at": time.time(), "result": result}
+            self.stored.add(key)
+            self.stats["stores"] += 1
+            self._save()
+
+    def _save(self):
+        """Merge this process's entries into the file and write it atomically"""
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        # Workers on one host share the file; keep whichever side stored a key last
+        for key in self.stored:
+            if key not in entries or entries[key]["stored_at"] <= self.entries[key]["stored_at"]:
+                entries[key] = self.entries[key]
+        if len(entries) > self.max_entries:
+            oldest = sorted(entries, key=lambda k: entries[k]["stored_at"])
+            for stale in oldest[:len(entries) - self.max_entries]:
+                del entries[stale]
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, default=str)
+        os.replace(tmp_path, self.path)
+        self.entries = entries
+        self.stored.intersection_update(entries)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Probe Matrix - Config-driven domains x pages x checks
+Expands a JSON config into per-page probe jobs and runs them on a scheduler
+with a global concurrency limit and a per-host limit
+
+Example config:
+    {
+        "baseline": "lbtr.shop",
+        "domains": {
+            "lbtr.shop": "https://lbtr.shop",
+            "urban-reel.vercel.app": "https://urban-reel.vercel.app",
+            "preview-abc123": {"url": "https://urban-reel-abc123.vercel.app", "pages": ["/"]}
+        },
+        "pages": ["/", "/admin"],
+        "checks": ["urban_directory_title", "admin_access", "performance"],
+        "concurrency": {"global": 4, "per_host": 1},
+        "budgets": {"js": 400},
+        "monitor": {"interval_s": 300, "jitter": 0.1, "browsers": 2}
+    }
+
+A domain entry may also set its own "interval_s" for monitor_daemon.py.
+"""
+
+import json
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PAGES = ["/", "/admin"]
+DEFAULT_CONCURRENCY = {"global": 4, "per_host": 1}
+# Checks answered on pages other than "/"; any other page gets a screenshot and its waterfall
+PAGE_CHECKS = {
+    "/admin": {"admin_access", "modern_checkboxes", "network"}
+}
+SUBPAGE_CHECKS = {"network"}
+
+def load_config(path):
+    """Read a matrix config and fill in the defaults"""
+    with open(path) as f:
+        config = json.load(f)
+
+    domains = {}
+    for name, spec in config["domains"].items():
+        if isinstance(spec, str):
+            spec = {"url": spec}
+        domains[name] = dict(spec, url=spec["url"].rstrip("/"),
+                             pages=spec.get("pages", config.get("pages", DEFAULT_PAGES)))
+    if not domains:
+        raise ValueError(f"{path}: no domains configured")
+
+    baseline = config.get("baseline") or next(iter(domains))
+    if baseline not in domains:
+        raise ValueError(f"{path}: baseline {baseline!r} is not one of the configured domains")
+
+    concurrency = dict(DEFAULT_CONCURRENCY)
+    concurrency.update(config.get("concurrency", {}))
+    return {
+        "domains": domains,
+        "baseline": baseline,
+        "checks": config.get("checks"),
+        "concurrency": concurrency,
+        # Budgets are written in KB like the --budget flag
+        "budgets": {category: int(kb * 1024) for category, kb in config.get("budgets", {}).items()},
+        "monitor": config.get("monitor", {})
+    }
+
+def page_checks(page, checks, pages):
+    """The subset of checks a page job runs"""
+    if page == "/":
+        if "/admin" in pages:
+            # The /admin job opens the form itself
+            return set(checks) - {"modern_checkboxes"}
+        # Without an /admin job the home job follows the admin link, as run_tests does
+        return set(checks)
+    return set(checks) & PAGE_CHECKS.get(page, SUBPAGE_CHECKS)
+
+def expand_jobs(config, checks):
+    """One job per (domain, page), in config order"""
+    jobs = []
+    for domain_name, spec in config["domains"].items():
+        for page in spec["pages"]:
+            jobs.append({
+                "domain": domain_name,
+                "url": spec["url"],
+                "page": page,
+                "checks": page_checks(page, checks, spec["pages"]),
+                "follow_admin": "/admin" not in spec["pages"],
+                "host": urlparse(spec["url"]).hostname
+            })
+    return jobs
+
+def merge_page_results(domain_results, page_results):
+    """Fold one page job's results into the domain's combined results"""
+    for key, value in page_results.items():
+        if key in ("features", "network", "pages"):
+            domain_results.setdefault(key, {}).update(value)
+        elif key in ("screenshots", "console_errors"):
+            domain_results.setdefault(key, []).extend(value)
+        else:
+            domain_results.setdefault(key, value)
+
+class HostScheduler:
+    def __init__(self, max_workers=4, per_host=1):
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, per_host)
+
+    def run(self, jobs, fn):
+        """Run fn(job) for every job; returns the results in job order"""
+        pending = list(range(len(jobs)))
+        futures = [None] * len(jobs)
+        busy_hosts = {}
+        state = {"active": 0}
+        changed = threading.Condition()
+
+        def finished(host, _future):
+            with changed:
+                busy_hosts[host] -= 1
+                state["active"] -= 1
+                changed.notify()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            with changed:
+                while pending or state["active"]:
+                    # Start every queued job whose host has a free slot, oldest first
+                    for index in list(pending):
+                        if state["active"] >= self.max_workers:
+                            break
+                        host = jobs[index]["host"]
+                        if busy_hosts.get(host, 0) >= self.per_host:
+                            continue
+                        pending.remove(index)
+                        busy_hosts[host] = busy_hosts.get(host, 0) + 1
+                        state["active"] += 1
+                        futures[index] = pool.submit(fn, jobs[index])
+                        futures[index].add_done_callback(lambda future, host=host: finished(host, future))
+                    # A job that finished instantly already released its slot
+                    if state["active"]:
+                        changed.wait()
+
+        return [future.result() for future in futures]
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Probe Queue - Distributed execution of a probe matrix on a shared SQLite file
+A submitted run becomes one queued job per (domain, page). Worker processes,
+on this machine or any other that sees the file, claim jobs under a lease
+they renew by heartbeat; a job whose worker stops heartbeating goes back on
+the queue. The coordinator waits for every job and assembles the usual
+results document and comparison.
+
+    probe_queue.py submit --config matrix.json      # prints the run id
+    probe_queue.py work                             # one per process / node
+    probe_queue.py collect RUN_ID                   # results + comparison
+
+Several nodes need the file on a filesystem with working POSIX locks, and
+the screenshot store (OUTPUT_DIR/screenshots) shared for visual diffs.
+"""
+
+import os
+import json
+import time
+import zlib
+import socket
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from deployment_test import DeploymentTester, ALL_CHECKS
+from chrome_driver import BACKENDS
+from probe_cache import ProbeCache
+from results_stream import ResultsStream
+import probe_matrix
+
+OUTPUT_DIR = "/Users/paulbridges/Downloads/try again"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    matrix TEXT NOT NULL,
+    checks TEXT NOT NULL,
+    collected_at TEXT
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    position INTEGER NOT NULL,
+    job TEXT NOT NULL,
+    host TEXT,
+    shard INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_expires REAL,
+    started_at REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS workers (
+    id TEXT PRIMARY KEY,
+    hostname TEXT,
+    pid INTEGER,
+    started_at REAL,
+    heartbeat_at REAL,
+    jobs_done INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, run_id, position);
+"""
+
+def shard_of(host, shards):
+    """Stable shard of a host, so a worker keeps hitting hosts it has warm caches for"""
+    return zlib.crc32((host or "").encode("utf-8")) % max(1, shards)
+
+class ProbeQueue:
+    def __init__(self, path, lease_s=120, max_attempts=3):
+        self.path = path
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        # Transactions are explicit: a claim must read and update under one write lock
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        # Rollback journal rather than WAL: WAL's shared memory does not work across machines
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def submit(self, matrix, checks, shards=1):
+        """Queue every (domain, page) job of a matrix; returns the run id"""
+        jobs = probe_matrix.expand_jobs(matrix, checks)
+        with self.transaction() as conn:
+            run_id = conn.execute("INSERT INTO runs (created_at, matrix, checks) VALUES (?, ?, ?)",
+                                  (datetime.now().isoformat(), json.dumps(matrix),
+                                   json.dumps(sorted(checks)))).lastrowid
+            conn.executemany(
+                "INSERT INTO jobs (run_id, position, job, host, shard) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, position, json.dumps(dict(job, checks=sorted(job["checks"]))),
+                  job["host"], shard_of(job["host"], shards))
+                 for position, job in enumerate(jobs)])
+        return run_id
+
+    def run(self, run_id):
+        """A run's matrix and checks"""
+        row = self.conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"No such run: {run_id}")
+        return {"id": row["id"], "created_at": row["created_at"], "matrix": json.loads(row["matrix"]),
+                "checks": json.loads(row["checks"]), "collected_at": row["collected_at"]}
+
+    def register(self, worker_id):
+        """Record a worker; also serves as its first heartbeat"""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO workers (id, hostname, pid, started_at, heartbeat_at) "
+                         "VALUES (?, ?, ?, ?, ?)", (worker_id, socket.gethostname(), os.getpid(), now, now))
+
+    def _requeue_expired(self, conn, now):
+        """Jobs whose lease ran out go back on the queue, or fail after max_attempts"""
+        return conn.execute("""
+            UPDATE jobs
+            SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                error = 'lease expired: worker ' || worker || ' stopped heartbeating',
+                worker = NULL, lease_expires = NULL
+            WHERE state = 'running' AND lease_expires < ?
+        """, (self.max_attempts, now)).rowcount
+
+    def requeue_expired(self):
+        """Requeue the jobs of dead workers; returns how many"""
+        with self.transaction() as conn:
+            return self._requeue_expired(conn, time.time())
+
+    def claim(self, worker_id, run_id=None, shard=None):
+        """Lease the next runnable job, or None
+
+        Jobs of the worker's shard come first; others are taken when it has
+        none left. A host never has more running jobs, across every worker,
+        than its run's per_host concurrency.
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            self._requeue_expired(conn, now)
+            busy = {(row["run_id"], row["host"]): row["running"] for row in conn.execute(
+                "SELECT run_id, host, COUNT(*) AS running FROM jobs WHERE state = 'running' GROUP BY 1, 2")}
+            candidates = conn.execute("""
+                SELECT jobs.id, jobs.run_id, jobs.job, jobs.host, jobs.attempts, runs.matrix
+                FROM jobs JOIN runs ON runs.id = jobs.run_id
+                WHERE jobs.state = 'queued' AND (? IS NULL OR jobs.run_id = ?)
+                ORDER BY jobs.run_id, jobs.shard = ? DESC, jobs.position
+            """, (run_id, run_id, shard))
+            per_host = {}
+            for row in candidates:
+                if row["run_id"] not in per_host:
+                    per_host[row["run_id"]] = json.loads(row["matrix"])["concurrency"]["per_host"]
+                if busy.get((row["run_id"], row["host"]), 0) >= per_host[row["run_id"]]:
+                    continue
+                conn.execute("UPDATE jobs SET state = 'running', worker = ?, attempts = attempts + 1, "
+                             "lease_expires = ?, started_at = ? WHERE id = ?",
+                             (worker_id, now + self.lease_s, now, row["id"]))
+                conn.execute("UPDATE workers SET heartbeat_at = ? WHERE id = ?", (now, worker_id))
+                job = json.loads(row["job"])
+                job["checks"] = set(job["checks"])
+                return {"id": row["id"], "run_id": row["run_id"], "attempt": row["attempts"] + 1, "job": job}
+        return None
+
+    def heartbeat(self, worker_id, job_id=None):
+        """Renew a worker's lease on job_id; False if the job was taken from it"""
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute("UPDATE workers SET heartbeat_at = ? WHERE id = ?", (now, worker_id))
+            if job_id is None:
+                return True
+            return conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? "
+                                "AND state = 'running'", (now + self.lease_s, job_id, worker_id)).rowcount == 1
+
+    def complete(self, worker_id, job_id, result):
+        """Store a job's result; ignored (False) if its lease was lost meanwhile"""
+        with self.transaction() as conn:
+            done = conn.execute("UPDATE jobs SET state = 'done', result = ?, error = NULL, finished_at = ?, "
+                                "lease_expires = NULL WHERE id = ? AND worker = ? AND state = 'running'",
+                                (json.dumps(result, default=str), time.time(), job_id, worker_id)).rowcount
+            if done:
+                conn.execute("UPDATE workers SET jobs_done = jobs_done + 1 WHERE id = ?", (worker_id,))
+        return bool(done)
+
+    def fail(self, worker_id, job_id, error):
+        """Give a job back after an error; it fails for good after max_attempts"""
+        with self.transaction() as conn:
+            conn.execute("""
+                UPDATE jobs
+                SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+                    error = ?, worker = NULL, lease_expires = NULL, finished_at = ?
+                WHERE id = ? AND worker = ? AND state = 'running'
+            """, (self.max_attempts, error, time.time(), job_id, worker_id))
+
+    def progress(self, run_id=None):
+        """Job counts per state, for one run or all"""
+        rows = self.conn.execute("SELECT state, COUNT(*) AS count FROM jobs WHERE ? IS NULL OR run_id = ? "
+                                 "GROUP BY state", (run_id, run_id))
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({row["state"]: row["count"] for row in rows})
+        return counts
+
+    def workers(self):
+        """Every registered worker, most recent heartbeat first"""
+        return [dict(row) for row in self.conn.execute("SELECT * FROM workers ORDER BY heartbeat_at DESC")]
+
+    def results(self, run_id):
+        """Jobs and their results in submission order; failed jobs carry their error"""
+        jobs, results = [], []
+        for row in self.conn.execute("SELECT * FROM jobs WHERE run_id = ? ORDER BY position", (run_id,)):
+            job = json.loads(row["job"])
+            jobs.append(dict(job, checks=set(job["checks"])))
+            if row["state"] == "done":
+                results.append(json.loads(row["result"]))
+                continue
+            error = f"job {row['state']} after {row['attempts']} attempts: {row['error']}"
+            # A lost sub-page leaves the domain's home page results intact
+            results.append({"accessible": False, "error": error} if job["page"] == "/"
+                           else {"pages": {job["page"]: {"error": error}}})
+        return jobs, results
+
+    def mark_collected(self, run_id):
+        with self.transaction() as conn:
+            conn.execute("UPDATE runs SET collected_at = ? WHERE id = ?", (datetime.now().isoformat(), run_id))
+
+    def close(self):
+        """Close the database"""
+        self.conn.close()
+
+class ProbeWorker:
+    def __init__(self, path, run_id=None, shard=None, backend="selenium", cache=None, lease_s=120,
+                 poll_s=2, exit_when_idle=True):
+        self.path = path
+        self.queue = ProbeQueue(path, lease_s=lease_s)
+        self.run_id = run_id
+        self.shard = shard
+        self.backend = backend
+        self.cache = cache
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self.exit_when_idle = exit_when_idle
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        # One tester per run, kept while jobs of that run keep coming so Chrome stays warm
+        self.tester = None
+        self.tester_run = None
+
+    def log(self, message, details=""):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        print(f"[{timestamp}] {self.worker_id} {message}" + (f" - {details}" if details else ""))
+
+    def tester_for(self, run_id):
+        """The DeploymentTester configured with run_id's checks and budgets"""
+        if self.tester_run != run_id:
+            if self.tester:
+                self.tester.cleanup()
+            run = self.queue.run(run_id)
+            self.tester = DeploymentTester(checks=run["checks"], budgets=run["matrix"]["budgets"],
+                                           cache=self.cache, backend=self.backend, launch_browser=False)
+            self.tester_run = run_id
+        return self.tester
+
+    def heartbeat(self, job_id, stop):
+        """Renew the lease until stop is set; runs on its own thread and connection"""
+        queue = ProbeQueue(self.path, lease_s=self.lease_s)
+        try:
+            while not stop.wait(self.lease_s / 3):
+                if not queue.heartbeat(self.worker_id, job_id):
+                    self.log("⚠️  Lease lost, the job was handed to another worker", f"job {job_id}")
+                    return
+        finally:
+            queue.close()
+
+    def execute(self, claimed):
+        """Probe one claimed job and report its result"""
+        job = claimed["job"]
+        self.log(f"🔧 Probing {job['domain']}{job['page']}", f"job {claimed['id']}, attempt {claimed['attempt']}")
+        stop = threading.Event()
+        beat = threading.Thread(target=self.heartbeat, args=(claimed["id"], stop), daemon=True)
+        beat.start()
+        try:
+            tester = self.tester_for(claimed["run_id"])
+            result = tester.probe_page(job)
+            # Screenshots must be in the store before anyone reads the result
+            errors = tester.screenshots.wait()
+            if errors:
+                result["screenshot_errors"] = errors
+        except Exception as e:
+            self.queue.fail(self.worker_id, claimed["id"], str(e))
+            self.log(f"✗ {job['domain']}{job['page']} failed", str(e))
+            return
+        finally:
+            stop.set()
+            beat.join()
+        if self.queue.complete(self.worker_id, claimed["id"], result):
+            self.log(f"✓ {job['domain']}{job['page']} done")
+
+    def run(self):
+        """Claim and probe jobs until none are left (or forever without exit_when_idle)"""
+        self.queue.register(self.worker_id)
+        self.log("👷 Worker started", f"queue {self.path}, shard {self.shard}")
+        try:
+            while True:
+                claimed = self.queue.claim(self.worker_id, self.run_id, self.shard)
+                if claimed:
+                    self.execute(claimed)
+                    continue
+                progress = self.queue.progress(self.run_id)
+                # Running jobs may still be requeued if their worker dies, so stay around for them
+                if self.exit_when_idle and not progress["queued"] and not progress["running"]:
+                    break
+                self.queue.heartbeat(self.worker_id)
+                time.sleep(self.poll_s)
+        finally:
+            if self.tester:
+                self.tester.cleanup()
+            self.queue.close()
+            self.log("👷 Worker stopped")
+
+def collect(path, run_id, poll_s=5):
+    """Wait for every job of run_id, then write the results document and comparison"""
+    queue = ProbeQueue(path)
+    try:
+        run = queue.run(run_id)
+        while True:
+            queue.requeue_expired()
+            progress = queue.progress(run_id)
+            if not progress["queued"] and not progress["running"]:
+                break
+            print(f"⏳ Run {run_id}: {progress['done']} done, {progress['running']} running, "
+                  f"{progress['queued']} queued, {progress['failed']} failed")
+            time.sleep(poll_s)
+        jobs, page_results = queue.results(run_id)
+
+        matrix = run["matrix"]
+        tester = DeploymentTester(checks=run["checks"], budgets=matrix["budgets"],
+                                  baseline=matrix["baseline"], launch_browser=False)
+        try:
+            stream_path = os.path.join(OUTPUT_DIR, "deployment_test_results.jsonl")
+            tester.stream = ResultsStream(stream_path)
+            tester.stream.run_start(tester.results)
+            # Workers probe without a stream, so features and screenshots go out with each domain
+            tester.merge_matrix(matrix, jobs, page_results, streamed=())
+            tester.finish_run(stream_path)
+        finally:
+            tester.cleanup()
+        queue.mark_collected(run_id)
+        return tester.results
+    finally:
+        queue.close()
+
+def main():
+    """Submit, work on, collect and inspect distributed probe runs"""
+    parser = argparse.ArgumentParser(description="Run a probe matrix across many worker processes")
+    parser.add_argument("--db", default=os.path.join(OUTPUT_DIR, "probe_queue.sqlite"),
+                        help="path to the shared SQLite queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit_cmd = commands.add_parser("submit", help="queue every job of a probe matrix config")
+    submit_cmd.add_argument("--config", required=True, help="probe matrix JSON (see probe_matrix.py)")
+    submit_cmd.add_argument("--checks", help="comma-separated checks (default: the config's, else all)")
+    submit_cmd.add_argument("--shards", type=int, default=1,
+                            help="host shards; workers started with --shard prefer their own")
+
+    work_cmd = commands.add_parser("work", help="claim and probe jobs")
+    work_cmd.add_argument("--run", type=int, help="only take jobs of this run")
+    work_cmd.add_argument("--shard", type=int, help="shard whose jobs this worker takes first")
+    work_cmd.add_argument("--backend", choices=BACKENDS, default="selenium")
+    work_cmd.add_argument("--lease", type=float, default=120,
+                          help="seconds without a heartbeat before a job is requeued")
+    work_cmd.add_argument("--probe-cache", action="store_true",
+                          help="reuse the previous results of deployments that have not changed")
+    work_cmd.add_argument("--forever", action="store_true", help="keep polling once the queue is empty")
+
+    collect_cmd = commands.add_parser("collect", help="wait for a run, then write results and comparison")
+    collect_cmd.add_argument("run_id", type=int)
+
+    status_cmd = commands.add_parser("status", help="job counts and workers")
+    status_cmd.add_argument("run_id", type=int, nargs="?")
+
+    args = parser.parse_args()
+    if args.command == "submit":
+        matrix = probe_matrix.load_config(args.config)
+        checks = args.checks.split(",") if args.checks else matrix["checks"] or sorted(ALL_CHECKS)
+        unknown = set(checks) - ALL_CHECKS
+        if unknown:
+            parser.error(f"unknown checks: {sorted(unknown)}")
+        queue = ProbeQueue(args.db)
+        try:
+            run_id = queue.submit(matrix, checks, args.shards)
+            print(f"📋 Run {run_id}: {queue.progress(run_id)['queued']} jobs queued")
+        finally:
+            queue.close()
+    elif args.command == "work":
+        cache = (ProbeCache(os.path.join(OUTPUT_DIR, "probe_cache.json"))
+                 if args.probe_cache else None)
+        ProbeWorker(args.db, run_id=args.run, shard=args.shard, backend=args.backend, cache=cache,
+                    lease_s=args.lease, exit_when_idle=not args.forever).run()
+    elif args.command == "collect":
+        collect(args.db, args.run_id)
+    else:
+        queue = ProbeQueue(args.db)
+        try:
+            print(json.dumps({"jobs": queue.progress(args.run_id), "workers": queue.workers()}, indent=2))
+        finally:
+            queue.close()
+
+if __name__ == "__main__":
+    main()
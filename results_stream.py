@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Results Stream - Crash-safe JSON Lines results writer
+Each record is flushed as soon as it is written; the classic results JSON
+layout is rebuilt from the stream on demand
+"""
+
+import os
+import sys
+import json
+import threading
+from datetime import datetime
+
+class ResultsStream:
+    def __init__(self, path, durable=False):
+        self.path = path
+        self.durable = durable
+        self.lock = threading.Lock()
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, record_type, **fields):
+        """Append one record and flush it to disk"""
+        record = {"type": record_type, "at": datetime.now().isoformat()}
+        record.update(fields)
+        line = json.dumps(record, default=str) + "\n"
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(line)
+            self.file.flush()
+            if self.durable:
+                os.fsync(self.file.fileno())
+
+    def run_start(self, skeleton):
+        """Record the top-level results layout the run starts from"""
+        self.write("run_start", skeleton=skeleton)
+
+    def domain_start(self, domain, fields):
+        """Record that a domain probe began, with its initial fields"""
+        self.write("domain_start", domain=domain, fields=fields)
+
+    def feature(self, domain, feature, value):
+        """Record one finished feature check"""
+        self.write("feature", domain=domain, feature=feature, value=value)
+
+    def screenshot(self, domain, screenshot):
+        """Record one screenshot reference"""
+        self.write("screenshot", domain=domain, screenshot=screenshot)
+
+    def domain_end(self, domain, data, streamed=("features", "screenshots")):
+        """Record the per-domain fields that were not already streamed"""
+        rest = {key: value for key, value in data.items() if key not in streamed}
+        self.write("domain", domain=domain, fields=rest)
+
+    def section(self, key, value):
+        """Record a top-level section such as comparison or recommendations"""
+        self.write("section", key=key, value=value)
+
+    def close(self):
+        """Write the end-of-run marker and close the file"""
+        self.write("run_end")
+        with self.lock:
+            self.file.close()
+
+def read_records(path):
+    """Yield records from a stream, ignoring a torn final line left by a crash"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def rebuild_results(path):
+    """Rebuild the classic results document from a JSON Lines stream"""
+    results = {"domains": {}}
+    complete = False
+
+    for record in read_records(path):
+        kind = record["type"]
+        if kind == "run_start":
+            results = dict(record["skeleton"])
+            results["domains"] = dict(results.get("domains", {}))
+        elif kind == "domain_start":
+            domain = results["domains"].setdefault(record["domain"], {})
+            domain.update(record["fields"])
+            domain["incomplete"] = True
+        elif kind == "feature":
+            domain = results["domains"].setdefault(record["domain"], {"features": {}, "screenshots": []})
+            domain.setdefault("features", {})[record["feature"]] = record["value"]
+        elif kind == "screenshot":
+            domain = results["domains"].setdefault(record["domain"], {"features": {}, "screenshots": []})
+            domain.setdefault("screenshots", []).append(record["screenshot"])
+        elif kind == "domain":
+            domain = results["domains"].setdefault(record["domain"], {})
+            domain.update(record["fields"])
+            domain.pop("incomplete", None)
+        elif kind == "section":
+            results[record["key"]] = record["value"]
+        elif kind == "run_end":
+            complete = True
+
+    if not complete:
+        results["incomplete"] = True
+    return results
+
+def write_results(stream_path, json_path):
+    """Rebuild the results document and save it as indented JSON"""
+    results = rebuild_results(stream_path)
+    with open(json_path, "w") as f:
+        json.dump(results, f, indent=2)
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: results_stream.py RESULTS.jsonl RESULTS.json")
+        sys.exit(2)
+    rebuilt = write_results(sys.argv[1], sys.argv[2])
+    print(f"Rebuilt {len(rebuilt['domains'])} domains into {sys.argv[2]}"
+          + (" (run did not finish)" if rebuilt.get("incomplete") else ""))
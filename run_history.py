@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Run History - SQLite index of every deployment and gradient run
+Answers trend questions such as "when did has_gradient flip on lbtr.shop"
+or "how has load time drifted this week"
+"""
+
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS domains (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    domain TEXT NOT NULL,
+    url TEXT,
+    accessible INTEGER,
+    page_title TEXT,
+    probe_tier TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, domain)
+);
+CREATE TABLE IF NOT EXISTS features (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    domain TEXT NOT NULL,
+    path TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (run_id, domain, path)
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    domain TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value_ms REAL,
+    PRIMARY KEY (run_id, domain, metric)
+);
+CREATE TABLE IF NOT EXISTS console_errors (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    domain TEXT NOT NULL,
+    level TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_kind_started ON runs(kind, started_at);
+CREATE INDEX IF NOT EXISTS features_series ON features(domain, path, run_id);
+CREATE INDEX IF NOT EXISTS timings_series ON timings(domain, metric, run_id);
+CREATE INDEX IF NOT EXISTS console_errors_run ON console_errors(run_id, domain);
+"""
+
+# Per-domain keys that are stored in their own tables rather than as features
+DOMAIN_COLUMNS = ("url", "accessible", "page_title", "probe_tier", "error")
+SKIPPED_KEYS = set(DOMAIN_COLUMNS) | {"screenshots", "console_errors", "wait_timings"}
+
+def flatten(value, prefix=""):
+    """Flatten nested dicts into dotted paths; lists and scalars become leaves"""
+    if isinstance(value, dict) and value:
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else key)
+    elif prefix:
+        yield prefix, value
+
+class RunHistory:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def record_run(self, kind, results, timestamp_key):
+        """Index one results document; returns the new run id"""
+        started_at = results.get(timestamp_key) or datetime.now().isoformat()
+        with self.conn:
+            run_id = self.conn.execute("INSERT INTO runs (kind, started_at) VALUES (?, ?)",
+                                       (kind, started_at)).lastrowid
+            for domain, data in results.get("domains", {}).items():
+                self._record_domain(run_id, domain, data)
+        return run_id
+
+    def _record_domain(self, run_id, domain, data):
+        """Insert one domain's row, flattened features, timings and console errors"""
+        self.conn.execute(
+            "INSERT INTO domains (run_id, domain, url, accessible, page_title, probe_tier, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run_id, domain, data.get("url"), data.get("accessible"), data.get("page_title"),
+             data.get("probe_tier"), data.get("error")))
+
+        features = []
+        timings = []
+        for key, value in data.items():
+            if key in SKIPPED_KEYS:
+                continue
+            for path, leaf in flatten(value, key):
+                features.append((run_id, domain, path, json.dumps(leaf, default=str)))
+                if path.endswith("_ms") and isinstance(leaf, (int, float)):
+                    timings.append((run_id, domain, path, leaf))
+
+        # Readiness waits: per-signal totals plus the overall wait
+        wait_totals = {}
+        for timing in data.get("wait_timings", []):
+            metric = f"wait.{timing['signal']}"
+            wait_totals[metric] = wait_totals.get(metric, 0) + timing["elapsed_ms"]
+        if wait_totals:
+            wait_totals["wait.total"] = sum(wait_totals.values())
+        timings.extend((run_id, domain, metric, value) for metric, value in wait_totals.items())
+
+        self.conn.executemany("INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?)", features)
+        self.conn.executemany("INSERT OR REPLACE INTO timings VALUES (?, ?, ?, ?)", timings)
+        self.conn.executemany(
+            "INSERT INTO console_errors VALUES (?, ?, ?, ?)",
+            [(run_id, domain, error.get("level"), error.get("message"))
+             for error in data.get("console_errors", []) if isinstance(error, dict)])
+
+    def record_deployment_run(self, results):
+        """Index a DeploymentTester results document"""
+        return self.record_run("deployment", results, "test_timestamp")
+
+    def record_gradient_run(self, results):
+        """Index a GradientAnalyzer results document"""
+        return self.record_run("gradient", results, "timestamp")
+
+    def runs(self, kind=None, limit=20):
+        """Most recent runs, newest first"""
+        query = "SELECT id, kind, started_at FROM runs"
+        params = []
+        if kind:
+            query += " WHERE kind = ?"
+            params.append(kind)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def series(self, domain, metric, since=None):
+        """Time series of a timing metric or feature path for one domain"""
+        params = [domain, metric]
+        since_clause = ""
+        if since:
+            since_clause = " AND r.started_at >= ?"
+            params.append(since)
+        rows = self.conn.execute(
+            "SELECT r.id AS run_id, r.started_at, t.value_ms AS value FROM timings t "
+            "JOIN runs r ON r.id = t.run_id WHERE t.domain = ? AND t.metric = ?"
+            + since_clause + " ORDER BY r.id", params).fetchall()
+        if rows:
+            return [dict(row) for row in rows]
+        rows = self.conn.execute(
+            "SELECT r.id AS run_id, r.started_at, f.value FROM features f "
+            "JOIN runs r ON r.id = f.run_id WHERE f.domain = ? AND f.path = ?"
+            + since_clause + " ORDER BY r.id", params).fetchall()
+        return [dict(row, value=json.loads(row["value"])) for row in rows]
+
+    def flips(self, domain, path):
+        """Runs where a feature value changed from the previous run for that domain"""
+        rows = self.conn.execute("""
+            SELECT run_id, started_at, previous, value FROM (
+                SELECT f.run_id, r.started_at, f.value,
+                       LAG(f.value) OVER (ORDER BY f.run_id) AS previous
+                FROM features f JOIN runs r ON r.id = f.run_id
+                WHERE f.domain = ? AND f.path = ?
+            ) WHERE previous IS NOT NULL AND previous != value
+            ORDER BY run_id
+        """, (domain, path)).fetchall()
+        return [dict(row, previous=json.loads(row["previous"]), value=json.loads(row["value"]))
+                for row in rows]
+
+    def diff(self, run_a=None, run_b=None, kind=None):
+        """Feature paths whose values differ between two runs (default: the last two)"""
+        if run_a is None or run_b is None:
+            recent = self.runs(kind=kind, limit=2)
+            if len(recent) < 2:
+                return []
+            run_b, run_a = recent[0]["id"], recent[1]["id"]
+        # LEFT JOIN both ways instead of FULL OUTER JOIN, which needs SQLite 3.39+
+        rows = self.conn.execute("""
+            SELECT a.domain, a.path, a.value AS before, b.value AS after
+            FROM features a LEFT JOIN features b
+              ON b.run_id = ? AND b.domain = a.domain AND b.path = a.path
+            WHERE a.run_id = ? AND a.value IS NOT b.value
+            UNION ALL
+            SELECT b.domain, b.path, NULL AS before, b.value AS after
+            FROM features b LEFT JOIN features a
+              ON a.run_id = ? AND a.domain = b.domain AND a.path = b.path
+            WHERE b.run_id = ? AND a.path IS NULL
+            ORDER BY 1, 2
+        """, (run_b, run_a, run_a, run_b)).fetchall()
+        return [{"domain": row["domain"], "path": row["path"],
+                 "before": json.loads(row["before"]) if row["before"] is not None else None,
+                 "after": json.loads(row["after"]) if row["after"] is not None else None}
+                for row in rows]
+
+    def close(self):
+        """Close the database"""
+        self.conn.close()
+
+def main():
+    """Query CLI for the run history"""
+    parser = argparse.ArgumentParser(description="Query deployment run history")
+    parser.add_argument("--db", default="/Users/paulbridges/Downloads/try again/run_history.sqlite",
+                        help="path to the SQLite history")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs_cmd = commands.add_parser("runs", help="list recent runs")
+    runs_cmd.add_argument("--kind", choices=["deployment", "gradient"])
+    runs_cmd.add_argument("--limit", type=int, default=20)
+
+    series_cmd = commands.add_parser("series", help="time series of a metric or feature path")
+    series_cmd.add_argument("domain")
+    series_cmd.add_argument("metric", help="e.g. wait.total or features.urban_directory_title.found")
+    series_cmd.add_argument("--since", help="ISO timestamp lower bound")
+
+    flips_cmd = commands.add_parser("flips", help="runs where a feature value changed")
+    flips_cmd.add_argument("domain")
+    flips_cmd.add_argument("path", help="e.g. title_gradient.is_text_gradient")
+
+    diff_cmd = commands.add_parser("diff", help="feature deltas between two runs")
+    diff_cmd.add_argument("run_a", type=int, nargs="?")
+    diff_cmd.add_argument("run_b", type=int, nargs="?")
+    diff_cmd.add_argument("--kind", choices=["deployment", "gradient"])
+
+    import_cmd = commands.add_parser("import", help="index an existing results JSON file")
+    import_cmd.add_argument("kind", choices=["deployment", "gradient"])
+    import_cmd.add_argument("results_file")
+
+    args = parser.parse_args()
+    history = RunHistory(args.db)
+    try:
+        if args.command == "runs":
+            rows = history.runs(args.kind, args.limit)
+        elif args.command == "series":
+            rows = history.series(args.domain, args.metric, args.since)
+        elif args.command == "flips":
+            rows = history.flips(args.domain, args.path)
+        elif args.command == "diff":
+            rows = history.diff(args.run_a, args.run_b, args.kind)
+        else:
+            with open(args.results_file) as f:
+                results = json.load(f)
+            timestamp_key = "test_timestamp" if args.kind == "deployment" else "timestamp"
+            rows = [{"run_id": history.record_run(args.kind, results, timestamp_key)}]
+        for row in rows:
+            print(json.dumps(row, default=str))
+    finally:
+        history.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Screenshot Pipeline - Annotate and encode screenshots off the test thread
+Screenshots arrive as in-memory PNG bytes and are encoded into the
+screenshot store exactly once
+"""
+
+import io
+import threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+from tracing import traced
+
+@lru_cache(maxsize=1)
+def annotation_font():
+    """Load the annotation font once per process"""
+    try:
+        # Try to use a larger font
+        return ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 24)
+    except:
+        return ImageFont.load_default()
+
+@traced("annotate")
+def annotate_png(png_bytes, annotation):
+    """Draw an annotation banner onto PNG bytes; returns the image and the banner box"""
+    img = Image.open(io.BytesIO(png_bytes)).convert('RGBA')
+    font = annotation_font()
+
+    # Add semi-transparent background for text
+    draw = ImageDraw.Draw(img)
+    text_bbox = draw.textbbox((0, 0), annotation, font=font)
+    text_width = text_bbox[2] - text_bbox[0]
+    text_height = text_bbox[3] - text_bbox[1]
+
+    # Create overlay
+    overlay = Image.new('RGBA', img.size, (0, 0, 0, 0))
+    overlay_draw = ImageDraw.Draw(overlay)
+    box = (10, 10, text_width + 30, text_height + 30)
+    overlay_draw.rectangle(box, fill=(0, 0, 0, 180))
+
+    # Composite and add text
+    img = Image.alpha_composite(img, overlay)
+    draw = ImageDraw.Draw(img)
+    draw.text((20, 20), annotation, fill=(255, 255, 255), font=font)
+    return img.convert('RGB'), box
+
+class ScreenshotPipeline:
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="screenshot")
+        self.pending = []
+        self.lock = threading.Lock()
+
+    def submit_frame(self, png_bytes, store):
+        """Hash a frame now and queue its encoding into a ScreenshotStore; returns the hash"""
+        digest = store.content_hash(png_bytes)
+        future = self.executor.submit(store.put, png_bytes, digest)
+        with self.lock:
+            self.pending.append(future)
+        return digest
+
+    def wait(self):
+        """Block until every queued screenshot is written; returns write errors"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        errors = []
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(str(e))
+        return errors
+
+    def shutdown(self):
+        """Flush pending writes and stop the worker threads"""
+        errors = self.wait()
+        self.executor.shutdown(wait=True)
+        return errors
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Screenshot Store - Content-addressed, deduplicated screenshot storage
+Frames are keyed by the SHA-256 of the captured PNG, so identical frames are written once
+"""
+
+import io
+import os
+import hashlib
+import threading
+from PIL import Image
+
+from screenshot_pipeline import annotate_png
+from tracing import traced
+
+# Encoding name -> file suffix inside the store
+ENCODINGS = {
+    "webp": ".webp",            # lossless WebP of the full frame
+    "thumbnail": ".thumb.webp", # downscaled lossy WebP for reports
+    "png": ".png"               # full PNG exactly as captured
+}
+
+class ScreenshotStore:
+    def __init__(self, root, encodings=("webp", "thumbnail"), thumbnail_width=480,
+                 thumbnail_quality=70, webp_method=0):
+        unknown = [name for name in encodings if name not in ENCODINGS]
+        if unknown:
+            raise ValueError(f"Unknown screenshot encodings: {unknown}")
+        if not any(name in encodings for name in ("webp", "png")):
+            raise ValueError("Screenshot store needs a full-resolution encoding (webp or png)")
+        self.root = root
+        self.encodings = tuple(encodings)
+        self.thumbnail_width = thumbnail_width
+        self.thumbnail_quality = thumbnail_quality
+        self.webp_method = webp_method
+        self._lock = threading.Lock()
+        self._in_progress = {}
+        self.stats = {"frames": 0, "deduplicated": 0, "files_written": 0, "bytes_written": 0}
+
+    @staticmethod
+    def content_hash(png_bytes):
+        """Content address of a captured frame"""
+        return hashlib.sha256(png_bytes).hexdigest()
+
+    def path_for(self, digest, encoding):
+        """Location of one encoding of a frame, sharded by hash prefix"""
+        return os.path.join(self.root, digest[:2], digest + ENCODINGS[encoding])
+
+    def files_for(self, digest):
+        """Paths of every configured encoding of a frame"""
+        return {encoding: self.path_for(digest, encoding) for encoding in self.encodings}
+
+    def primary_path(self, digest):
+        """Full-resolution file used when the frame has to be decoded again"""
+        encoding = "png" if "png" in self.encodings else "webp"
+        return self.path_for(digest, encoding)
+
+    def _encode(self, img, png_bytes, encoding):
+        """Encode one frame in the requested format"""
+        if encoding == "png":
+            return png_bytes
+        buffer = io.BytesIO()
+        if encoding == "webp":
+            img.save(buffer, "WEBP", lossless=True, quality=0, method=self.webp_method)
+        else:
+            thumb = img.copy()
+            thumb.thumbnail((self.thumbnail_width, self.thumbnail_width * img.height // img.width))
+            thumb.save(buffer, "WEBP", quality=self.thumbnail_quality)
+        return buffer.getvalue()
+
+    def _write_atomic(self, path, data):
+        """Write via a temp file so readers never see a partial frame"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    @traced("encode")
+    def put(self, png_bytes, digest=None):
+        """Store a frame under its content hash, skipping encodings already on disk"""
+        digest = digest or self.content_hash(png_bytes)
+
+        # Only one thread encodes a given frame; others wait for it
+        with self._lock:
+            self.stats["frames"] += 1
+            event = self._in_progress.get(digest)
+            owner = event is None
+            if owner:
+                event = self._in_progress[digest] = threading.Event()
+        if not owner:
+            event.wait()
+
+        written = []
+        try:
+            missing = [encoding for encoding in self.encodings
+                       if not os.path.exists(self.path_for(digest, encoding))]
+            if missing:
+                img = Image.open(io.BytesIO(png_bytes)).convert('RGB')
+                for encoding in missing:
+                    size = self._write_atomic(self.path_for(digest, encoding),
+                                              self._encode(img, png_bytes, encoding))
+                    written.append(encoding)
+                    with self._lock:
+                        self.stats["files_written"] += 1
+                        self.stats["bytes_written"] += size
+        finally:
+            if owner:
+                with self._lock:
+                    del self._in_progress[digest]
+                event.set()
+
+        with self._lock:
+            if not written:
+                self.stats["deduplicated"] += 1
+        return {"hash": digest, "files": self.files_for(digest), "written": written}
+
+    def export_png(self, digest, filepath, annotation=None):
+        """Write a full PNG of a stored frame, annotated like the legacy screenshots"""
+        with open(self.primary_path(digest), "rb") as f:
+            data = f.read()
+        if self.primary_path(digest).endswith(ENCODINGS["webp"]):
+            buffer = io.BytesIO()
+            Image.open(io.BytesIO(data)).save(buffer, "PNG")
+            data = buffer.getvalue()
+        if annotation:
+            img, _ = annotate_png(data, annotation)
+            img.save(filepath, "PNG")
+        else:
+            with open(filepath, "wb") as f:
+                f.write(data)
+        return filepath
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Selector Cache - Remember which fallback selector found each feature
+Selector lists are tried with the last winner for the same host, page and
+feature first; the full list is walked only when the winner stops matching,
+and the new winner is learned and persisted for the next run
+"""
+
+import os
+import json
+import time
+import threading
+from urllib.parse import urlparse
+
+class SelectorCache:
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "lookups": 0}
+        self.learned = set()
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(url, feature):
+        """Cache key: host and path of the page the selectors run on, plus the feature"""
+        parts = urlparse(url or "")
+        return f"{parts.netloc}{parts.path.rstrip('/') or '/'}|{feature}"
+
+    def resolve(self, url, feature, selectors, lookup):
+        """First selector whose lookup(selector) returns elements; returns (selector, elements)
+
+        The cached winner is tried first; on a miss the rest of the list is
+        tried in its original order and the selector that matched is learned.
+        """
+        key = self.key(url, feature)
+        with self.lock:
+            winner = self.entries.get(key, {}).get("selector")
+
+        if winner in selectors:
+            elements = self._lookup(lookup, winner)
+            if elements:
+                with self.lock:
+                    self.stats["hits"] += 1
+                return winner, elements
+
+        with self.lock:
+            self.stats["misses"] += 1
+        for selector in selectors:
+            if selector == winner:
+                continue
+            elements = self._lookup(lookup, selector)
+            if elements:
+                self.learn(key, selector)
+                return selector, elements
+        return None, []
+
+    def _lookup(self, lookup, selector):
+        with self.lock:
+            self.stats["lookups"] += 1
+        return lookup(selector)
+
+    def learn(self, key, selector):
+        """Record a new winner and persist it"""
+        with self.lock:
+            self.entries[key] = {"selector": selector, "learned_at": time.time()}
+            self.learned.add(key)
+            self._save()
+
+    def _save(self):
+        """Merge this process's winners into the file and write it atomically"""
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        # Another tester (or process) may have learned other pages since we loaded
+        entries.update({key: self.entries[key] for key in self.learned})
+        if len(entries) > self.max_entries:
+            oldest = sorted(entries, key=lambda k: entries[k]["learned_at"])
+            for stale in oldest[:len(entries) - self.max_entries]:
+                del entries[stale]
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self.entries.update(entries)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Static Probe - Browserless checks against the server-rendered HTML
+Fetches a page over plain HTTP and exposes the same query API as DomSnapshot,
+so markup-only checks run in milliseconds without starting Chrome
+"""
+
+import re
+import sys
+import time
+import json
+import urllib.request
+from urllib.parse import urljoin
+from html.parser import HTMLParser
+
+USER_AGENT = "Mozilla/5.0 (deployment-static-probe)"
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+# Their content is not rendered text (innerText skips it)
+NON_TEXT_TAGS = {"script", "style", "template", "noscript", "head", "title"}
+RECORDED_ATTRIBUTES = ("name", "content", "role", "type", "data-testid", "href")
+
+# tag, #id, .class and [attr], [attr=v], [attr*=v], [attr^=v], [attr$=v] parts of a compound selector
+SELECTOR_PART = re.compile(
+    r"(?P<tag>^[a-zA-Z][\w-]*|^\*)"
+    r"|#(?P<id>[\w-]+)"
+    r"|\.(?P<cls>[\w-]+)"
+    r"|\[(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*(?P<q>['\"]?)(?P<val>[^'\"\]]*)(?P=q))?\s*\]"
+)
+
+def parse_selector(selector):
+    """Parse a comma-separated list of compound selectors (no combinators or pseudo-classes)"""
+    compounds = []
+    for compound in selector.split(","):
+        compound = compound.strip()
+        parts = []
+        pos = 0
+        while pos < len(compound):
+            match = SELECTOR_PART.match(compound, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"Unsupported selector for static probe: {selector}")
+            parts.append(match.groupdict())
+            pos = match.end()
+        compounds.append(parts)
+    return compounds
+
+def _matches_part(record, part):
+    """Check one simple selector against a record"""
+    if part["tag"]:
+        return part["tag"] == "*" or record["tag"] == part["tag"].lower()
+    if part["id"]:
+        return record["id"] == part["id"]
+    classes = record["classes"] or ""
+    if part["cls"]:
+        return part["cls"] in classes.split()
+    name = part["attr"]
+    value = record["raw_attrs"].get(name)
+    if value is None:
+        return False
+    expected = part["val"]
+    op = part["op"]
+    if op is None:
+        return True
+    if op == "=":
+        return value == expected
+    if op == "*=":
+        return expected in value
+    if op == "^=":
+        return value.startswith(expected)
+    return value.endswith(expected)
+
+class _PageParser(HTMLParser):
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.records = []
+        self.stack = []
+        self.text_parts = {}
+        self.title_parts = []
+
+    def handle_starttag(self, tag, attrs):
+        raw_attrs = {name: value or "" for name, value in attrs}
+        record_attrs = {name: raw_attrs[name] for name in RECORDED_ATTRIBUTES if name in raw_attrs}
+        if "href" in record_attrs:
+            record_attrs["href"] = urljoin(self.base_url, record_attrs["href"])
+        record = {
+            "index": len(self.records),
+            "tag": tag,
+            "parent": self.stack[-1]["index"] if self.stack else None,
+            "id": raw_attrs.get("id") or None,
+            "classes": raw_attrs.get("class"),
+            "own_text": "",
+            "attrs": record_attrs,
+            "raw_attrs": raw_attrs,
+            "visible": None
+        }
+        self.records.append(record)
+        self.text_parts[record["index"]] = []
+        if tag not in VOID_TAGS:
+            self.stack.append(record)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        # Tolerate unclosed children: pop back to the matching open tag, if any
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth]["tag"] == tag:
+                del self.stack[depth:]
+                return
+
+    def handle_data(self, data):
+        if not self.stack:
+            return
+        current = self.stack[-1]
+        if current["tag"] == "title":
+            self.title_parts.append(data)
+        current["own_text"] += data
+        if any(record["tag"] in NON_TEXT_TAGS for record in self.stack):
+            return
+        for record in self.stack:
+            self.text_parts[record["index"]].append(data)
+
+class StaticPage:
+    def __init__(self, url, html, status=None, headers=None, elapsed_ms=None):
+        self.url = url
+        self.html = html
+        self.status = status
+        self.headers = headers or {}
+        self.elapsed_ms = elapsed_ms
+
+        parser = _PageParser(url)
+        parser.feed(html)
+        parser.close()
+        self.records = parser.records
+        for record in self.records:
+            record["own_text"] = " ".join(record["own_text"].split())
+            record["text"] = " ".join("".join(parser.text_parts[record["index"]]).split())
+        self.title = " ".join("".join(parser.title_parts).split())
+        self._selector_cache = {}
+
+    @classmethod
+    def fetch(cls, url, timeout=15):
+        """Fetch the server-rendered HTML for url and parse it"""
+        started = time.perf_counter()
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            html = response.read().decode(charset, errors="replace")
+            status = response.status
+            headers = {name.lower(): value for name, value in response.headers.items()}
+            final_url = response.geturl()
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        return cls(final_url, html, status, headers, elapsed_ms)
+
+    def select(self, selector):
+        """Records matching a simple CSS selector list, in document order"""
+        if selector not in self._selector_cache:
+            compounds = parse_selector(selector)
+            self._selector_cache[selector] = [
+                record for record in self.records
+                if any(all(_matches_part(record, part) for part in parts) for parts in compounds)
+            ]
+        return self._selector_cache[selector]
+
+    def find_text(self, *substrings):
+        """Records whose own text contains any substring, like //*[contains(text(), ...)]"""
+        return [record for record in self.records
+                if any(substring in record["own_text"] for substring in substrings)]
+
+    def find_tag(self, tag):
+        """Records with the given tag name"""
+        return [record for record in self.records if record["tag"] == tag]
+
+    def parent(self, record):
+        """Parent record, or an empty record for the document root"""
+        if record["parent"] is None:
+            return {"tag": None, "classes": None, "attrs": {}}
+        return self.records[record["parent"]]
+
+def main():
+    """Print the parsed structure summary for a URL"""
+    if len(sys.argv) != 2:
+        print("usage: static_probe.py URL")
+        sys.exit(2)
+    page = StaticPage.fetch(sys.argv[1])
+    print(json.dumps({
+        "url": page.url,
+        "status": page.status,
+        "title": page.title,
+        "elements": len(page.records),
+        "fetch_ms": page.elapsed_ms
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
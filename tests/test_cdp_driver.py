@@ -0,0 +1,68 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cdp_driver import CdpConnection, CdpDriver
+from frame_profile import TRACE_CATEGORIES, profile_frames
+
+TRACE_EVENTS = [
+    {"ph": "M", "name": "thread_name", "pid": 1, "tid": 2, "args": {"name": "CrRendererMain"}},
+    {"ph": "X", "name": "RunTask", "pid": 1, "tid": 2, "dur": 4000},
+    {"ph": "X", "name": "Paint", "pid": 1, "tid": 2, "dur": 1500},
+    {"ph": "X", "name": "CompositeLayers", "pid": 1, "tid": 2, "dur": 500},
+]
+
+
+class FakeChrome:
+    """Answers CDP commands like a page target, delivering trace data only on Tracing.end"""
+
+    result = CdpConnection.result
+
+    def __init__(self):
+        self.listeners = []
+        self.sent = []
+        self.metrics_calls = 0
+
+    def send_async(self, method, params=None):
+        self.sent.append(method)
+        waiter = {"method": method, "done": threading.Event(), "response": {"result": self.answer(method)}}
+        if method == "Tracing.end":
+            self.emit("Tracing.dataCollected", {"value": TRACE_EVENTS})
+            self.emit("Tracing.tracingComplete", {})
+        waiter["done"].set()
+        return waiter
+
+    def answer(self, method):
+        if method == "Performance.getMetrics":
+            self.metrics_calls += 1
+            return {"metrics": [{"name": "Timestamp", "value": self.metrics_calls * 0.1},
+                                {"name": "TaskDuration", "value": self.metrics_calls * 0.01}]}
+        if method == "Runtime.evaluate":
+            frames = [i * 16.7 for i in range(7)]
+            return {"result": {"value": {"frames": frames, "long_tasks": [],
+                                         "elapsed_ms": 100, "hidden": False}}}
+        return {}
+
+    def emit(self, method, params):
+        for listener in self.listeners:
+            listener(method, params)
+
+    def close(self):
+        pass
+
+
+def test_cdp_frame_profile_reads_trace_events():
+    chrome = FakeChrome()
+    driver = CdpDriver(trace_categories=TRACE_CATEGORIES, connection=chrome)
+
+    profile = profile_frames(driver, window_ms=100, trace=True)
+
+    assert "Tracing.start" in chrome.sent and "Tracing.end" in chrome.sent
+    assert profile["trace"]["events"] == len(TRACE_EVENTS)
+    assert profile["trace"]["paint_ms"] == 1.5
+    assert profile["trace"]["composite_ms"] == 0.5
+    # Tracing restarts after each flush so the next window is traced too
+    last_end = len(chrome.sent) - 1 - chrome.sent[::-1].index("Tracing.end")
+    assert "Tracing.start" in chrome.sent[last_end:]
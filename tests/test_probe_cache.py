@@ -0,0 +1,46 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from probe_cache import ProbeCache
+
+
+def test_caches_sharing_a_file_keep_each_others_entries(tmp_path):
+    path = str(tmp_path / "probe_cache.json")
+    first = ProbeCache(path)
+    second = ProbeCache(path)
+
+    first.put("browser|https://a.example|", "etag:a", {"page_title": "A"})
+    second.put("browser|https://b.example|", "etag:b", {"page_title": "B"})
+
+    reloaded = ProbeCache(path)
+    assert reloaded.get("browser|https://a.example|", "etag:a")["result"] == {"page_title": "A"}
+    assert reloaded.get("browser|https://b.example|", "etag:b")["result"] == {"page_title": "B"}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_concurrent_saves_to_one_file(tmp_path):
+    path = str(tmp_path / "probe_cache.json")
+    caches = [ProbeCache(path) for _ in range(2)]
+    errors = []
+
+    def store(index, cache):
+        try:
+            for n in range(50):
+                cache.put(f"browser|https://{index}-{n}.example|", "etag:x", {"n": n})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store, args=(index, cache)) for index, cache in enumerate(caches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    # One more save each, in turn, settles whatever the interleaved saves raced over
+    for index, cache in enumerate(caches):
+        cache.put(f"browser|https://{index}-last.example|", "etag:x", {})
+    assert len(ProbeCache(path).entries) == 102
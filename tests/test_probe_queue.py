@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deployment_test
+import probe_queue
+from probe_queue import ProbeQueue, collect
+
+MATRIX = {
+    "domains": {
+        "production": {"url": "https://prod.example", "pages": ["/", "/admin"]},
+        "preview": {"url": "https://preview.example", "pages": ["/"]},
+    },
+    "baseline": "production",
+    "checks": None,
+    "concurrency": {"global": 2, "per_host": 1},
+    "budgets": {},
+    "monitor": {},
+}
+
+
+def page_result(job):
+    """What a worker stores for one page job"""
+    screenshot = {"name": f"{job['domain']}{job['page'].replace('/', '_')}.png", "hash": f"missing-{job['id']}"}
+    result = {"features": {f"page{job['page']}": {"present": True}}, "screenshots": [screenshot],
+              "console_errors": [], "pages": {job["page"]: {"accessible": True}}}
+    if job["page"] == "/":
+        result.update(accessible=True, page_title=job["domain"])
+    return result
+
+
+def test_collect_writes_features_and_screenshots(tmp_path, monkeypatch):
+    monkeypatch.setattr(deployment_test, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(probe_queue, "OUTPUT_DIR", str(tmp_path))
+    db = str(tmp_path / "queue.sqlite")
+
+    queue = ProbeQueue(db)
+    run_id = queue.submit(MATRIX, {"admin_access", "network"})
+    queue.register("worker-1")
+    while True:
+        claimed = queue.claim("worker-1", run_id)
+        if claimed is None:
+            break
+        job = dict(claimed["job"], id=claimed["id"])
+        assert queue.complete("worker-1", claimed["id"], page_result(job))
+    queue.close()
+
+    collect(db, run_id, poll_s=0)
+
+    with open(tmp_path / "deployment_test_results.json") as f:
+        domains = json.load(f)["domains"]
+    assert list(domains) == ["production", "preview"]
+    assert domains["production"]["features"] == {"page/": {"present": True}, "page/admin": {"present": True}}
+    assert [shot["name"] for shot in domains["production"]["screenshots"]] == ["production_.png",
+                                                                                "production_admin.png"]
+    assert domains["preview"]["features"] == {"page/": {"present": True}}
+    assert [shot["name"] for shot in domains["preview"]["screenshots"]] == ["preview_.png"]
@@ -0,0 +1,55 @@
+import os
+import sys
+import functools
+import threading
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import deployment_test
+from deployment_test import DeploymentTester, STATIC_CHECKS
+from static_probe import StaticPage
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def index_url():
+    """The checked-in index.html, served from the repo root on an ephemeral port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=ROOT))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/index.html"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_find_text_reaches_the_gradient_title(index_url):
+    page = StaticPage.fetch(index_url)
+    spans = [record for record in page.find_text("Urban Directory") if record["tag"] == "span"]
+    assert spans
+    assert "gradient" in spans[0]["classes"]
+
+
+def test_static_tier_answers_every_static_check_without_chrome(index_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(deployment_test, "OUTPUT_DIR", str(tmp_path))
+    tester = DeploymentTester(checks=STATIC_CHECKS)
+    try:
+        assert not tester.needs_browser()
+        results = tester.test_domain_static("local", index_url)
+        assert not tester._drivers
+    finally:
+        tester.cleanup()
+
+    assert "error" not in results
+    assert results["accessible"]
+    assert results["probe_tier"] == "static"
+    assert set(results["features"]) == STATIC_CHECKS - {"deployment_info"}
+    assert results["deployment_info"]["response_headers"]
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visual_diff import compare_files
+
+
+def test_heatmap_of_screenshots_with_different_sizes(tmp_path):
+    short = np.zeros((100, 80, 3), dtype=np.uint8)
+    tall = np.zeros((150, 80, 3), dtype=np.uint8)
+    tall[10:40, 10:40] = 255
+    Image.fromarray(tall).save(tmp_path / "tall.png")
+    Image.fromarray(short).save(tmp_path / "short.png")
+
+    for base, other in (("tall.png", "short.png"), ("short.png", "tall.png")):
+        heatmap = tmp_path / f"heatmap_{base}"
+        result = compare_files(tmp_path / base, tmp_path / other, str(heatmap))
+
+        assert result["size_mismatch"]
+        assert result["tiles_changed"]
+        with Image.open(result["heatmap"]) as img:
+            assert img.size == (80, 100)
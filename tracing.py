@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tracing - Timing spans for the probes themselves
+Spans nest per thread and count the WebDriver commands issued inside them;
+a run can be exported as Chrome trace-event JSON (chrome://tracing, Perfetto)
+and printed as a flame-style summary
+"""
+
+import os
+import json
+import time
+import inspect
+import threading
+import functools
+from collections import deque
+
+class Tracer:
+    def __init__(self, max_spans=100000):
+        # Bounded so a long-running monitor keeps steady memory
+        self.spans = deque(maxlen=max_spans)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        # Wall-clock time of origin, to place browser timestamps on the span timeline
+        self.origin_epoch = time.time()
+        self.thread_ids = {}
+
+    def _stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def _thread_id(self):
+        """Small stable id per thread, for readable trace viewer rows"""
+        ident = threading.get_ident()
+        with self.lock:
+            if ident not in self.thread_ids:
+                self.thread_ids[ident] = (len(self.thread_ids) + 1, threading.current_thread().name)
+            return self.thread_ids[ident][0]
+
+    def span(self, name, /, **args):
+        """Context manager timing one phase; nested spans form a path like test_domain;navigate"""
+        return _Span(self, name, args)
+
+    def phases_at(self, timestamps):
+        """Innermost span path of the calling thread open at each wall-clock timestamp (seconds)"""
+        if not timestamps:
+            return []
+        times = [timestamp - self.origin_epoch for timestamp in timestamps]
+        earliest = min(times)
+        tid = self._thread_id()
+        # Still-open spans of this thread, then recently finished ones (newest first)
+        candidates = [(record["start"], None, record["path"]) for record in self._stack()]
+        for span in reversed(self.spans):
+            end = span["start"] + span["duration"]
+            if end < earliest:
+                break
+            if span["tid"] == tid:
+                candidates.append((span["start"], end, span["path"]))
+
+        phases = []
+        for t in times:
+            # Browser timestamps are truncated to the millisecond, so they can only read early
+            containing = [path for start, end, path in candidates
+                          if start - 0.001 <= t and (end is None or t <= end)]
+            phases.append(max(containing, key=lambda path: path.count(";")) if containing else None)
+        return phases
+
+    def count_call(self, command):
+        """Attribute one WebDriver command to the innermost open span"""
+        stack = self._stack()
+        if stack:
+            stack[-1]["calls"] += 1
+            stack[-1]["commands"][command] = stack[-1]["commands"].get(command, 0) + 1
+
+    def instrument(self, driver):
+        """Count every command a WebDriver sends; returns the driver"""
+        execute = driver.execute
+
+        def traced_execute(driver_command, params=None):
+            self.count_call(driver_command)
+            return execute(driver_command, params)
+
+        driver.execute = traced_execute
+        return driver
+
+    def export(self, path):
+        """Write the spans as Chrome trace-event JSON"""
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                  for tid, name in self.thread_ids.values()]
+        for span in list(self.spans):
+            args = dict(span["args"], webdriver_calls=span["calls"] + span["child_calls"])
+            if span["commands"]:
+                args["commands"] = span["commands"]
+            events.append({
+                "name": span["name"],
+                "cat": span["path"].split(";")[0],
+                "ph": "X",
+                "ts": round(span["start"] * 1e6),
+                "dur": round(span["duration"] * 1e6),
+                "pid": pid,
+                "tid": span["tid"],
+                "args": args
+            })
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+    def aggregate(self):
+        """Inclusive totals per span path"""
+        totals = {}
+        for span in list(self.spans):
+            entry = totals.setdefault(span["path"], {"ms": 0.0, "count": 0, "calls": 0})
+            entry["ms"] += span["duration"] * 1000
+            entry["count"] += 1
+            entry["calls"] += span["calls"] + span["child_calls"]
+        return totals
+
+    def print_summary(self, width=30):
+        """Print the span tree with inclusive time, share of its root and WebDriver calls"""
+        totals = self.aggregate()
+        if not totals:
+            return
+        print("\n🔥 Time profile (inclusive, per span path)")
+        print("-" * 80)
+
+        def children(prefix):
+            depth = prefix.count(";") + 1 if prefix else 0
+            return sorted((path for path in totals
+                           if path.count(";") == depth and (not prefix or path.startswith(prefix + ";"))),
+                          key=lambda path: -totals[path]["ms"])
+
+        def show(path, root_ms):
+            entry = totals[path]
+            depth = path.count(";")
+            share = entry["ms"] / root_ms if root_ms else 0
+            bar = "█" * max(1, round(share * 20))
+            label = ("  " * depth + path.rsplit(";", 1)[-1])[:width]
+            print(f"{label:{width}} {entry['ms']:10.1f}ms {share * 100:5.1f}% {bar:20} "
+                  f"calls {entry['calls']:4} x{entry['count']}")
+            for child in children(path):
+                show(child, root_ms)
+
+        for root in children(""):
+            show(root, totals[root]["ms"])
+
+class _Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        parent = stack[-1]["path"] + ";" if stack else ""
+        self.record = {
+            "name": self.name,
+            "path": parent + self.name,
+            "args": self.args,
+            "tid": self.tracer._thread_id(),
+            "calls": 0,
+            "child_calls": 0,
+            "commands": {},
+            "start": time.perf_counter() - self.tracer.origin
+        }
+        stack.append(self.record)
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        record = self.tracer._stack().pop()
+        record["duration"] = time.perf_counter() - self.tracer.origin - record["start"]
+        if exc_type:
+            record["args"] = dict(record["args"], error=exc_type.__name__)
+        stack = self.tracer._stack()
+        if stack:
+            stack[-1]["child_calls"] += record["calls"] + record["child_calls"]
+        self.tracer.spans.append(record)
+        return False
+
+# Shared by every probe module so nested spans line up across them
+tracer = Tracer()
+
+def traced(name=None, label=None):
+    """Decorator wrapping a function in a span; label names an argument to record with it"""
+    def decorate(fn):
+        span_name = name or fn.__name__
+        signature = inspect.signature(fn) if label else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            span_args = {}
+            if signature:
+                bound = signature.bind_partial(*args, **kwargs).arguments
+                if label in bound:
+                    span_args[label] = bound[label]
+            with tracer.span(span_name, **span_args):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Unified Runner - One warm Chrome shared by the deployment, gradient and Vercel probes
+Each URL is loaded once; the probes run as plugins against the loaded page and
+write one combined results document
+"""
+
+import os
+import time
+import argparse
+from datetime import datetime
+from chrome_driver import create_chrome_driver, BACKENDS
+from page_readiness import PageReadiness
+from network_log import NetworkLog
+from deployment_test import DeploymentTester, DEFAULT_DOMAINS, ALL_CHECKS, parse_domain
+from gradient_analysis import GradientAnalyzer
+from vercel_specific_test import VercelSpecificTester
+from results_stream import ResultsStream, write_results
+from tracing import tracer, traced
+
+OUTPUT_DIR = "/Users/paulbridges/Downloads/try again"
+# Deployment runs last: its admin and modal checks navigate away from the loaded page
+PLUGIN_ORDER = ["gradient", "vercel", "deployment"]
+
+class UnifiedRunner:
+    def __init__(self, plugins=None, checks=None, backend="selenium"):
+        self.plugins = [name for name in PLUGIN_ORDER if plugins is None or name in plugins]
+        self.driver = create_chrome_driver(backend=backend)
+        self.deployment = DeploymentTester(checks=checks, driver=self.driver)
+        self.gradient = GradientAnalyzer(driver=self.driver)
+        self.vercel = VercelSpecificTester(driver=self.driver)
+        self.results = {
+            "timestamp": datetime.now().isoformat(),
+            "plugins": self.plugins,
+            "domains": {}
+        }
+        self.stream = None
+
+    def run_gradient(self, domain_name, url):
+        """Gradient plugin: title gradient, CSS and background animation"""
+        result = self.gradient.analyze_gradient(domain_name, url, navigate=False)
+        self.gradient.results["domains"][domain_name] = result
+        return result
+
+    def run_vercel(self, domain_name, url):
+        """Vercel plugin: gradient classes in source, computed styles, canvases"""
+        # Console errors are left to the deployment plugin; get_log drains the buffer
+        return self.vercel.test_vercel_with_alert_handling(
+            url, navigate=False, screenshot_name=f"{domain_name}_vercel_analysis.png",
+            check_console=False)
+
+    def run_deployment(self, domain_name, url):
+        """Deployment plugin: feature checks, admin and modal flows, screenshots"""
+        result = self.deployment.test_domain(domain_name, url, navigate=False)
+        self.deployment.keep_for_comparison(domain_name, result)
+        return result
+
+    @traced(label="domain_name")
+    def run_domain(self, domain_name, url):
+        """Load a URL once, then hand the page to every plugin in turn"""
+        print(f"\n🌐 Loading {domain_name}: {url}")
+        readiness = PageReadiness(self.driver)
+        domain_results = {"url": url, "alert": None}
+
+        try:
+            # Drop earlier network events so the plugins see only this navigation
+            NetworkLog(self.driver).reset()
+            with tracer.span("navigate", url=url):
+                self.driver.get(url)
+            readiness.wait_for_page_settled()
+            # An open alert blocks every script call, so clear it before any plugin runs
+            domain_results["alert"] = self.vercel.dismiss_alert(readiness)
+        except Exception as e:
+            domain_results["error"] = str(e)
+            print(f"❌ Could not load {domain_name}: {e}")
+        domain_results["load_timings"] = readiness.timings
+
+        if "error" not in domain_results:
+            for name in self.plugins:
+                try:
+                    domain_results[name] = getattr(self, f"run_{name}")(domain_name, url)
+                except Exception as e:
+                    domain_results[name] = {"error": str(e)}
+                    print(f"❌ {name} plugin failed on {domain_name}: {e}")
+
+        return domain_results
+
+    def run(self, domains=None):
+        """Probe every domain with the shared browser and write the combined results"""
+        domains = domains or DEFAULT_DOMAINS
+        stream_path = os.path.join(OUTPUT_DIR, "combined_results.jsonl")
+        self.stream = ResultsStream(stream_path)
+        self.stream.run_start(self.results)
+
+        started = time.perf_counter()
+        for domain_name, url in domains.items():
+            self.results["domains"][domain_name] = self.run_domain(domain_name, url)
+            self.stream.domain_end(domain_name, self.results["domains"][domain_name], streamed=())
+
+        if "deployment" in self.plugins:
+            screenshot_errors = self.deployment.screenshots.wait()
+            if screenshot_errors:
+                self.results["screenshot_errors"] = screenshot_errors
+                self.stream.section("screenshot_errors", screenshot_errors)
+            self.results["comparison"] = self.deployment.compare_domains()
+            self.stream.section("comparison", self.results["comparison"])
+            self.results["recommendations"] = self.deployment.generate_recommendations()
+            self.stream.section("recommendations", self.results["recommendations"])
+            # The deployment tester keeps only comparison summaries; the history gets full results
+            self.deployment.record_history({
+                "test_timestamp": self.deployment.results["test_timestamp"],
+                "domains": {name: data["deployment"] for name, data in self.results["domains"].items()
+                            if isinstance(data.get("deployment"), dict)}
+            })
+
+        self.results["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.stream.section("elapsed_ms", self.results["elapsed_ms"])
+        self.stream.close()
+        write_results(stream_path, os.path.join(OUTPUT_DIR, "combined_results.json"))
+
+        if "gradient" in self.plugins:
+            # Prints the gradient report and indexes the gradient run
+            self.gradient.generate_report()
+
+        print(f"\n✅ {len(domains)} domains probed with one browser in {self.results['elapsed_ms']}ms")
+        print("   Combined results saved to combined_results.json")
+
+        tracer.print_summary()
+        tracer.export(os.path.join(OUTPUT_DIR, "combined_trace.json"))
+
+    def cleanup(self):
+        """Clean up resources; the probes borrow the driver, so it is quit here"""
+        self.deployment.cleanup()
+        self.gradient.cleanup()
+        self.vercel.cleanup()
+        try:
+            self.driver.quit()
+        except:
+            pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every probe against each domain with one shared Chrome")
+    parser.add_argument("--domain", type=parse_domain, action="append", default=[],
+                        metavar="NAME=URL", help="extra domain to probe, e.g. a preview URL")
+    parser.add_argument("--plugins", default=",".join(PLUGIN_ORDER),
+                        help=f"comma-separated plugins to run: {', '.join(PLUGIN_ORDER)}")
+    parser.add_argument("--checks", default=",".join(sorted(ALL_CHECKS)),
+                        help="comma-separated deployment checks to run")
+    parser.add_argument("--backend", choices=BACKENDS, default="selenium",
+                        help="drive Chrome through chromedriver (selenium) or the DevTools websocket (cdp)")
+    args = parser.parse_args()
+
+    domains = dict(DEFAULT_DOMAINS)
+    domains.update(args.domain)
+
+    runner = UnifiedRunner(plugins=args.plugins.split(","), checks=args.checks.split(","),
+                           backend=args.backend)
+    try:
+        runner.run(domains)
+    finally:
+        runner.cleanup()
@@ -4,6 +4,7 @@ Vercel Specific Test - Handle alert and analyze the difference
 """
 
 import time
+import argparse
 import json
 from datetime import datetime
 from selenium import webdriver
@@ -12,84 +13,111 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, UnexpectedAlertPresentException
+from chrome_driver import create_chrome_driver, BACKENDS
+from page_readiness import PageReadiness
+from dom_snapshot import DomSnapshot
+from static_probe import StaticPage
+from pattern_scan import PatternScanner
+from tracing import tracer, traced
+from console_log import ConsoleMonitor
+
+VERCEL_URL = "https://urban-reel.vercel.app"
+GRADIENT_CHECKS = [
+    'bg-gradient-to-r',
+    'from-neon-purple',
+    'via-neon-lavender',
+    'to-neon-purple',
+    'bg-clip-text',
+    'text-transparent'
+]
+# Class names are case-sensitive, like the `in` tests this replaces
+GRADIENT_SCANNER = PatternScanner(GRADIENT_CHECKS, case_sensitive=True)
+STYLE_PROPERTIES = [
+    'background-image', 'background-clip', '-webkit-background-clip',
+    '-webkit-text-fill-color', 'color', 'background'
+]
 
 class VercelSpecificTester:
-    def __init__(self):
-        self.setup_driver()
+    def __init__(self, launch_browser=True, driver=None, backend="selenium"):
+        # A borrowed driver (e.g. from unified_runner) is used but never quit here
+        self.owns_driver = driver is None
+        self.backend = backend
+        if driver:
+            self.driver = driver
+            self.wait = WebDriverWait(driver, 15)
+        elif launch_browser:
+            self.setup_driver()
 
     def setup_driver(self):
         """Initialize Chrome driver"""
-        chrome_options = Options()
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-
-        self.driver = webdriver.Chrome(options=chrome_options)
+        self.driver = create_chrome_driver(backend=self.backend)
         self.wait = WebDriverWait(self.driver, 15)
 
-    def test_vercel_with_alert_handling(self):
-        """Test Vercel domain with proper alert handling"""
-        print("🚀 Testing urban-reel.vercel.app with alert handling...")
+    @traced("alert")
+    def dismiss_alert(self, readiness):
+        """Accept an alert the page opened, if any; returns its text"""
+        try:
+            alert = self.driver.switch_to.alert
+            alert_text = alert.text
+            print(f"⚠️  Alert detected: {alert_text}")
+            alert.accept()  # Accept the alert
+            print("✓ Alert dismissed")
+            readiness.wait_for_alert_closed(timeout=5)
+            readiness.wait_for_page_settled()
+            return alert_text
+        except:
+            print("✓ No alert detected")
+            return None
+
+    @traced("test_vercel", label="url")
+    def test_vercel_with_alert_handling(self, url=VERCEL_URL, navigate=True,
+                                        screenshot_name="vercel_analysis.png", check_console=True):
+        """Test Vercel domain with proper alert handling
+
+        With navigate=False the page must already be loaded in self.driver.
+        """
+        print(f"🚀 Testing {url} with alert handling...")
+
+        readiness = PageReadiness(self.driver)
+        console = ConsoleMonitor(self.driver)
+        results = {"url": url, "alert": None}
 
         try:
-            self.driver.get("https://urban-reel.vercel.app")
-            time.sleep(2)
+            if navigate:
+                console.reset()
+                with tracer.span("navigate", url=url):
+                    self.driver.get(url)
+                # Settling stops early if an alert opens while the page loads
+                readiness.wait_for_page_settled()
 
             # Handle any alerts that popup
-            try:
-                alert = self.driver.switch_to.alert
-                alert_text = alert.text
-                print(f"⚠️  Alert detected: {alert_text}")
-                alert.accept()  # Accept the alert
-                print("✓ Alert dismissed")
-                time.sleep(1)
-            except:
-                print("✓ No alert detected")
+            results["alert"] = self.dismiss_alert(readiness)
 
             # Now proceed with analysis
             print("🔍 Analyzing page after alert handling...")
 
+            # Capture title, styles, canvases and page source in one round trip
+            with tracer.span("snapshot"):
+                snapshot = DomSnapshot.capture(self.driver, ["canvas", "[id*='tsparticles']"],
+                                               style_texts=["Urban Directory"],
+                                               style_properties=STYLE_PROPERTIES,
+                                               include_html=True)
+
             # Check for gradient on title
-            title_elements = self.driver.find_elements(By.XPATH,
-                "//*[contains(text(), 'Urban Directory')]")
+            title_elements = snapshot.find_text("Urban Directory")
+            results["title_found"] = bool(title_elements)
 
             if title_elements:
                 title_element = title_elements[0]
-                classes = title_element.get_attribute("class") or ""
+                classes = title_element["classes"] or ""
                 print(f"Title classes: {classes}")
 
                 # Check for gradient classes specifically
-                gradient_indicators = [
-                    'bg-gradient-to-r',
-                    'from-neon-purple',
-                    'via-neon-lavender',
-                    'to-neon-purple',
-                    'bg-clip-text',
-                    'text-transparent'
-                ]
-
-                found_gradient_classes = [cls for cls in gradient_indicators if cls in classes]
+                found_gradient_classes = [cls for cls in GRADIENT_CHECKS if cls in classes]
                 print(f"Gradient classes found: {found_gradient_classes}")
 
-                # Get computed styles for the title
-                computed_styles = {}
-                style_properties = [
-                    'background-image', 'background-clip', '-webkit-background-clip',
-                    '-webkit-text-fill-color', 'color', 'background'
-                ]
-
-                for prop in style_properties:
-                    try:
-                        value = self.driver.execute_script(
-                            f"return getComputedStyle(arguments[0]).getPropertyValue('{prop}');",
-                            title_element
-                        )
-                        computed_styles[prop] = value
-                    except Exception as e:
-                        print(f"Error getting {prop}: {e}")
+                # Computed styles for the title were captured with the snapshot
+                computed_styles = title_element.get("styles", {})
 
                 print("Computed styles:")
                 for prop, value in computed_styles.items():
@@ -108,35 +136,30 @@ class VercelSpecificTester:
                 print(f"  Has text clipping: {has_text_clip}")
                 print(f"  Should be gradient text: {has_gradient and has_text_clip}")
 
+                results.update({
+                    "title_classes": classes,
+                    "gradient_classes_found": found_gradient_classes,
+                    "computed_styles": computed_styles,
+                    "has_linear_gradient": has_gradient,
+                    "has_text_clip": has_text_clip,
+                    "is_gradient_text": has_gradient and has_text_clip
+                })
+
             else:
                 print("❌ Urban Directory title not found")
 
             # Check page source for gradient CSS
-            print("\n🎨 Checking if gradient CSS is in page source...")
-            page_source = self.driver.page_source
-
-            gradient_checks = [
-                'bg-gradient-to-r',
-                'from-neon-purple',
-                'via-neon-lavender',
-                'to-neon-purple',
-                'bg-clip-text',
-                'text-transparent'
-            ]
-
-            for check in gradient_checks:
-                if check in page_source:
-                    print(f"  ✓ Found '{check}' in page source")
-                else:
-                    print(f"  ✗ Missing '{check}' in page source")
+            results["gradient_source"] = self.report_gradient_source(snapshot.html)
 
             # Check for TSParticles
             print("\n✨ Checking for TSParticles...")
-            canvas_elements = self.driver.find_elements(By.TAG_NAME, "canvas")
-            tsparticles_divs = self.driver.find_elements(By.CSS_SELECTOR, "[id*='tsparticles']")
+            canvas_elements = snapshot.select("canvas")
+            tsparticles_divs = snapshot.select("[id*='tsparticles']")
 
             print(f"  Canvas elements: {len(canvas_elements)}")
             print(f"  TSParticles divs: {len(tsparticles_divs)}")
+            results["canvas_count"] = len(canvas_elements)
+            results["tsparticles_divs"] = len(tsparticles_divs)
 
             if canvas_elements:
                 print("  ✓ Animation canvas found")
@@ -144,31 +167,101 @@ class VercelSpecificTester:
                 print("  ✗ No animation canvas found")
 
             # Take a screenshot for visual confirmation
-            self.driver.save_screenshot("/Users/paulbridges/Downloads/try again/vercel_analysis.png")
-            print("📸 Screenshot saved as vercel_analysis.png")
-
-            # Check console errors
-            print("\n📋 Checking console errors...")
-            try:
-                logs = self.driver.get_log('browser')
-                errors = [log for log in logs if log['level'] == 'SEVERE']
-                print(f"  Console errors: {len(errors)}")
-                for error in errors[:3]:  # Show first 3
-                    print(f"    - {error['message'][:100]}...")
-            except Exception as e:
-                print(f"  Could not get console logs: {e}")
+            with tracer.span("screenshot"):
+                self.driver.save_screenshot(f"/Users/paulbridges/Downloads/try again/{screenshot_name}")
+            print(f"📸 Screenshot saved as {screenshot_name}")
+            results["screenshot"] = screenshot_name
+
+            # Check console errors (skipped when another probe drains the same browser log)
+            if check_console:
+                print("\n📋 Checking console errors...")
+                try:
+                    with tracer.span("console_log"):
+                        console.drain()
+                    errors = console.errors()
+                    results["console"] = console.buffer.summary()
+                    print(f"  Console errors: {results['console']['counts'].get('SEVERE', 0)} ({len(errors)} distinct)")
+                    for error in errors[:3]:  # Show first 3
+                        print(f"    - [{error['phase']}] x{error['count']} {error['message'][:100]}...")
+                    results["console_errors"] = errors
+                except Exception as e:
+                    print(f"  Could not get console logs: {e}")
 
         except Exception as e:
             print(f"❌ Error during Vercel analysis: {str(e)}")
+            results["error"] = str(e)
+
+        print("\n⏱️  Readiness waits:")
+        for timing in readiness.timings:
+            status = "✓" if timing["satisfied"] else "✗ timed out"
+            print(f"  {timing['signal']:20} {timing['elapsed_ms']:8.1f}ms {status}")
+        results["wait_timings"] = readiness.timings
+
+        return results
+
+    @traced("gradient_source")
+    def report_gradient_source(self, page_source):
+        """Print which gradient classes appear in the page source"""
+        print("\n🎨 Checking if gradient CSS is in page source...")
+        hits = GRADIENT_SCANNER.scan(page_source)
+        found = {}
+        for check in GRADIENT_CHECKS:
+            found[check] = bool(hits[check])
+            if found[check]:
+                print(f"  ✓ Found '{check}' in page source ({len(hits[check])} hits, first at offset {hits[check][0]})")
+            else:
+                print(f"  ✗ Missing '{check}' in page source")
+        return found
+
+    def test_vercel_static(self):
+        """Run the markup-only checks on the server-rendered HTML, without Chrome"""
+        print("⚡ Testing urban-reel.vercel.app from static HTML...")
+
+        try:
+            page = StaticPage.fetch(VERCEL_URL)
+            print(f"✓ Fetched {page.url} ({page.status}) in {page.elapsed_ms}ms")
+
+            # <title> and inline scripts also contain the text; only rendered elements count
+            title_elements = [element for element in page.find_text("Urban Directory")
+                              if element["tag"] not in ("title", "script")]
+            if title_elements:
+                classes = title_elements[0]["classes"] or ""
+                print(f"Title classes: {classes}")
+                print(f"Gradient classes found: {[cls for cls in GRADIENT_CHECKS if cls in classes]}")
+            else:
+                print("❌ Urban Directory title not found")
+
+            self.report_gradient_source(page.html)
+
+            print("\n🏷️  Deployment meta tags:")
+            for meta in page.find_tag("meta"):
+                name = meta["attrs"].get("name") or ""
+                if any(keyword in name.lower() for keyword in ["version", "build", "deploy"]):
+                    print(f"  {name}: {meta['attrs'].get('content')}")
+
+        except Exception as e:
+            print(f"❌ Error during static Vercel analysis: {str(e)}")
 
     def cleanup(self):
         """Clean up resources"""
-        if hasattr(self, 'driver'):
+        if self.owns_driver and hasattr(self, 'driver'):
             self.driver.quit()
 
 if __name__ == "__main__":
-    tester = VercelSpecificTester()
+    parser = argparse.ArgumentParser(description="Handle the Vercel alert and analyze the gradient")
+    parser.add_argument("--static-only", action="store_true",
+                        help="answer the markup checks over plain HTTP and never start Chrome")
+    parser.add_argument("--backend", choices=BACKENDS, default="selenium",
+                        help="drive Chrome through chromedriver (selenium) or the DevTools websocket (cdp)")
+    args = parser.parse_args()
+
+    tester = VercelSpecificTester(launch_browser=not args.static_only, backend=args.backend)
     try:
-        tester.test_vercel_with_alert_handling()
+        if args.static_only:
+            tester.test_vercel_static()
+        else:
+            tester.test_vercel_with_alert_handling()
+            tracer.print_summary()
+            tracer.export("/Users/paulbridges/Downloads/try again/vercel_trace.json")
     finally:
         tester.cleanup()
\ No newline at end of file
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Visual Diff - Tile-based perceptual comparison of paired screenshots
+Identical tiles are skipped by hash; changed tiles are scored with a per-tile SSIM
+"""
+
+import io
+import time
+import numpy as np
+from PIL import Image
+
+TILE_SIZE = 32
+# Per-tile dissimilarity (1 - SSIM) above this counts as a visible change
+CHANGE_THRESHOLD = 0.02
+# Luma weights (ITU-R BT.601) used for the perceptual comparison
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+_hash_weights = {}
+
+def load_rgb(source):
+    """Load a screenshot path or PNG bytes as an HxWx3 uint8 array"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with Image.open(source) as img:
+        return np.asarray(img.convert('RGB'))
+
+def _pad_to_tiles(img, tile):
+    """Pad an image with black so both dimensions are multiples of tile"""
+    h, w = img.shape[:2]
+    pad_h = -h % tile
+    pad_w = -w % tile
+    if pad_h or pad_w:
+        img = np.pad(img, ((0, pad_h), (0, pad_w), (0, 0)))
+    return np.ascontiguousarray(img)
+
+def tile_hashes(img, tile=TILE_SIZE):
+    """64-bit fingerprint per tile, computed in one vectorized pass
+
+    Each tile row is viewed as uint64 words and combined with fixed random odd
+    weights (wrapping arithmetic), so identical tiles always hash equal.
+    """
+    img = _pad_to_tiles(img, tile)
+    h, w = img.shape[:2]
+    row_bytes = tile * 3
+    if row_bytes % 8:
+        raise ValueError(f"tile size must make tile rows a multiple of 8 bytes, got {tile}")
+    words_per_row = row_bytes // 8
+
+    words = img.reshape(h // tile, tile, w // tile, row_bytes).transpose(0, 2, 1, 3)
+    words = np.ascontiguousarray(words).view(np.uint64)
+    words = words.reshape(h // tile, w // tile, tile * words_per_row)
+
+    n_words = tile * words_per_row
+    if n_words not in _hash_weights:
+        rng = np.random.default_rng(0x5EED)
+        _hash_weights[n_words] = rng.integers(1, 2**63, size=n_words, dtype=np.uint64) | np.uint64(1)
+    with np.errstate(over='ignore'):
+        return (words * _hash_weights[n_words]).sum(axis=2, dtype=np.uint64)
+
+def _tile_luma(img, tile, rows, cols):
+    """Luma blocks (n, tile, tile) for the selected tile coordinates"""
+    blocks = np.stack([img[r * tile:(r + 1) * tile, c * tile:(c + 1) * tile]
+                       for r, c in zip(rows, cols)]) if len(rows) else np.empty((0, tile, tile, 3), np.uint8)
+    return blocks.astype(np.float32) @ LUMA_WEIGHTS
+
+def _tile_ssim(a, b):
+    """Structural similarity of each pair of luma blocks"""
+    axes = (1, 2)
+    mu_a = a.mean(axis=axes)
+    mu_b = b.mean(axis=axes)
+    var_a = a.var(axis=axes)
+    var_b = b.var(axis=axes)
+    cov = (a * b).mean(axis=axes) - mu_a * mu_b
+    return (((2 * mu_a * mu_b + SSIM_C1) * (2 * cov + SSIM_C2)) /
+            ((mu_a ** 2 + mu_b ** 2 + SSIM_C1) * (var_a + var_b + SSIM_C2)))
+
+def compare_images(img_a, img_b, tile=TILE_SIZE, ignore_regions=(), top_regions=10):
+    """Compare two RGB arrays tile by tile; returns scores and a per-tile score grid
+
+    ignore_regions are (left, top, right, bottom) pixel boxes, e.g. annotation banners.
+    Images of different sizes are compared over their common area.
+    """
+    started = time.perf_counter()
+    size_mismatch = img_a.shape != img_b.shape
+    h = min(img_a.shape[0], img_b.shape[0])
+    w = min(img_a.shape[1], img_b.shape[1])
+    img_a = _pad_to_tiles(img_a[:h, :w], tile)
+    img_b = _pad_to_tiles(img_b[:h, :w], tile)
+    grid_h, grid_w = img_a.shape[0] // tile, img_a.shape[1] // tile
+
+    # Skip identical tiles cheaply
+    changed = tile_hashes(img_a, tile) != tile_hashes(img_b, tile)
+    for left, top, right, bottom in ignore_regions:
+        changed[top // tile:-(-bottom // tile), left // tile:-(-right // tile)] = False
+
+    scores = np.zeros((grid_h, grid_w), dtype=np.float32)
+    rows, cols = np.nonzero(changed)
+    if len(rows):
+        ssim = _tile_ssim(_tile_luma(img_a, tile, rows, cols), _tile_luma(img_b, tile, rows, cols))
+        scores[rows, cols] = np.clip(1.0 - ssim, 0.0, 1.0)
+
+    visible = scores > CHANGE_THRESHOLD
+    order = np.argsort(scores, axis=None)[::-1][:top_regions]
+    regions = []
+    for flat in order:
+        r, c = divmod(int(flat), grid_w)
+        if scores[r, c] <= CHANGE_THRESHOLD:
+            break
+        regions.append({
+            "x": c * tile, "y": r * tile, "width": tile, "height": tile,
+            "score": round(float(scores[r, c]), 4)
+        })
+
+    return {
+        "size": [int(w), int(h)],
+        "size_mismatch": size_mismatch,
+        "tile_size": tile,
+        "tiles_total": int(grid_h * grid_w),
+        "tiles_identical": int(grid_h * grid_w - changed.sum()),
+        "tiles_changed": int(visible.sum()),
+        "changed_ratio": round(float(visible.mean()), 4),
+        "mean_score": round(float(scores.mean()), 4),
+        "max_score": round(float(scores.max()), 4),
+        "identical": not changed.any(),
+        "regions": regions,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "score_grid": scores
+    }
+
+def save_heatmap(base_img, score_grid, filepath, tile=TILE_SIZE):
+    """Write a heatmap of per-tile scores blended over the base screenshot"""
+    h, w = base_img.shape[:2]
+    heat = np.repeat(np.repeat(score_grid, tile, axis=0), tile, axis=1)[:h, :w]
+    # The grid only covers the area both screenshots share; a taller or wider base is cropped to it
+    base_img = base_img[:heat.shape[0], :heat.shape[1]]
+    alpha = np.clip(heat / max(float(score_grid.max()), CHANGE_THRESHOLD), 0, 1)[..., None] * 0.7
+    dimmed = base_img.astype(np.float32) * 0.5
+    red = np.array([255, 0, 0], dtype=np.float32)
+    blended = dimmed * (1 - alpha) + red * alpha
+    Image.fromarray(blended.astype(np.uint8)).save(filepath)
+    return filepath
+
+def compare_files(path_a, path_b, heatmap_path=None, **kwargs):
+    """Compare two screenshot files and optionally write the heatmap"""
+    img_a = load_rgb(path_a)
+    img_b = load_rgb(path_b)
+    result = compare_images(img_a, img_b, **kwargs)
+    grid = result.pop("score_grid")
+    if heatmap_path and not result["identical"]:
+        w, h = result["size"]
+        result["heatmap"] = save_heatmap(img_a[:h, :w], grid, heatmap_path, result["tile_size"])
+    return result
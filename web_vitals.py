@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Web Vitals - Load performance of the current page from Chrome's performance APIs
+Navigation Timing, paint timings, Largest Contentful Paint, Cumulative Layout
+Shift and long tasks, collected in one async script call
+"""
+
+from tracing import traced
+
+# LCP, layout shifts and long tasks are only exposed to PerformanceObservers;
+# buffered observers replay the entries recorded since navigation start.
+COLLECT_SCRIPT = """
+    const done = arguments[arguments.length - 1];
+    const entries = {lcp: [], shifts: [], longTasks: []};
+    const observers = [];
+    function observe(type, handler) {
+        try {
+            const observer = new PerformanceObserver(list => list.getEntries().forEach(handler));
+            observer.observe({type: type, buffered: true});
+            observers.push({observer: observer, handler: handler});
+        } catch (e) {
+            // Entry type not supported by this browser
+        }
+    }
+    observe('largest-contentful-paint', e => entries.lcp.push({
+        time: e.renderTime || e.loadTime || e.startTime,
+        size: e.size,
+        element: e.element ? e.element.tagName.toLowerCase() : null,
+        url: e.url || null
+    }));
+    observe('layout-shift', e => entries.shifts.push({
+        time: e.startTime, value: e.value, hadRecentInput: e.hadRecentInput
+    }));
+    observe('longtask', e => entries.longTasks.push({time: e.startTime, duration: e.duration}));
+
+    // Buffered entries are delivered in a later task, so give them a moment
+    setTimeout(() => {
+        observers.forEach(o => {
+            o.observer.takeRecords().forEach(o.handler);
+            o.observer.disconnect();
+        });
+        const nav = performance.getEntriesByType('navigation')[0];
+        entries.navigation = nav ? nav.toJSON() : null;
+        entries.paint = performance.getEntriesByType('paint').map(p => ({name: p.name, time: p.startTime}));
+        entries.resources = performance.getEntriesByType('resource').length;
+        done(entries);
+    }, arguments[0]);
+"""
+
+# Session windows from the CLS definition: shifts less than 1s apart, at most 5s long
+CLS_GAP_MS = 1000
+CLS_WINDOW_MS = 5000
+# The part of a long task beyond 50ms blocks input (Total Blocking Time)
+LONG_TASK_MS = 50
+
+def _ms(value):
+    """Round a millisecond value, keeping None for missing metrics"""
+    return None if value is None else round(value, 1)
+
+def cumulative_layout_shift(shifts):
+    """Largest session-window sum of layout shifts not caused by user input"""
+    best = current = 0.0
+    window_start = previous = None
+    for shift in sorted(shifts, key=lambda s: s["time"]):
+        if shift.get("hadRecentInput"):
+            continue
+        if (previous is None or shift["time"] - previous > CLS_GAP_MS
+                or shift["time"] - window_start > CLS_WINDOW_MS):
+            window_start = shift["time"]
+            current = 0.0
+        current += shift["value"]
+        previous = shift["time"]
+        best = max(best, current)
+    return round(best, 4)
+
+def summarize(entries):
+    """Turn the raw browser entries into the flat performance section"""
+    nav = entries.get("navigation") or {}
+    paint = {p["name"]: p["time"] for p in entries.get("paint", [])}
+    lcp = entries.get("lcp") or []
+    long_tasks = entries.get("longTasks") or []
+    last_lcp = lcp[-1] if lcp else {}
+
+    def span(start, end):
+        if not nav or not nav.get(end) or nav.get(start) is None:
+            return None
+        return _ms(nav[end] - nav[start])
+
+    secure_start = nav.get("secureConnectionStart") or 0
+    return {
+        "navigation": {
+            "protocol": nav.get("nextHopProtocol"),
+            "transfer_size": nav.get("transferSize"),
+            "encoded_body_size": nav.get("encodedBodySize"),
+            "redirect_ms": span("redirectStart", "redirectEnd"),
+            "dns_ms": span("domainLookupStart", "domainLookupEnd"),
+            "connect_ms": span("connectStart", "connectEnd"),
+            "tls_ms": _ms(nav["connectEnd"] - secure_start) if secure_start else None,
+            "ttfb_ms": _ms(nav.get("responseStart")),
+            "download_ms": span("responseStart", "responseEnd"),
+            "dom_interactive_ms": _ms(nav.get("domInteractive")),
+            "dom_content_loaded_ms": _ms(nav.get("domContentLoadedEventEnd")),
+            "load_event_ms": _ms(nav.get("loadEventEnd"))
+        },
+        "first_paint_ms": _ms(paint.get("first-paint")),
+        "first_contentful_paint_ms": _ms(paint.get("first-contentful-paint")),
+        "largest_contentful_paint_ms": _ms(last_lcp.get("time")),
+        "lcp_element": last_lcp.get("element"),
+        "lcp_url": last_lcp.get("url"),
+        "cumulative_layout_shift": cumulative_layout_shift(entries.get("shifts") or []),
+        "long_tasks": len(long_tasks),
+        "long_task_total_ms": _ms(sum(task["duration"] for task in long_tasks)),
+        "total_blocking_ms": _ms(sum(max(0, task["duration"] - LONG_TASK_MS) for task in long_tasks)),
+        "resource_count": entries.get("resources")
+    }
+
+@traced("web_vitals")
+def collect(driver, settle_ms=100):
+    """Collect the performance section for the page currently loaded in driver"""
+    return summarize(driver.execute_async_script(COLLECT_SCRIPT, settle_ms))
+
+def performance_deltas(baseline, candidate):
+    """Per-metric candidate minus baseline for every numeric metric both pages report"""
+    def numeric(section, prefix=""):
+        for key, value in (section or {}).items():
+            if isinstance(value, dict):
+                yield from numeric(value, f"{prefix}{key}.")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield f"{prefix}{key}", value
+
+    baseline_metrics = dict(numeric(baseline))
+    candidate_metrics = dict(numeric(candidate))
+    deltas = {}
+    for metric in baseline_metrics.keys() & candidate_metrics.keys():
+        before = baseline_metrics[metric]
+        after = candidate_metrics[metric]
+        deltas[metric] = {
+            "baseline": before,
+            "candidate": after,
+            "delta": round(after - before, 4),
+            "delta_pct": round((after - before) / before * 100, 1) if before else None
+        }
+    return dict(sorted(deltas.items()))